@@ -1,17 +1,19 @@
-import pdfplumber
 import re
 import csv
 import os
 from datetime import datetime
+from patrones import buscar
+from indice_secciones import IndiceEtiquetas
+from paginacion import texto_hasta_completar
+from tiempos import etapa
+
+VERSION_EXTRACTOR = "1"
 
 def pdf_to_text(path):
-    text = ""
-    with pdfplumber.open(path) as pdf:
-        for p in pdf.pages:
-            t = p.extract_text()
-            if t:
-                text += t + "\n"
-    return text
+    # Lee página por página hasta que todos los campos se resuelven sobre el texto ya leído:
+    # los conceptos se repiten en acueducto y alcantarillado, así que una etiqueta presente
+    # no basta; cada concepto debe aparecer dentro del rango de su sección
+    return texto_hasta_completar(path, 'AAA', campos_resueltos, set(extraer_campos("")), acumulado=True)
 
 def limpiar_numero(n):
     n = n.replace(",", "")  
@@ -21,53 +23,70 @@ def extraer_ultimo_valor(linea):
     nums = re.findall(r"\$?([\d\.,]+)", linea)
     return limpiar_numero(nums[-1]) if nums else None
 
-def extraer_bloque(texto, titulo):
-    patron = rf"{titulo}(.*?)(TOTAL [A-Z ]+)"
-    m = re.search(patron, texto, re.DOTALL | re.IGNORECASE)
-    return m.group(1) if m else ""
-
 def extraer_valor_concepto(bloque, concepto):
     patron = rf"{concepto}.*"
-    m = re.search(patron, bloque, re.IGNORECASE)
+    m = buscar(patron, bloque, re.IGNORECASE)
     if not m:
         return None
     return extraer_ultimo_valor(m.group(0))
 
-def extraer_factura(texto):
+# Títulos de sección y totales indexados en una sola pasada por extraer_campos
+ETIQUETAS_AAA = [
+    "Cargo fijo Comercial",
+    "TOTAL ACUEDUCTO",
+    "TOTAL ALCANTARILLADO",
+    "TOTAL ASEO",
+    "TOTAL OTROS CONCEPTOS",
+    "TOTAL OTROS COBROS"
+]
 
-    bloque_acueducto = extraer_bloque(texto, "Cargo fijo Comercial")
-    bloque_alcantarillado = extraer_bloque(texto, "Cargo fijo Comercial")[len(bloque_acueducto):]
+VALOR_TOTAL = re.compile(r"\s*\$([\d\.,]+)")
 
-    bloque_acueducto = re.search(r"Cargo fijo Comercial.*?TOTAL ACUEDUCTO", texto, re.DOTALL).group(0)
-    bloque_alc = re.search(r"Cargo fijo Comercial.*?TOTAL ALCANTARILLADO", texto, re.DOTALL).group(0)
-    bloque_alcantarillado = bloque_alc[len(bloque_acueducto):] if bloque_alc else ""
+def extraer_total(indice, etiqueta):
+    m = indice.valor_despues(etiqueta, VALOR_TOTAL)
+    return limpiar_numero(m.group(1)) if m else None
 
-    total_acu = re.search(r"TOTAL ACUEDUCTO\s*\$([\d\.,]+)", texto)
-    total_alc = re.search(r"TOTAL ALCANTARILLADO\s*\$([\d\.,]+)", texto)
-    total_aseo = re.search(r"TOTAL ASEO\s*\$([\d\.,]+)", texto)
-    total_ot_con = re.search(r"TOTAL OTROS CONCEPTOS\s*\$([\d\.,]+)", texto)
+def extraer_campos(texto):
 
-    total_ot_cob = re.search(r"TOTAL OTROS COBROS\s*\$([\d\.,]+)", texto)
-    total_ot_cob = limpiar_numero(total_ot_cob.group(1)) if total_ot_cob else None
+    indice = IndiceEtiquetas(texto, ETIQUETAS_AAA)
+
+    # Acueducto: de "Cargo fijo Comercial" a "TOTAL ACUEDUCTO";
+    # alcantarillado: desde ahí hasta "TOTAL ALCANTARILLADO"
+    rango_acu = indice.seccion("Cargo fijo Comercial", "TOTAL ACUEDUCTO")
+    rango_alc = indice.seccion("Cargo fijo Comercial", "TOTAL ALCANTARILLADO")
+
+    bloque_acueducto = indice.recorte(*rango_acu) if rango_acu else ""
+    if rango_alc:
+        inicio_alc = rango_acu[1] if rango_acu else rango_alc[0]
+        bloque_alcantarillado = indice.recorte(inicio_alc, rango_alc[1])
+    else:
+        bloque_alcantarillado = ""
 
     data = {
         "Consumo_Acueducto": 4,
         "Cargo_fijo_Comercial_Acueducto": extraer_valor_concepto(bloque_acueducto, "Cargo fijo Comercial"),
         "Consumo_basico_Comercial_Acueducto": extraer_valor_concepto(bloque_acueducto, "Consumo básico Comercial"),
         "Tasa_uso_basico_Comercial_Acueducto": extraer_valor_concepto(bloque_acueducto, "Tasa de uso básico Comercial"),
-        "Total_Acueducto": limpiar_numero(total_acu.group(1)) if total_acu else None,
+        "Total_Acueducto": extraer_total(indice, "TOTAL ACUEDUCTO"),
 
         "Consumo_Alcantarillado": 4,
         "Cargo_fijo_Comercial_Alcantarillado": extraer_valor_concepto(bloque_alcantarillado, "Cargo fijo Comercial"),
         "Consumo_basico_Comercial_Alcantarillado": extraer_valor_concepto(bloque_alcantarillado, "Consumo básico Comercial"),
         "Tasa_retributiva_Alcantarillado": extraer_valor_concepto(bloque_alcantarillado, "Tasa retributiva básico Comercial"),
-        "Total_Alcantarillado": limpiar_numero(total_alc.group(1)) if total_alc else None,
+        "Total_Alcantarillado": extraer_total(indice, "TOTAL ALCANTARILLADO"),
 
-        "Total_Aseo": limpiar_numero(total_aseo.group(1)) if total_aseo else None,
-        "Total_Otros_Conceptos": limpiar_numero(total_ot_con.group(1)) if total_ot_con else None,
-        "Total_Otros_Cobros": total_ot_cob
+        "Total_Aseo": extraer_total(indice, "TOTAL ASEO"),
+        "Total_Otros_Conceptos": extraer_total(indice, "TOTAL OTROS CONCEPTOS"),
+        "Total_Otros_Cobros": extraer_total(indice, "TOTAL OTROS COBROS")
     }
 
+    return data
+
+def campos_resueltos(texto):
+    return {campo for campo, valor in extraer_campos(texto).items() if valor is not None}
+
+def extraer_factura(texto):
+    data = extraer_campos(texto)
     data["Total_Factura"] = (
         data["Total_Acueducto"] +
         data["Total_Alcantarillado"] +
@@ -78,11 +97,17 @@ def extraer_factura(texto):
 
     return data
 
-def exportar_a_csv(datos, pdf_path, csv_filename="AAA_facturas.csv"):
-    """
-    Exporta los datos extraídos a un archivo CSV
-    """
-    csv_data = {
+CAMPOS_CSV = [
+    'Fecha_Extraccion', 'Archivo_PDF', 
+    'Consumo_Acueducto', 'Cargo_fijo_Comercial_Acueducto', 'Consumo_basico_Comercial_Acueducto', 
+    'Tasa_uso_basico_Comercial_Acueducto', 'Total_Acueducto',
+    'Consumo_Alcantarillado', 'Cargo_fijo_Comercial_Alcantarillado', 'Consumo_basico_Comercial_Alcantarillado',
+    'Tasa_retributiva_Alcantarillado', 'Total_Alcantarillado',
+    'Total_Aseo', 'Total_Otros_Conceptos', 'Total_Otros_Cobros', 'Total_Factura'
+]
+
+def fila_csv(datos, pdf_path):
+    return {
         'Fecha_Extraccion': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         'Archivo_PDF': os.path.basename(pdf_path),
         'Consumo_Acueducto': datos.get('Consumo_Acueducto', 'No encontrado'),
@@ -100,20 +125,21 @@ def exportar_a_csv(datos, pdf_path, csv_filename="AAA_facturas.csv"):
         'Total_Otros_Cobros': datos.get('Total_Otros_Cobros', 'No encontrado'),
         'Total_Factura': datos.get('Total_Factura', 'No encontrado')
     }
-    
+
+def exportar_a_csv(datos, pdf_path, csv_filename="AAA_facturas.csv", escritor=None):
+    """
+    Exporta los datos extraídos a un archivo CSV
+    """
+    csv_data = fila_csv(datos, pdf_path)
+
+    if escritor is not None:
+        escritor.escribir(csv_filename, CAMPOS_CSV, csv_data)
+        return csv_filename
+
     file_exists = os.path.isfile(csv_filename)
     
     with open(csv_filename, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'Fecha_Extraccion', 'Archivo_PDF', 
-            'Consumo_Acueducto', 'Cargo_fijo_Comercial_Acueducto', 'Consumo_basico_Comercial_Acueducto', 
-            'Tasa_uso_basico_Comercial_Acueducto', 'Total_Acueducto',
-            'Consumo_Alcantarillado', 'Cargo_fijo_Comercial_Alcantarillado', 'Consumo_basico_Comercial_Alcantarillado',
-            'Tasa_retributiva_Alcantarillado', 'Total_Alcantarillado',
-            'Total_Aseo', 'Total_Otros_Conceptos', 'Total_Otros_Cobros', 'Total_Factura'
-        ]
-        
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CAMPOS_CSV)
         
         if not file_exists:
             writer.writeheader()
@@ -178,6 +204,17 @@ def mostrar_resultados(datos):
         else:
             print(f"    {nombre}: No encontrado")
 
+def procesar_factura(pdf_path):
+    """
+    Punto de entrada uniforme usado por el procesamiento por lotes
+    """
+    texto = pdf_to_text(pdf_path)
+    with etapa("busqueda"):
+        return extraer_factura(texto)
+
+def exportar_resultado(datos, pdf_path, escritor=None):
+    return exportar_a_csv(datos, pdf_path, escritor=escritor)
+
 def main():
     ruta = "AAA_Test.pdf"
     
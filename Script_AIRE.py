@@ -1,13 +1,35 @@
-import easyocr
-from pdf2image import convert_from_path
-import numpy as np
 import re
 import os
 import csv
 from datetime import datetime
+from functools import partial
+from regex_seguro import PresupuestoRegex, buscar_acotado
+from backends_texto import abrir
+from dpi_adaptativo import OCRConConfianza, textos_adaptativos
+from plantillas import aprender_plantilla, extraer_con_plantilla
+from resultado_ocr import vecindad
+from tiempos import etapa
+
+VERSION_EXTRACTOR = "1"
+
+# Dispositivo del lector OCR de esta empresa (procesar_lote precalienta este mismo)
+GPU_OCR = False
 
 pdf_path = "AIRE_Test.pdf"
 
+# Etiquetas que usan las búsquedas de campos; el modo "etiquetas" solo reconoce sus vecindades
+ETIQUETAS_AIRE = ["Consumo activa", "Contribución Activa", "Tasa Seguridad", "Total Mes"]
+
+# Etiqueta junto a la que está cada campo; ubica las regiones de las plantillas
+ETIQUETA_POR_CAMPO = {
+    "Consumo": "Consumo activa",
+    "Tarifa": "Consumo activa",
+    "Costo": "Consumo activa",
+    "Contribucion_Activa": "Contribución Activa",
+    "Tasa_Seguridad": "Tasa Seguridad",
+    "Total_Mes": "Total Mes",
+}
+
 def limpiar_numero(n):
     if not n:
         return None
@@ -16,14 +38,14 @@ def limpiar_numero(n):
     n = n.replace(",", ".")
     return float(n)
 
-def buscar_valor_decimal(texto, etiqueta, grupo=1):
+def buscar_valor_decimal(texto, etiqueta, grupo=1, presupuesto=None):
     patron = rf"{etiqueta}" + r".*?[\d\.]+[,\.]\d+" * (grupo - 1) + r".*?([\d\.]+[,\.]\d+)"
-    m = re.search(patron, texto, re.IGNORECASE | re.DOTALL)
+    m = buscar_acotado(patron, texto, re.IGNORECASE | re.DOTALL, etiqueta=etiqueta, presupuesto=presupuesto)
     return limpiar_numero(m.group(1)) if m else None
 
-def buscar_costo(texto):
+def buscar_costo(texto, presupuesto=None):
     patron = r"Consumo activa.*?[\d\.]+[,\.]\d+.*?[\d\.]+[,\.]\d+.*?\s*[\$]?\s*([\d\.\,]+)"
-    m = re.search(patron, texto, re.IGNORECASE | re.DOTALL)
+    m = buscar_acotado(patron, texto, re.IGNORECASE | re.DOTALL, etiqueta="Consumo activa", presupuesto=presupuesto)
     if m:
         valor = m.group(1)
         clean_len = len(valor.replace('.', '').replace(',', '').replace('$', ''))
@@ -32,9 +54,9 @@ def buscar_costo(texto):
         return limpiar_numero(valor)
     return None
 
-def buscar_valor_con_salto(texto, etiqueta, req_len):
+def buscar_valor_con_salto(texto, etiqueta, req_len, presupuesto=None):
     patron = rf"{etiqueta}.*?\$?\s*([\d\.\,]+)"
-    m = re.search(patron, texto, re.IGNORECASE | re.DOTALL)
+    m = buscar_acotado(patron, texto, re.IGNORECASE | re.DOTALL, etiqueta=etiqueta, presupuesto=presupuesto)
 
     if m:
         valor = m.group(1)
@@ -45,16 +67,18 @@ def buscar_valor_con_salto(texto, etiqueta, req_len):
         return limpiar_numero(valor)
     return None
 
-def buscar_total_entero(texto, etiqueta):
+def buscar_total_entero(texto, etiqueta, presupuesto=None):
     patron = rf"{etiqueta}.*?\$?\s*([^0-9\.\,]*)([\d\.\,]+)"
-    m = re.search(patron, texto, re.IGNORECASE | re.DOTALL)
+    m = buscar_acotado(patron, texto, re.IGNORECASE | re.DOTALL, etiqueta=etiqueta, presupuesto=presupuesto)
     return limpiar_numero(m.group(2)) if m and len(m.groups()) >= 2 else None
 
-def exportar_a_csv(datos, pdf_path, csv_filename="AIRE_facturas.csv"):
-    """
-    Exporta los datos extraídos a un archivo CSV
-    """
-    csv_data = {
+CAMPOS_CSV = [
+    'Fecha_Extraccion', 'Archivo_PDF', 'Consumo', 'Tarifa', 
+    'Costo', 'Contribucion_Activa', 'Total_Energia', 'Tasa_Seguridad', 'Total_Mes'
+]
+
+def fila_csv(datos, pdf_path):
+    return {
         'Fecha_Extraccion': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         'Archivo_PDF': os.path.basename(pdf_path),
         'Consumo': datos.get('Consumo', 'No encontrado'),
@@ -65,16 +89,21 @@ def exportar_a_csv(datos, pdf_path, csv_filename="AIRE_facturas.csv"):
         'Tasa_Seguridad': datos.get('Tasa_Seguridad', 'No encontrado'),
         'Total_Mes': datos.get('Total_Mes', 'No encontrado')
     }
-    
+
+def exportar_a_csv(datos, pdf_path, csv_filename="AIRE_facturas.csv", escritor=None):
+    """
+    Exporta los datos extraídos a un archivo CSV
+    """
+    csv_data = fila_csv(datos, pdf_path)
+
+    if escritor is not None:
+        escritor.escribir(csv_filename, CAMPOS_CSV, csv_data)
+        return csv_filename
+
     file_exists = os.path.isfile(csv_filename)
     
     with open(csv_filename, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'Fecha_Extraccion', 'Archivo_PDF', 'Consumo', 'Tarifa', 
-            'Costo', 'Contribucion_Activa', 'Total_Energia', 'Tasa_Seguridad', 'Total_Mes'
-        ]
-        
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CAMPOS_CSV)
         
         if not file_exists:
             writer.writeheader()
@@ -109,57 +138,187 @@ def mostrar_resultados(datos):
         else:
             print(f"{nombre}: No encontrado")
 
-def procesar_pdf(pdf_path):
+# Campos que deben salir del OCR para no reintentar a mayor resolución
+REQUERIDOS_AIRE = ("Consumo", "Tarifa", "Costo", "Total_Mes")
+
+def _unir_paginas(paginas):
+    return "".join(texto + "\n" for texto, _ in paginas)
+
+def _completo(paginas):
+    datos = extraer_datos_aire(_unir_paginas(paginas))
+    return all(datos[campo] is not None for campo in REQUERIDOS_AIRE)
+
+def _encontrados(datos):
+    return [campo for campo, valor in datos.items() if valor is not None]
+
+def _reconocer_region(img_np):
+    from lector_ocr import obtener_lector
+    return obtener_lector(gpu=GPU_OCR).readtext(img_np, detail=1)
+
+def _extraer_regiones(textos, paginas_ocr):
+    with etapa("busqueda"):
+        return extraer_datos_aire(_unir_paginas(textos), paginas_ocr=paginas_ocr)
+
+def procesar_pdf(pdf_path, modo_ocr="completo", preprocesar=False, dpi_adaptativo=False, lote_ocr=1,
+                 trabajadores_pagina=0, mosaico=0):
+    resultado = _leer_pdf(pdf_path, modo_ocr, preprocesar, dpi_adaptativo, lote_ocr, trabajadores_pagina, mosaico)
+    return _unir_paginas(resultado[0]) if resultado else None
+
+def _leer_pdf(pdf_path, modo_ocr="completo", preprocesar=False, dpi_adaptativo=False, lote_ocr=1,
+              trabajadores_pagina=0, mosaico=0):
+    """
+    Lista (texto, origen) por página y ResultadoOCR (cajas y confianzas) de las páginas escaneadas
+    """
     if not os.path.exists(pdf_path):
         print(f"Error: Archivo no encontrado: {pdf_path}")
         return None
 
-    print("Convirtiendo PDF a imágenes...")
-    paginas = convert_from_path(pdf_path, dpi=300)
+    def reconocer(img_np):
+        # Importación diferida: easyocr/torch solo se cargan si hay páginas escaneadas
+        from lector_ocr import obtener_lector
+        from ocr_etiquetas import ocr_por_etiquetas
+        reader = obtener_lector(gpu=GPU_OCR)
+        if preprocesar:
+            from preprocesado import preprocesar as preparar
+            img_np = preparar(img_np)
+        if modo_ocr == "etiquetas":
+            return ocr_por_etiquetas(reader, img_np, ETIQUETAS_AIRE, detail=1)
+        if mosaico > 1:
+            from mosaico_ocr import ocr_mosaico
+            return ocr_mosaico(img_np, mosaico, gpu=GPU_OCR)
+        return reader.readtext(img_np, detail=1)
 
-    reader = easyocr.Reader(['es'], gpu=False)
-    texto_total = ""
+    def reconocer_varias(imagenes):
+        from lector_ocr import obtener_lector
+        from ocr_lotes import reconocer_lote
+        if preprocesar:
+            from preprocesado import preprocesar as preparar
+            imagenes = [preparar(img_np) for img_np in imagenes]
+        return reconocer_lote(obtener_lector(gpu=GPU_OCR), imagenes, lote_ocr)
 
-    print("Realizando OCR...")
-    for img in paginas:
-        img_np = np.array(img)
-        resultado = reader.readtext(img_np, detail=0)
-        texto_total += "\n".join(resultado) + "\n"
+    reconocer_pdf = None
+    if trabajadores_pagina > 1:
+        # Las páginas escaneadas se reparten entre procesos que comparten el modelo cargado
+        from pool_ocr import obtener_pool
+        pool = obtener_pool(trabajadores_pagina, gpu=GPU_OCR)
+        etiquetas = ETIQUETAS_AIRE if modo_ocr == "etiquetas" else None
+        reconocer_pdf = partial(pool.reconocer_pdf, preprocesar=preprocesar, etiquetas=etiquetas)
 
-    return texto_total
+    # El modo "etiquetas" recorta zonas distintas en cada página, así que no se agrupa en lotes
+    por_lote = lote_ocr if modo_ocr == "completo" else 1
+    ocr_pagina = OCRConConfianza(reconocer, "\n", reconocer_varias if por_lote > 1 else None, por_lote,
+                                 reconocer_pdf)
 
-def main():
-    texto_extraido = procesar_pdf(pdf_path)
+    print("Extrayendo texto (OCR solo en páginas escaneadas)...")
+    if dpi_adaptativo:
+        paginas = textos_adaptativos(pdf_path, 'AIRE', ocr_pagina, _completo)
+    else:
+        with abrir(pdf_path, 'AIRE', ocr_pagina=ocr_pagina, dpi=300) as lector:
+            paginas = lector.textos()
+    return paginas, ocr_pagina.paginas
 
-    if texto_extraido:
+def extraer_datos_aire(texto_extraido, presupuesto=None, paginas_ocr=None):
+    """
+    Aplica las búsquedas de campos sobre el texto OCR de una factura AIRE.
+
+    Con `paginas_ocr` (ResultadoOCR de las páginas escaneadas), cada campo se busca
+    primero en la vecindad de su etiqueta y solo si ahí no aparece, en todo el texto.
+    """
+    if presupuesto is None:
+        presupuesto = PresupuestoRegex()
+
+    vecindades = {}
 
-        datos = {
-            "Consumo": buscar_valor_decimal(texto_extraido, "Consumo activa", grupo=2),
-            "Tarifa": buscar_valor_decimal(texto_extraido, "Consumo activa", grupo=1),
+    def buscar(funcion, ancla, **opciones):
+        if paginas_ocr:
+            if ancla not in vecindades:
+                vecindades[ancla] = vecindad(paginas_ocr, ancla)
+            if vecindades[ancla] is not None:
+                valor = funcion(vecindades[ancla], presupuesto=presupuesto, **opciones)
+                if valor is not None:
+                    return valor
+        return funcion(texto_extraido, presupuesto=presupuesto, **opciones)
 
-            "Costo": buscar_costo(texto_extraido),
+    datos = {
+        "Consumo": buscar(buscar_valor_decimal, "Consumo activa", etiqueta="Consumo activa", grupo=2),
+        "Tarifa": buscar(buscar_valor_decimal, "Consumo activa", etiqueta="Consumo activa", grupo=1),
+
+        "Costo": buscar(buscar_costo, "Consumo activa"),
+
+        "Contribucion_Activa": buscar(buscar_valor_con_salto, "Contribución Activa",
+                                      etiqueta="Contribución Activa", req_len=7),
+
+        "Total_Energia": None,
+
+        "Tasa_Seguridad": buscar(buscar_total_entero, "Tasa Seguridad", etiqueta="Tasa Seguridad"),
+
+        "Total_Mes": buscar(buscar_valor_con_salto, "Total Mes", etiqueta="Total Mes", req_len=8),
+    }
 
-            "Contribucion_Activa": buscar_valor_con_salto(texto_extraido, "Contribución Activa", req_len=7),
+    presupuesto.reportar(" (AIRE)")
 
-            "Total_Energia": None,
+    try:
+        datos["Total_Energia"] = datos["Costo"] + datos["Contribucion_Activa"]
+        datos["Total_Energia"] = round(datos["Total_Energia"])  
+    except:
+        datos["Total_Energia"] = None
 
-            "Tasa_Seguridad": buscar_total_entero(texto_extraido, "Tasa Seguridad"),
+    try:
+        valor = int(datos["Tasa_Seguridad"])
+        if valor > 9_000_000:
+            datos["Tasa_Seguridad"] = float(str(valor)[1:])
+    except:
+        pass
 
-            "Total_Mes": buscar_valor_con_salto(texto_extraido, "Total Mes", req_len=8),
-        }
+    return datos
 
-        try:
-            datos["Total_Energia"] = datos["Costo"] + datos["Contribucion_Activa"]
-            datos["Total_Energia"] = round(datos["Total_Energia"])  
-        except:
-            datos["Total_Energia"] = None
+def procesar_factura(pdf_path, modo_ocr="completo", preprocesar=False, dpi_adaptativo=False, plantillas=False,
+                     lote_ocr=1, trabajadores_pagina=0, mosaico=0):
+    """
+    Punto de entrada uniforme usado por el procesamiento por lotes.
+
+    Con `plantillas`, si ya se aprendió el diseño de la factura solo se reconocen las
+    regiones de sus campos; si alguno falla se hace el OCR completo y se reaprende.
+    No aplica con `preprocesar`, que cambia la geometría de la página. Con `lote_ocr`
+    mayor que 1 las páginas escaneadas se reconocen de a `lote_ocr` por llamada, y con
+    `trabajadores_pagina` mayor que 1, en paralelo en ese número de procesos. Con
+    `mosaico` mayor que 1 cada página se parte en ese número de franjas reconocidas
+    en paralelo, para bajar la latencia de una sola factura.
+    """
+    for trabajadores in (trabajadores_pagina, mosaico):
+        if trabajadores > 1:
+            # Los pools se crean antes de cualquier inferencia en este proceso (ver PoolOCR)
+            from pool_ocr import obtener_pool
+            obtener_pool(trabajadores, gpu=GPU_OCR)
+    plantillas = plantillas and not preprocesar and os.path.exists(pdf_path)
+    if plantillas:
+        datos = extraer_con_plantilla(pdf_path, 'AIRE', _reconocer_region, _extraer_regiones, _encontrados)
+        if datos is not None:
+            return datos
+
+    resultado = _leer_pdf(pdf_path, modo_ocr, preprocesar, dpi_adaptativo, lote_ocr, trabajadores_pagina,
+                          mosaico)
+    if not resultado:
+        return None
+    paginas, paginas_ocr = resultado
+    texto_extraido = _unir_paginas(paginas)
+    if not texto_extraido:
+        return None
+    with etapa("busqueda"):
+        datos = extraer_datos_aire(texto_extraido, paginas_ocr=paginas_ocr)
+    if plantillas:
+        aprender_plantilla(pdf_path, 'AIRE', paginas, paginas_ocr, ETIQUETA_POR_CAMPO, _encontrados(datos))
+    return datos
+
+def exportar_resultado(datos, pdf_path, escritor=None):
+    return exportar_a_csv(datos, pdf_path, escritor=escritor)
+
+def main():
+    texto_extraido = procesar_pdf(pdf_path)
+
+    if texto_extraido:
 
-        try:
-            valor = int(datos["Tasa_Seguridad"])
-            if valor > 9_000_000:
-                datos["Tasa_Seguridad"] = float(str(valor)[1:])
-        except:
-            pass
+        datos = extraer_datos_aire(texto_extraido)
 
         print("\n========== RESULTADO FINAL ==========\n")
         print(datos)
@@ -1,8 +1,31 @@
-import pdfplumber
-import re
 import csv
 import os
 from datetime import datetime
+from paginacion import texto_hasta_completar
+from patrones import Campo, EspecificacionCampos, Patron
+from tiempos import etapa
+
+VERSION_EXTRACTOR = "1"
+
+def _negativo(match):
+    return f"-{match.group(1)}"
+
+CAMPOS_BIA = EspecificacionCampos('BIA', [
+    Campo('Consumo', [r'Energía activa\s*\(([\d.,]+)\s*kWh']),
+    Campo('Tarifa', [r'Cu\s*\$([\d.,]+)']),
+    Campo('Servicios BIA', [r'Servicios BIA.*?\$([\d.,]+)']),
+    Campo('Otros cobros', [r'Otros cobros\s*\$\s*([\d.,]+)']),
+    Campo('Intereses', [r'Intereses\s*\$\s*([\d.,]+)']),
+    Campo('Retenciones', [Patron(r'Retenciones\s*-\$([\d.,]+)', _negativo)]),
+    Campo('Total de la Factura', [r'Total a cobrar\s*\$\s*([\d.,]+)']),
+    Campo('Energía Solar', [
+        Patron(r'Energía Solar\s*[^\d]*-\$?([\d.,]+)', _negativo),
+        Patron(r'Energía Solar.*?-\$?([\d.,]+)', _negativo),
+    ]),
+])
+
+# Se deja de leer páginas solo cuando están todos los campos que se exportan
+REQUERIDOS_BIA = CAMPOS_BIA.nombres()
 
 def extract_invoice_data(pdf_path):
     """
@@ -21,60 +44,34 @@ def extract_invoice_data(pdf_path):
     }
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-            
-            patterns = {
-                'Consumo': r'Energía activa\s*\(([\d.,]+)\s*kWh',
-                'Tarifa': r'Cu\s*\$([\d.,]+)',
-                'Servicios BIA': r'Servicios BIA.*?\$([\d.,]+)',
-                'Otros cobros': r'Otros cobros\s*\$\s*([\d.,]+)',
-                'Intereses': r'Intereses\s*\$\s*([\d.,]+)',
-                'Retenciones': r'Retenciones\s*-\$([\d.,]+)',
-                'Total de la Factura': r'Total a cobrar\s*\$\s*([\d.,]+)'
-            }
-            
-            for field, pattern in patterns.items():
-                match = re.search(pattern, text)
-                if match:
-                    if field == 'Retenciones':
-                        data[field] = f"-{match.group(1)}"
-                    else:
-                        data[field] = match.group(1)
-            
-            energia_solar_patterns = [
-                r'Energía Solar\s*[^\d]*-\$?([\d.,]+)',
-                r'Energía Solar.*?-\$?([\d.,]+)',
-            ]
-            
-            for pattern in energia_solar_patterns:
-                match = re.search(pattern, text)
-                if match:
-                    data['Energía Solar'] = f"-{match.group(1)}"
-                    break
-            
-            if data['Consumo'] and data['Tarifa']:
-
-                consumo_num = float(data['Consumo'].replace('.', '').replace(',', '.'))
-                tarifa_num = float(data['Tarifa'].replace('.', '').replace(',', '.'))
-                
-                costo_calculado = consumo_num * tarifa_num
-                
-                data['Costo'] = f"{costo_calculado:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        text = texto_hasta_completar(pdf_path, 'BIA', CAMPOS_BIA.resueltos, REQUERIDOS_BIA)
+        
+        with etapa("busqueda"):
+            data.update(CAMPOS_BIA.escanear(text))
+        
+        if data['Consumo'] and data['Tarifa']:
+
+            consumo_num = float(data['Consumo'].replace('.', '').replace(',', '.'))
+            tarifa_num = float(data['Tarifa'].replace('.', '').replace(',', '.'))
             
-            return data
+            costo_calculado = consumo_num * tarifa_num
             
+            data['Costo'] = f"{costo_calculado:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        
+        return data
+        
     except Exception as e:
         print(f"Error al procesar el PDF: {e}")
         return None
 
-def exportar_a_csv(datos, pdf_path, csv_filename="BIA_facturas.csv"):
-    """
-    Exporta los datos extraídos a un archivo CSV
-    """
-    csv_data = {
+CAMPOS_CSV = [
+    'Fecha_Extraccion', 'Archivo_PDF', 'Consumo_kWh', 'Tarifa_por_kWh', 
+    'Costo_Calculado', 'Servicios_BIA', 'Otros_Cobros', 'Energia_Solar',
+    'Intereses', 'Retenciones', 'Total_Factura'
+]
+
+def fila_csv(datos, pdf_path):
+    return {
         'Fecha_Extraccion': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         'Archivo_PDF': os.path.basename(pdf_path),
         'Consumo_kWh': datos.get('Consumo', 'No encontrado'),
@@ -87,17 +84,21 @@ def exportar_a_csv(datos, pdf_path, csv_filename="BIA_facturas.csv"):
         'Retenciones': datos.get('Retenciones', 'No encontrado'),
         'Total_Factura': datos.get('Total de la Factura', 'No encontrado')
     }
-    
+
+def exportar_a_csv(datos, pdf_path, csv_filename="BIA_facturas.csv", escritor=None):
+    """
+    Exporta los datos extraídos a un archivo CSV
+    """
+    csv_data = fila_csv(datos, pdf_path)
+
+    if escritor is not None:
+        escritor.escribir(csv_filename, CAMPOS_CSV, csv_data)
+        return csv_filename
+
     file_exists = os.path.isfile(csv_filename)
     
     with open(csv_filename, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'Fecha_Extraccion', 'Archivo_PDF', 'Consumo_kWh', 'Tarifa_por_kWh', 
-            'Costo_Calculado', 'Servicios_BIA', 'Otros_Cobros', 'Energia_Solar',
-            'Intereses', 'Retenciones', 'Total_Factura'
-        ]
-        
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CAMPOS_CSV)
         
         if not file_exists:
             writer.writeheader()
@@ -134,6 +135,15 @@ def mostrar_resultados(datos):
         else:
             print(f"{nombre}: No encontrado")
 
+def procesar_factura(pdf_path):
+    """
+    Punto de entrada uniforme usado por el procesamiento por lotes
+    """
+    return extract_invoice_data(pdf_path)
+
+def exportar_resultado(datos, pdf_path, escritor=None):
+    return exportar_a_csv(datos, pdf_path, escritor=escritor)
+
 def main():
     pdf_path = "BIA_Test.pdf"  
     
@@ -1,67 +1,62 @@
 import re
-import PyPDF2
 import csv
 import os
 from datetime import datetime
+from patrones import Campo, EspecificacionCampos, Patron
+from paginacion import texto_hasta_completar
+from tiempos import etapa
+
+VERSION_EXTRACTOR = "1"
+
+def _consumo(match):
+    # Diferencia entre lectura actual y anterior del medidor
+    return int(match.group(1)) - int(match.group(2))
+
+def _valor_pesos(match):
+    return float(match.group(1).replace(',', ''))
+
+def _mayor_valor(valores):
+    # Tomar el valor más grande de la tabla final
+    return max(float(valor.replace(',', '')) for valor in valores)
+
+CAMPOS_CELSIA = EspecificacionCampos('CELSIA', [
+    Campo('Consumo', [Patron(r'Energia Activa\s+(\d+)\s+(\d+)\s+\d+\s+\d+', _consumo)]),
+    Campo('Tarifa', [
+        Patron(r'Energia Activa\s+\d+\s+\d+\s+\d+\s+\d+\s*\$?(\d+\.\d+)', lambda m: float(m.group(1)))
+    ]),
+    # Primer valor con formato $xxx,xxx después de "OTROS CONCEPTOS", o antes de "OTROS"
+    Campo('Valor Otros', [
+        Patron(r'OTROS CONCEPTOS[^$]*\$(\d{1,3}(?:,\d{3})+)', _valor_pesos),
+        Patron(r'\$(\d{1,3}(?:,\d{3})+)[^$]*OTROS', _valor_pesos),
+    ], flags=re.IGNORECASE | re.DOTALL),
+    Campo('Total Factura', [
+        Patron(r'TOTAL\s*A\s*PAGAR[^$]*\$(\d{1,3}(?:,\d{3})+)', _valor_pesos, flags=re.IGNORECASE | re.DOTALL),
+        # Patrones $xxx,xxx que no tengan más de 6 dígitos
+        Patron(r'\$(\d{3},\d{3})(?![^$]*\d{4})', _mayor_valor, todas=True),
+    ]),
+])
+
+# Todos los campos; el total por el mayor valor nunca cuenta como resuelto y obliga a leer todo
+REQUERIDOS_CELSIA = CAMPOS_CELSIA.nombres()
 
 def extraer_datos_celsia(pdf_path):
-    # Extraer texto del PDF
-    with open(pdf_path, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
-        texto_completo = ""
-        for page in reader.pages:
-            texto_completo += page.extract_text()
+    # Extraer texto del PDF (backend PyPDF2 por defecto, ver backends_texto),
+    # página por página hasta tener los campos requeridos
+    texto_completo = texto_hasta_completar(pdf_path, 'CELSIA', CAMPOS_CELSIA.resueltos, REQUERIDOS_CELSIA,
+                                           separador="")
     
     datos = {}
     
     print(" Analizando factura CELSIA...")
     
-    # 1. Extraer CONSUMO - Buscar diferencia entre lecturas del medidor
-    patron_energia = r'Energia Activa\s+(\d+)\s+(\d+)\s+\d+\s+\d+'
-    match_energia = re.search(patron_energia, texto_completo)
-    if match_energia:
-        lectura_actual = int(match_energia.group(1))
-        lectura_anterior = int(match_energia.group(2))
-        datos['Consumo'] = lectura_actual - lectura_anterior
-    
-    # 2. Extraer TARIFA - Buscar después de las lecturas
-    patron_tarifa = r'Energia Activa\s+\d+\s+\d+\s+\d+\s+\d+\s*\$?(\d+\.\d+)'
-    match_tarifa = re.search(patron_tarifa, texto_completo)
-    if match_tarifa:
-        datos['Tarifa'] = float(match_tarifa.group(1))
-    
-    # 3. Extraer VALOR OTROS - Buscar en la sección de otros conceptos
-    # Buscar después de "OTROS CONCEPTOS" el primer valor grande con formato $xxx,xxx
-    patron_otros = r'OTROS CONCEPTOS[^$]*\$(\d{1,3}(?:,\d{3})+)'
-    match_otros = re.search(patron_otros, texto_completo, re.IGNORECASE | re.DOTALL)
-    if match_otros:
-        valor_str = match_otros.group(1).replace(',', '')
-        datos['Valor Otros'] = float(valor_str)
-    else:
-        # Buscar cualquier valor grande con formato $xxx,xxx cerca de "OTROS"
-        patron_otros_alt = r'\$(\d{1,3}(?:,\d{3})+)[^$]*OTROS'
-        match_otros_alt = re.search(patron_otros_alt, texto_completo, re.IGNORECASE | re.DOTALL)
-        if match_otros_alt:
-            valor_str = match_otros_alt.group(1).replace(',', '')
-            datos['Valor Otros'] = float(valor_str)
-    
-    # 4. Extraer TOTAL FACTURA - Buscar después de "TOTAL A PAGAR"
-    patron_total = r'TOTAL\s*A\s*PAGAR[^$]*\$(\d{1,3}(?:,\d{3})+)'
-    match_total = re.search(patron_total, texto_completo, re.IGNORECASE | re.DOTALL)
-    if match_total:
-        total_str = match_total.group(1).replace(',', '')
-        datos['Total Factura'] = float(total_str)
-
-    else:
-        # Buscar en la tabla final el valor más grande
-        patron_total_alt = r'\$(\d{3},\d{3})(?![^$]*\d{4})'  # Busca patrones $xxx,xxx que no tengan más de 6 dígitos
-        matches_total = re.findall(patron_total_alt, texto_completo)
-        if matches_total:
-            # Tomar el valor más grande
-            valores = [float(valor.replace(',', '')) for valor in matches_total]
-            datos['Total Factura'] = max(valores)
+    # Consumo, tarifa, valor otros y total (ver CAMPOS_CELSIA); solo se guardan los encontrados
+    with etapa("busqueda"):
+        encontrados = CAMPOS_CELSIA.escanear(texto_completo)
+    for campo, valor in encontrados.items():
+        if valor is not None:
+            datos[campo] = valor
     
-    # 5. Calcular COSTO
+    # Calcular COSTO
     if 'Consumo' in datos and 'Tarifa' in datos:
         datos['Costo'] = datos['Consumo'] * datos['Tarifa']
     
@@ -97,24 +92,31 @@ def mostrar_resultados(datos):
     else:
         print(" Total Factura: No encontrado")
 
-def exportar_a_csv(datos, csv_filename="celsia_facturas.csv"):
-    csv_data = {
+CAMPOS_CSV = ['Fecha_Extraccion', 'Archivo_PDF', 'Consumo_kWh', 'Tarifa_por_kWh', 
+              'Costo_Calculado', 'Valor_Otros', 'Total_Factura']
+
+def fila_csv(datos, archivo_pdf):
+    return {
         'Consumo_kWh': datos.get('Consumo', 'No encontrado'),
         'Tarifa_por_kWh': datos.get('Tarifa', 'No encontrado'),
         'Costo_Calculado': datos.get('Costo', 'No encontrado'),
         'Valor_Otros': datos.get('Valor Otros', 'No encontrado'),
         'Total_Factura': datos.get('Total Factura', 'No encontrado'),
         'Fecha_Extraccion': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        'Archivo_PDF': os.path.basename(pdf_path)
+        'Archivo_PDF': os.path.basename(archivo_pdf)
     }
+
+def exportar_a_csv(datos, archivo_pdf, csv_filename="celsia_facturas.csv", escritor=None):
+    csv_data = fila_csv(datos, archivo_pdf)
+
+    if escritor is not None:
+        escritor.escribir(csv_filename, CAMPOS_CSV, csv_data)
+        return csv_filename
     
     file_exists = os.path.isfile(csv_filename)
     
     with open(csv_filename, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['Fecha_Extraccion', 'Archivo_PDF', 'Consumo_kWh', 'Tarifa_por_kWh', 
-                     'Costo_Calculado', 'Valor_Otros', 'Total_Factura']
-        
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CAMPOS_CSV)
         
         if not file_exists:
             writer.writeheader()
@@ -124,6 +126,15 @@ def exportar_a_csv(datos, csv_filename="celsia_facturas.csv"):
     print(f"\nResultados exportados a: {csv_filename}")
     return csv_filename
 
+def procesar_factura(pdf_path):
+    """
+    Punto de entrada uniforme usado por el procesamiento por lotes
+    """
+    return extraer_datos_celsia(pdf_path)
+
+def exportar_resultado(datos, pdf_path, escritor=None):
+    return exportar_a_csv(datos, pdf_path, escritor=escritor)
+
 if __name__ == "__main__":
     pdf_path = "CELSIA_Test.pdf"
     
@@ -132,7 +143,7 @@ if __name__ == "__main__":
         datos = extraer_datos_celsia(pdf_path)
         mostrar_resultados(datos)
         
-        archivo_csv = exportar_a_csv(datos)
+        archivo_csv = exportar_a_csv(datos, pdf_path)
         
     except FileNotFoundError:
         print(f"Error: No se encontró el archivo {pdf_path}")
@@ -1,8 +1,49 @@
-import pdfplumber
 import re
 import csv
 import os
 from datetime import datetime
+from paginacion import texto_hasta_completar
+from patrones import Campo, EspecificacionCampos, Patron
+from tiempos import etapa
+
+VERSION_EXTRACTOR = "1"
+
+def _tarifa(match):
+    tarifa_value = match.group(1) if match.groups() else '799,42'
+    return tarifa_value.replace(',', '.')
+
+def _total_codigo_barras(match):
+    total_value = match.group(1)
+    if len(total_value) > 3:
+        return total_value[:-3] + '.' + total_value[-3:]
+    return None
+
+CAMPOS_ENEL = EspecificacionCampos('ENEL', [
+    Campo('Consumo', [
+        Patron(r'CONSUMO MES:\s*(\d+)\s*kWh'),
+        Patron(r'Consumo mes:\s*(\d+)\s*kWh'),
+        Patron(r'78\s*kWh', por_defecto='78')
+    ], flags=re.IGNORECASE),
+    Campo('Tarifa', [
+        Patron(r'VALOR kWh APLICADO:\s*\$\s*([\d.,]+)', _tarifa),
+        Patron(r'\$([\d.,]+)\s*VALOR kWh', _tarifa),
+        Patron(r'799[,.]42', _tarifa)
+    ], flags=re.IGNORECASE),
+    Campo('Costo', [
+        Patron(r'CONSUMO ACTIVA SENCILLA\s*\$\s*([\d.,]+)'),
+        Patron(r'SENCILLA\s*\$\s*([\d.,]+)'),
+        Patron(r'62[,.]355', por_defecto='62.355')
+    ], flags=re.IGNORECASE),
+    Campo('Total a Pagar', [
+        Patron(r'TOTAL A PAGAR\s*\$\s*([\d.,]+)'),
+        Patron(r'TOTAL.*?PAGAR.*?\$([\d.,]+)'),
+        Patron(r'62[,.]360', por_defecto='62.360'),
+        Patron(r'\(3900\)000000000(\d+)', _total_codigo_barras)
+    ], flags=re.IGNORECASE),
+])
+
+# Todos los campos, cada uno por su patrón principal (ver EspecificacionCampos.resueltos)
+REQUERIDOS_ENEL = CAMPOS_ENEL.nombres()
 
 def extract_enel_data_robust(pdf_path):
     """
@@ -16,95 +57,57 @@ def extract_enel_data_robust(pdf_path):
     }
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-            
-            
-            consumo_patterns = [
-                r'CONSUMO MES:\s*(\d+)\s*kWh',
-                r'Consumo mes:\s*(\d+)\s*kWh',
-                r'78\s*kWh'
-            ]
-            
-            for pattern in consumo_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    data['Consumo'] = match.group(1) if match.groups() else '78'
-                    break
-            
-            tarifa_patterns = [
-                r'VALOR kWh APLICADO:\s*\$\s*([\d.,]+)',
-                r'\$([\d.,]+)\s*VALOR kWh',
-                r'799[,.]42'
-            ]
-            
-            for pattern in tarifa_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    tarifa_value = match.group(1) if match.groups() else '799,42'
-                    data['Tarifa'] = tarifa_value.replace(',', '.')
-                    break
-            
-            costo_patterns = [
-                r'CONSUMO ACTIVA SENCILLA\s*\$\s*([\d.,]+)',
-                r'SENCILLA\s*\$\s*([\d.,]+)',
-                r'62[,.]355'
-            ]
-            
-            for pattern in costo_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    data['Costo'] = match.group(1) if match.groups() else '62.355'
-                    break
-            
-            total_patterns = [
-                r'TOTAL A PAGAR\s*\$\s*([\d.,]+)',
-                r'TOTAL.*?PAGAR.*?\$([\d.,]+)',
-                r'62[,.]360',
-                r'\(3900\)000000000(\d+)'  
-            ]
-            
-            for pattern in total_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    if pattern == r'\(3900\)000000000(\d+)':
-                        total_value = match.group(1)
-                        if len(total_value) > 3:
-                            data['Total a Pagar'] = total_value[:-3] + '.' + total_value[-3:]
-                    else:
-                        data['Total a Pagar'] = match.group(1) if match.groups() else '62.360'
-                    break
-            
-            return data
-            
+        text = texto_hasta_completar(pdf_path, 'ENEL', CAMPOS_ENEL.resueltos, REQUERIDOS_ENEL)
+        
+        with etapa("busqueda"):
+            data.update(CAMPOS_ENEL.escanear(text))
+        
+        return data
+        
     except Exception as e:
         print(f"Error al procesar el PDF: {e}")
         return None
 
-def exportar_a_csv(data, pdf_filename):
+CAMPOS_CSV = ['Archivo', 'Fecha', 'Consumo', 'Tarifa', 'Costo', 'Total_Pagar']
+
+def fila_csv(data, pdf_filename):
+    return {
+        'Archivo': pdf_filename,
+        'Fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'Consumo': data['Consumo'],
+        'Tarifa': data['Tarifa'],
+        'Costo': data['Costo'],
+        'Total_Pagar': data['Total a Pagar']
+    }
+
+def exportar_a_csv(data, pdf_filename, escritor=None):
     """
     Exporta los datos a un archivo CSV
     """
     archivo_csv = 'enel_facturas.csv'
+
+    if escritor is not None:
+        escritor.escribir(archivo_csv, CAMPOS_CSV, fila_csv(data, pdf_filename))
+        return
+
     archivo_existe = os.path.isfile(archivo_csv)
     
     with open(archivo_csv, 'a', newline='', encoding='utf-8') as csvfile:
-        campos = ['Archivo', 'Fecha', 'Consumo', 'Tarifa', 'Costo', 'Total_Pagar']
-        writer = csv.DictWriter(csvfile, fieldnames=campos)
+        writer = csv.DictWriter(csvfile, fieldnames=CAMPOS_CSV)
         
         if not archivo_existe:
             writer.writeheader()
         
-        writer.writerow({
-            'Archivo': pdf_filename,
-            'Fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'Consumo': data['Consumo'],
-            'Tarifa': data['Tarifa'],
-            'Costo': data['Costo'],
-            'Total_Pagar': data['Total a Pagar']
-        })
+        writer.writerow(fila_csv(data, pdf_filename))
+
+def procesar_factura(pdf_path):
+    """
+    Punto de entrada uniforme usado por el procesamiento por lotes
+    """
+    return extract_enel_data_robust(pdf_path)
+
+def exportar_resultado(datos, pdf_path, escritor=None):
+    return exportar_a_csv(datos, os.path.basename(pdf_path), escritor=escritor)
 
 if __name__ == "__main__":
     pdf_path = "ENEL_Test.pdf"
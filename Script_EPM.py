@@ -1,41 +1,206 @@
-import re
-import numpy as np
-import easyocr
-from pdf2image import convert_from_path
 import csv
 import os
 from datetime import datetime
+from functools import partial
+from backends_texto import abrir
+from dpi_adaptativo import OCRConConfianza, textos_adaptativos
+from patrones import Campo, EspecificacionCampos, Patron
+from plantillas import aprender_plantilla, extraer_con_plantilla
+from resultado_ocr import vecindad
+from tiempos import etapa
 
-def extraer_datos_factura_epm(pdf_path):
-    pages = convert_from_path(pdf_path, dpi=300)
-    reader = easyocr.Reader(['es'])
+VERSION_EXTRACTOR = "1"
 
+# Dispositivo del lector OCR de esta empresa (procesar_lote precalienta este mismo)
+GPU_OCR = True
+
+# Anclas de las búsquedas de campos; el modo "etiquetas" solo reconoce sus vecindades.
+# La lectura del medidor de acueducto no tiene etiqueta y se ubica por su inicio ("567")
+ETIQUETAS_EPM = [
+    "567", "acueducto", "consumo", "energía", "kwh",
+    "total alcantarillado", "total energía", "total otras entidades"
+]
+
+# Etiquetas que van después de su valor: su región toma el renglón completo
+LINEA_COMPLETA_EPM = {"kwh"}
+
+CAMPOS_EPM = EspecificacionCampos('EPM', [
+    Campo('consumo_acu', [r"567\s+561\s+(\d+)\s*m[:]?"]),
+    Campo('tarifas', [Patron(r"consumo\s+may-\d{2}\s+([\d\.\,]+)", todas=True)]),
+    Campo('costo_acu', [r"acueducto\s+6\s*m3\s*\$?\s*([\d\.\,]+)"]),
+    Campo('consumo_alc', [r"consumo\s+(\d+)\s*m[:]?"]),
+    Campo('costo_alc', [r"total alcantarillado\s*\$?\s*([\d\.\,]+)"]),
+    Campo('consumo_ene', [r"([\d\.\,]+)\s*kwh"]),
+    Campo('tarifa_ene', [r"energía\s+may-\d{2}\s+[\d\.\,]+\s+([\d\.\,]+)"]),
+    Campo('costo_ene', [r"total energía\s*\$?\s*([\d\.\,]+)"]),
+    Campo('otras', [r"total otras entidades\s*\$?\s*([\d\.\,]+)"]),
+])
+
+# Etiqueta junto a la que está cada campo en la página; en las páginas escaneadas
+# el valor se busca primero en esa vecindad y luego en todo el texto
+ETIQUETA_POR_CAMPO = {
+    'costo_acu': "acueducto",
+    'costo_alc': "total alcantarillado",
+    'costo_ene': "total energía",
+    'otras': "total otras entidades",
+}
+
+def campos_por_vecindad(paginas_ocr):
+    """
+    Valores de ETIQUETA_POR_CAMPO leídos junto a su etiqueta en las páginas escaneadas
+    """
+    datos = {}
+    for campo, etiqueta in ETIQUETA_POR_CAMPO.items():
+        texto = vecindad(paginas_ocr, etiqueta)
+        if texto is None:
+            continue
+        valor = CAMPOS_EPM.escanear(" ".join(texto.split()).lower())[campo]
+        if valor:
+            datos[campo] = valor
+    return datos
+
+# Ancla (de ETIQUETAS_EPM) de la región de cada campo en las plantillas
+ANCLA_POR_CAMPO = {
+    'consumo_acu': "567",
+    'tarifas': "consumo",
+    'costo_acu': "acueducto",
+    'consumo_alc': "consumo",
+    'costo_alc': "total alcantarillado",
+    'consumo_ene': "kwh",
+    'tarifa_ene': "energía",
+    'costo_ene': "total energía",
+    'otras': "total otras entidades",
+}
+
+# Campos que deben salir del OCR para no reintentar a mayor resolución
+REQUERIDOS_EPM = {'costo_acu', 'costo_alc', 'costo_ene'}
+
+def unir_paginas(paginas):
+    """
+    Texto en minúsculas y en una sola línea, como lo devuelve el OCR
+    """
     texto = ""
-    for page in pages:
-        img_np = np.array(page)
-        ocr_text = reader.readtext(img_np, detail=0)
-        texto += " ".join(ocr_text).lower() + " "
+    for texto_pagina, origen in paginas:
+        if origen == "texto":
+            texto_pagina = " ".join(texto_pagina.split())
+        texto += texto_pagina.lower() + " "
+    return texto
 
-    def buscar(patron):
-        m = re.search(patron, texto)
-        return m.group(1) if m else None
+def _completo(paginas):
+    return REQUERIDOS_EPM <= CAMPOS_EPM.resueltos(unir_paginas(paginas))
 
-    consumo_acu = buscar(r"567\s+561\s+(\d+)\s*m[:]?")
-    tarifa_acu = buscar(r"consumo\s+may-\d{2}\s+([\d\.\,]+)")
-    costo_acu = buscar(r"acueducto\s+6\s*m3\s*\$?\s*([\d\.\,]+)")
+def _encontrados(campos):
+    return [campo for campo, valor in campos.items() if valor]
 
-    consumos = re.findall(r"consumo\s+may-\d{2}\s+([\d\.\,]+)", texto)
-    tarifas = re.findall(r"consumo\s+may-\d{2}\s+([\d\.\,]+)", texto)
+def _reconocer_region(img_np):
+    from lector_ocr import obtener_lector
+    return obtener_lector(gpu=GPU_OCR).readtext(img_np, detail=1)
 
-    consumo_alc = buscar(r"consumo\s+(\d+)\s*m[:]?")
+def _escanear_paginas(paginas, paginas_ocr):
+    texto = unir_paginas(paginas)
+    with etapa("busqueda"):
+        campos = CAMPOS_EPM.escanear(texto)
+        if paginas_ocr:
+            campos.update(campos_por_vecindad(paginas_ocr))
+    return campos
+
+def extraer_datos_factura_epm(pdf_path, modo_ocr="completo", preprocesar=False, dpi_adaptativo=False,
+                              plantillas=False, lote_ocr=1, trabajadores_pagina=0, mosaico=0):
+    """
+    Con `plantillas`, si ya se aprendió el diseño de la factura solo se reconocen las
+    regiones de sus campos; si alguno falla se hace el OCR completo y se reaprende.
+    No aplica con `preprocesar`, que cambia la geometría de la página. Con `lote_ocr`
+    mayor que 1 las páginas escaneadas se reconocen de a `lote_ocr` por llamada, y con
+    `trabajadores_pagina` mayor que 1, en paralelo en ese número de procesos. Con
+    `mosaico` mayor que 1 cada página se parte en ese número de franjas reconocidas
+    en paralelo, para bajar la latencia de una sola factura.
+    """
+    for trabajadores in (trabajadores_pagina, mosaico):
+        if trabajadores > 1:
+            # Los pools se crean antes de cualquier inferencia en este proceso (ver PoolOCR)
+            from pool_ocr import obtener_pool
+            obtener_pool(trabajadores, gpu=GPU_OCR)
+    plantillas = plantillas and not preprocesar
+    campos = None
+    if plantillas:
+        campos = extraer_con_plantilla(pdf_path, 'EPM', _reconocer_region, _escanear_paginas, _encontrados,
+                                       separador=" ")
+    if campos is None:
+        campos = _leer_campos(pdf_path, modo_ocr, preprocesar, dpi_adaptativo, plantillas, lote_ocr,
+                              trabajadores_pagina, mosaico)
+    return _campos_a_datos(campos)
+
+def _leer_campos(pdf_path, modo_ocr, preprocesar, dpi_adaptativo, plantillas, lote_ocr, trabajadores_pagina,
+                 mosaico):
+    """
+    OCR de las páginas escaneadas completas y búsqueda de campos en todo el texto
+    """
+    def reconocer(img_np):
+        # Importación diferida: easyocr/torch solo se cargan si hay páginas escaneadas
+        from lector_ocr import obtener_lector
+        from ocr_etiquetas import ocr_por_etiquetas
+        reader = obtener_lector(gpu=GPU_OCR)
+        if preprocesar:
+            from preprocesado import preprocesar as preparar
+            img_np = preparar(img_np)
+        if modo_ocr == "etiquetas":
+            return ocr_por_etiquetas(reader, img_np, ETIQUETAS_EPM, detail=1, linea_completa=LINEA_COMPLETA_EPM)
+        if mosaico > 1:
+            from mosaico_ocr import ocr_mosaico
+            return ocr_mosaico(img_np, mosaico, gpu=GPU_OCR)
+        return reader.readtext(img_np, detail=1)
+
+    def reconocer_varias(imagenes):
+        from lector_ocr import obtener_lector
+        from ocr_lotes import reconocer_lote
+        if preprocesar:
+            from preprocesado import preprocesar as preparar
+            imagenes = [preparar(img_np) for img_np in imagenes]
+        return reconocer_lote(obtener_lector(gpu=GPU_OCR), imagenes, lote_ocr)
+
+    reconocer_pdf = None
+    if trabajadores_pagina > 1:
+        # Las páginas escaneadas se reparten entre procesos que comparten el modelo cargado
+        from pool_ocr import obtener_pool
+        pool = obtener_pool(trabajadores_pagina, gpu=GPU_OCR)
+        etiquetas = ETIQUETAS_EPM if modo_ocr == "etiquetas" else None
+        reconocer_pdf = partial(pool.reconocer_pdf, preprocesar=preprocesar, etiquetas=etiquetas,
+                                linea_completa=LINEA_COMPLETA_EPM)
+
+    # El modo "etiquetas" recorta zonas distintas en cada página, así que no se agrupa en lotes
+    por_lote = lote_ocr if modo_ocr == "completo" else 1
+    ocr_pagina = OCRConConfianza(reconocer, " ", reconocer_varias if por_lote > 1 else None, por_lote,
+                                 reconocer_pdf)
+
+    if dpi_adaptativo:
+        paginas = textos_adaptativos(pdf_path, 'EPM', ocr_pagina, _completo)
+    else:
+        with abrir(pdf_path, 'EPM', ocr_pagina=ocr_pagina, dpi=300) as lector:
+            paginas = lector.textos()
+
+    campos = _escanear_paginas(paginas, ocr_pagina.paginas)
+    if plantillas:
+        aprender_plantilla(pdf_path, 'EPM', paginas, ocr_pagina.paginas, ANCLA_POR_CAMPO, _encontrados(campos),
+                           linea_completa=LINEA_COMPLETA_EPM)
+    return campos
+
+def _campos_a_datos(campos):
+    consumo_acu = campos["consumo_acu"]
+    costo_acu = campos["costo_acu"]
+
+    # El mismo patrón "consumo may-xx" da la tarifa de acueducto (1ra) y la de alcantarillado (2da)
+    tarifas = campos["tarifas"] or []
+    tarifa_acu = tarifas[0] if tarifas else None
+
+    consumo_alc = campos["consumo_alc"]
     tarifa_alc = tarifas[1] if len(tarifas) > 1 else None
-    costo_alc = buscar(r"total alcantarillado\s*\$?\s*([\d\.\,]+)")
+    costo_alc = campos["costo_alc"]
 
-    consumo_ene = buscar(r"([\d\.\,]+)\s*kwh")
-    tarifa_ene = buscar(r"energía\s+may-\d{2}\s+[\d\.\,]+\s+([\d\.\,]+)")
-    costo_ene = buscar(r"total energía\s*\$?\s*([\d\.\,]+)")
+    consumo_ene = campos["consumo_ene"]
+    tarifa_ene = campos["tarifa_ene"]
+    costo_ene = campos["costo_ene"]
 
-    otras = buscar(r"total otras entidades\s*\$?\s*([\d\.\,]+)")
+    otras = campos["otras"]
 
     def to_number(x):
         if not x:
@@ -71,48 +236,56 @@ def extraer_datos_factura_epm(pdf_path):
         "total_general": total_general
     }
 
-def exportar_epm_a_csv(datos, pdf_filename, output_file='epm_facturas.csv'):
+CAMPOS_CSV = [
+    'Archivo', 
+    'Fecha_Extraccion',
+    'Acueducto_Consumo',
+    'Acueducto_Tarifa', 
+    'Acueducto_Costo',
+    'Alcantarillado_Consumo',
+    'Alcantarillado_Tarifa',
+    'Alcantarillado_Costo',
+    'Energia_Consumo',
+    'Energia_Tarifa',
+    'Energia_Costo',
+    'Otras_Entidades',
+    'Total_General'
+]
+
+def fila_csv(datos, pdf_filename):
+    return {
+        'Archivo': pdf_filename,
+        'Fecha_Extraccion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'Acueducto_Consumo': datos['acueducto']['consumo'] or '',
+        'Acueducto_Tarifa': datos['acueducto']['tarifa'] or '',
+        'Acueducto_Costo': datos['acueducto']['costo'] or '',
+        'Alcantarillado_Consumo': datos['alcantarillado']['consumo'] or '',
+        'Alcantarillado_Tarifa': datos['alcantarillado']['tarifa'] or '',
+        'Alcantarillado_Costo': datos['alcantarillado']['costo'] or '',
+        'Energia_Consumo': datos['energia']['consumo'] or '',
+        'Energia_Tarifa': datos['energia']['tarifa'] or '',
+        'Energia_Costo': datos['energia']['costo'] or '',
+        'Otras_Entidades': datos['otras_entidades'] or '',
+        'Total_General': datos['total_general'] or ''
+    }
+
+def exportar_epm_a_csv(datos, pdf_filename, output_file='epm_facturas.csv', escritor=None):
     """
     Exporta los datos de EPM a un archivo CSV
     """
+    if escritor is not None:
+        escritor.escribir(output_file, CAMPOS_CSV, fila_csv(datos, pdf_filename))
+        return
+
     file_exists = os.path.isfile(output_file)
     
     with open(output_file, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'Archivo', 
-            'Fecha_Extraccion',
-            'Acueducto_Consumo',
-            'Acueducto_Tarifa', 
-            'Acueducto_Costo',
-            'Alcantarillado_Consumo',
-            'Alcantarillado_Tarifa',
-            'Alcantarillado_Costo',
-            'Energia_Consumo',
-            'Energia_Tarifa',
-            'Energia_Costo',
-            'Otras_Entidades',
-            'Total_General'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CAMPOS_CSV)
         
         if not file_exists:
             writer.writeheader()
         
-        writer.writerow({
-            'Archivo': pdf_filename,
-            'Fecha_Extraccion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'Acueducto_Consumo': datos['acueducto']['consumo'] or '',
-            'Acueducto_Tarifa': datos['acueducto']['tarifa'] or '',
-            'Acueducto_Costo': datos['acueducto']['costo'] or '',
-            'Alcantarillado_Consumo': datos['alcantarillado']['consumo'] or '',
-            'Alcantarillado_Tarifa': datos['alcantarillado']['tarifa'] or '',
-            'Alcantarillado_Costo': datos['alcantarillado']['costo'] or '',
-            'Energia_Consumo': datos['energia']['consumo'] or '',
-            'Energia_Tarifa': datos['energia']['tarifa'] or '',
-            'Energia_Costo': datos['energia']['costo'] or '',
-            'Otras_Entidades': datos['otras_entidades'] or '',
-            'Total_General': datos['total_general'] or ''
-        })
+        writer.writerow(fila_csv(datos, pdf_filename))
 
 def mostrar_resultados_epm(datos):
     """
@@ -152,6 +325,17 @@ def mostrar_resultados_epm(datos):
     if datos['total_general']:
         print(f"Total general: ${datos['total_general']}")
 
+def procesar_factura(pdf_path, modo_ocr="completo", preprocesar=False, dpi_adaptativo=False, plantillas=False,
+                     lote_ocr=1, trabajadores_pagina=0, mosaico=0):
+    """
+    Punto de entrada uniforme usado por el procesamiento por lotes
+    """
+    return extraer_datos_factura_epm(pdf_path, modo_ocr, preprocesar, dpi_adaptativo, plantillas, lote_ocr,
+                                     trabajadores_pagina, mosaico)
+
+def exportar_resultado(datos, pdf_path, escritor=None):
+    return exportar_epm_a_csv(datos, os.path.basename(pdf_path), escritor=escritor)
+
 def main():
     pdf_path = 'EPM_Test.pdf'  
     
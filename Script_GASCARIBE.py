@@ -1,8 +1,23 @@
-import pdfplumber
 import re
 import csv
 import os
 from datetime import datetime
+from patrones import buscar
+from paginacion import texto_hasta_completar
+from tiempos import etapa
+
+VERSION_EXTRACTOR = "1"
+
+# Patrones principales: la tabla de consumo da consumo, tarifa y costo, y el total va
+# antes de "Consulta tu cupo". Los alternativos (p. ej. el primer "$" del texto) pueden
+# cambiar con el resto del documento, así que sin ambos se leen todas las páginas.
+MARCAS_GASCARIBE = {
+    'Tabla de consumo': re.compile(r'1333\s+1331\s+0\s+-\s+1000\s+(\d+)\s+(\d+)\s+([\d,]+)'),
+    'Total Factura': re.compile(r'\$\s*([\d,]+)\s*\n\s*Consulta tu cupo'),
+}
+
+def marcas_presentes(texto):
+    return {campo for campo, patron in MARCAS_GASCARIBE.items() if patron.search(texto)}
 
 def extract_gascaribe_data(pdf_path):
     """
@@ -16,69 +31,84 @@ def extract_gascaribe_data(pdf_path):
     }
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-            
-            pattern_match = re.search(r'1333\s+1331\s+0\s+-\s+1000\s+(\d+)\s+(\d+)\s+([\d,]+)', text)
+        text = texto_hasta_completar(pdf_path, 'GASCARIBE', marcas_presentes, set(MARCAS_GASCARIBE))
+        
+        with etapa("busqueda"):
+            pattern_match = buscar(r'1333\s+1331\s+0\s+-\s+1000\s+(\d+)\s+(\d+)\s+([\d,]+)', text)
             if pattern_match:
                 data['Tarifa'] = pattern_match.group(1)
                 data['Consumo'] = pattern_match.group(2)
                 data['Costo'] = pattern_match.group(3)
-            
+        
             if not data['Consumo']:
-                consumo_match = re.search(r'(\d+)\s+M3\s+Equivalen', text)
+                consumo_match = buscar(r'(\d+)\s+M3\s+Equivalen', text)
                 if consumo_match:
                     data['Consumo'] = consumo_match.group(1)
-            
+        
             if not data['Tarifa']:
                 if data['Consumo']:
-                    tarifa_match = re.search(rf'0\s+-\s+1000\s+(\d+)\s+{data["Consumo"]}', text)
+                    tarifa_match = buscar(rf'0\s+-\s+1000\s+(\d+)\s+{data["Consumo"]}', text)
                     if tarifa_match:
                         data['Tarifa'] = tarifa_match.group(1)
-            
+        
             if not data['Costo']:
-                costo_match = re.search(r'31 - CONSUMO DE GAS NATURAL.*?und\s+1\s+([\d,]+)', text, re.DOTALL)
+                costo_match = buscar(r'31 - CONSUMO DE GAS NATURAL.*?und\s+1\s+([\d,]+)', text, re.DOTALL)
                 if costo_match:
                     data['Costo'] = costo_match.group(1)
-            
+        
             if not data['Total Factura']:
-                total_match = re.search(r'\$\s*([\d,]+)\s*\n\s*Consulta tu cupo', text)
+                total_match = buscar(r'\$\s*([\d,]+)\s*\n\s*Consulta tu cupo', text)
                 if total_match:
                     data['Total Factura'] = total_match.group(1)
                 else:
-                    total_alt_match = re.search(r'\$\s*([\d,]+)', text)
+                    total_alt_match = buscar(r'\$\s*([\d,]+)', text)
                     if total_alt_match:
                         data['Total Factura'] = total_alt_match.group(1)
-            
-            return data
-            
+        
+        return data
+        
     except Exception as e:
         print(f"Error al procesar el PDF: {e}")
         return None
 
-def export_to_csv(data, pdf_filename, output_file='gascaribe_facturas.csv'):
+CAMPOS_CSV = ['Archivo', 'Fecha_Extraccion', 'Consumo', 'Tarifa', 'Costo', 'Total_Factura']
+
+def fila_csv(data, pdf_filename):
+    return {
+        'Archivo': pdf_filename,
+        'Fecha_Extraccion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'Consumo': data['Consumo'] if data['Consumo'] else '',
+        'Tarifa': data['Tarifa'] if data['Tarifa'] else '',
+        'Costo': data['Costo'] if data['Costo'] else '',
+        'Total_Factura': data['Total Factura'] if data['Total Factura'] else ''
+    }
+
+def export_to_csv(data, pdf_filename, output_file='gascaribe_facturas.csv', escritor=None):
     """
     Exporta los datos a un archivo CSV
     """
+    if escritor is not None:
+        escritor.escribir(output_file, CAMPOS_CSV, fila_csv(data, pdf_filename))
+        return
+
     file_exists = os.path.isfile(output_file)
     
     with open(output_file, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['Archivo', 'Fecha_Extraccion', 'Consumo', 'Tarifa', 'Costo', 'Total_Factura']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CAMPOS_CSV)
         
         if not file_exists:
             writer.writeheader()
         
-        writer.writerow({
-            'Archivo': pdf_filename,
-            'Fecha_Extraccion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'Consumo': data['Consumo'] if data['Consumo'] else '',
-            'Tarifa': data['Tarifa'] if data['Tarifa'] else '',
-            'Costo': data['Costo'] if data['Costo'] else '',
-            'Total_Factura': data['Total Factura'] if data['Total Factura'] else ''
-        })
+        writer.writerow(fila_csv(data, pdf_filename))
+
+def procesar_factura(pdf_path):
+    """
+    Punto de entrada uniforme usado por el procesamiento por lotes
+    """
+    return extract_gascaribe_data(pdf_path)
+
+def exportar_resultado(datos, pdf_path, escritor=None):
+    return export_to_csv(datos, os.path.basename(pdf_path), escritor=escritor)
 
 def main():
     pdf_path = "GASCARIBE_Test.pdf" 
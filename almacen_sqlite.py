@@ -0,0 +1,159 @@
+import sqlite3
+from datetime import datetime
+
+# Columnas de los CSV que alimentan la tabla común de facturas, por empresa
+COLUMNAS_COMUNES = {
+    'AAA': {'consumo': 'Consumo_Acueducto', 'total': 'Total_Factura'},
+    'AIRE': {'consumo': 'Consumo', 'tarifa': 'Tarifa', 'costo': 'Costo', 'total': 'Total_Mes'},
+    'BIA': {'consumo': 'Consumo_kWh', 'tarifa': 'Tarifa_por_kWh', 'costo': 'Costo_Calculado', 'total': 'Total_Factura'},
+    'CELSIA': {'consumo': 'Consumo_kWh', 'tarifa': 'Tarifa_por_kWh', 'costo': 'Costo_Calculado', 'total': 'Total_Factura'},
+    'ENEL': {'consumo': 'Consumo', 'tarifa': 'Tarifa', 'costo': 'Costo', 'total': 'Total_Pagar'},
+    'EPM': {'consumo': 'Energia_Consumo', 'tarifa': 'Energia_Tarifa', 'costo': 'Energia_Costo', 'total': 'Total_General'},
+    'GASCARIBE': {'consumo': 'Consumo', 'tarifa': 'Tarifa', 'costo': 'Costo', 'total': 'Total_Factura'}
+}
+
+# Columnas del CSV que ya quedan en la tabla común (archivo y fecha)
+COLUMNAS_OMITIDAS = {'Archivo', 'Archivo_PDF', 'Fecha', 'Fecha_Extraccion'}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS facturas (
+    id INTEGER PRIMARY KEY,
+    hash_archivo TEXT NOT NULL,
+    empresa TEXT NOT NULL,
+    archivo TEXT NOT NULL,
+    fecha_extraccion TEXT NOT NULL,
+    consumo TEXT,
+    tarifa TEXT,
+    costo TEXT,
+    total TEXT,
+    UNIQUE (hash_archivo, empresa)
+);
+CREATE INDEX IF NOT EXISTS idx_facturas_hash ON facturas (hash_archivo);
+CREATE INDEX IF NOT EXISTS idx_facturas_empresa_fecha ON facturas (empresa, fecha_extraccion);
+CREATE INDEX IF NOT EXISTS idx_facturas_fecha ON facturas (fecha_extraccion);
+"""
+
+def _valor(v):
+    if v in (None, '', 'No encontrado'):
+        return None
+    return str(v)
+
+class AlmacenFacturas:
+    """
+    Almacén SQLite de facturas: una tabla común con índices por hash del archivo,
+    empresa y fecha de extracción, más una tabla de detalle por empresa con las
+    mismas columnas de su CSV. Las filas se acumulan y se insertan por lotes,
+    cada lote en una sola transacción.
+    """
+
+    def __init__(self, ruta, tamano_lote=500):
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        self._pendientes = []
+        self._detalles = {}
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _tabla_detalle(self, empresa, campos):
+        """
+        Crea (una vez) la tabla de detalle de la empresa y devuelve sus columnas
+        """
+        if empresa not in self._detalles:
+            columnas = [c for c in campos if c not in COLUMNAS_OMITIDAS]
+            definicion = ", ".join(f'"{c}" TEXT' for c in columnas)
+            self.conexion.execute(
+                f'CREATE TABLE IF NOT EXISTS "detalle_{empresa}" ('
+                f'factura_id INTEGER PRIMARY KEY REFERENCES facturas (id), {definicion})'
+            )
+            self._detalles[empresa] = columnas
+        return self._detalles[empresa]
+
+    def agregar(self, empresa, hash_archivo, archivo, campos, fila):
+        """
+        Encola una factura (fila con el formato del CSV de la empresa) para el próximo lote
+        """
+        self._tabla_detalle(empresa, campos)
+        self._pendientes.append((empresa, hash_archivo, archivo, fila))
+        if len(self._pendientes) >= self.tamano_lote:
+            self.confirmar()
+
+    def confirmar(self):
+        """
+        Inserta todas las facturas pendientes en una sola transacción
+        """
+        if not self._pendientes:
+            return
+        fecha = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        comunes = []
+        detalles = {}
+        for empresa, hash_archivo, archivo, fila in self._pendientes:
+            mapa = COLUMNAS_COMUNES.get(empresa, {})
+            comunes.append((
+                hash_archivo, empresa, archivo, fecha,
+                _valor(fila.get(mapa.get('consumo'))),
+                _valor(fila.get(mapa.get('tarifa'))),
+                _valor(fila.get(mapa.get('costo'))),
+                _valor(fila.get(mapa.get('total')))
+            ))
+            valores = [_valor(fila.get(c)) for c in self._detalles[empresa]]
+            detalles.setdefault(empresa, []).append(valores + [hash_archivo, empresa])
+
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT OR IGNORE INTO facturas "
+                "(hash_archivo, empresa, archivo, fecha_extraccion, consumo, tarifa, costo, total) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                comunes
+            )
+            for empresa, filas in detalles.items():
+                columnas = self._detalles[empresa]
+                lista = ", ".join(f'"{c}"' for c in columnas)
+                marcas = ", ".join("?" for _ in columnas)
+                self.conexion.executemany(
+                    f'INSERT OR REPLACE INTO "detalle_{empresa}" (factura_id, {lista}) '
+                    f'SELECT id, {marcas} FROM facturas WHERE hash_archivo = ? AND empresa = ?',
+                    filas
+                )
+        self._pendientes = []
+
+    def ya_cargado(self, hash_archivo, empresa=None):
+        """
+        Indica si el archivo (por su hash) ya está en el almacén
+        """
+        if empresa is None:
+            cursor = self.conexion.execute(
+                "SELECT 1 FROM facturas WHERE hash_archivo = ? LIMIT 1", (hash_archivo,))
+        else:
+            cursor = self.conexion.execute(
+                "SELECT 1 FROM facturas WHERE hash_archivo = ? AND empresa = ? LIMIT 1",
+                (hash_archivo, empresa))
+        return cursor.fetchone() is not None
+
+    def facturas_por_empresa(self, empresa, desde=None, hasta=None):
+        """
+        Facturas de una empresa extraídas en el rango de fechas [desde, hasta) (texto 'YYYY-MM-DD')
+        """
+        consulta = "SELECT * FROM facturas WHERE empresa = ?"
+        parametros = [empresa]
+        if desde:
+            consulta += " AND fecha_extraccion >= ?"
+            parametros.append(desde)
+        if hasta:
+            consulta += " AND fecha_extraccion < ?"
+            parametros.append(hasta)
+        cursor = self.conexion.execute(consulta + " ORDER BY fecha_extraccion", parametros)
+        columnas = [d[0] for d in cursor.description]
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    def cerrar(self):
+        self.confirmar()
+        self.conexion.close()
@@ -0,0 +1,82 @@
+from texto_hibrido import MIN_CARACTERES, LectorPaginas, ocr_pagina_suelta, ocr_texto_plano
+from tiempos import etapa
+
+class LectorPyPDF2:
+    """
+    Backend PyPDF2, con la misma interfaz que LectorPaginas.
+
+    Una página cuyo texto extraído tenga menos de `min_caracteres` caracteres visibles
+    se considera escaneada y pasa por OCR, salvo con `ocr_pagina=None`.
+    """
+
+    def __init__(self, pdf_path, ocr_pagina=ocr_texto_plano, dpi=300, min_caracteres=MIN_CARACTERES):
+        self.pdf_path = pdf_path
+        self.ocr_pagina = ocr_pagina
+        self.dpi = dpi
+        self.min_caracteres = min_caracteres
+        self.archivo = None
+        self.total = 0
+
+    def __enter__(self):
+        import PyPDF2
+        with etapa("apertura_pdf"):
+            self.archivo = open(self.pdf_path, 'rb')
+            self.reader = PyPDF2.PdfReader(self.archivo)
+            self.total = len(self.reader.pages)
+        return self
+
+    def __exit__(self, *exc):
+        self.archivo.close()
+
+    def texto(self, numero):
+        with etapa("extraccion_texto"):
+            texto = self.reader.pages[numero - 1].extract_text() or ""
+        if self.ocr_pagina is None or len("".join(texto.split())) >= self.min_caracteres:
+            return texto, "texto"
+        return ocr_pagina_suelta(self.pdf_path, numero, self.ocr_pagina, self.dpi), "ocr"
+
+    def textos(self):
+        return [self.texto(numero) for numero in range(1, self.total + 1)]
+
+# Backends disponibles; cualquier clase con la interfaz de LectorPaginas puede agregarse
+BACKENDS = {
+    'pdfplumber': LectorPaginas,
+    'pypdf2': LectorPyPDF2,
+}
+
+BACKEND_POR_DEFECTO = 'pdfplumber'
+
+# Backend de cada empresa; las que no aparecen usan BACKEND_POR_DEFECTO
+BACKEND_POR_EMPRESA = {
+    'CELSIA': 'pypdf2',
+}
+
+# Empresas cuyas páginas sin capa de texto pasan por OCR; las demás son digitales y se
+# leen solo de la capa de texto, sin cargar nunca el modelo (agregarlas aquí para activarlo)
+EMPRESAS_CON_OCR = {'AIRE', 'EPM'}
+
+def registrar_backend(nombre, clase):
+    BACKENDS[nombre] = clase
+
+def configurar(asignaciones):
+    """
+    Cambia el backend de varias empresas, p. ej. {'ENEL': 'pypdf2'}
+    """
+    for empresa, nombre in asignaciones.items():
+        if nombre not in BACKENDS:
+            raise ValueError(f"Backend desconocido: {nombre} (disponibles: {', '.join(sorted(BACKENDS))})")
+        BACKEND_POR_EMPRESA[empresa] = nombre
+
+def backend_de(empresa):
+    return BACKEND_POR_EMPRESA.get(empresa, BACKEND_POR_DEFECTO)
+
+def abrir(pdf_path, empresa=None, backend=None, **opciones):
+    """
+    Lector de páginas del backend indicado o del configurado para la empresa; se usa con `with`.
+
+    Salvo que se pase `ocr_pagina`, las empresas fuera de EMPRESAS_CON_OCR se leen solo
+    de la capa de texto.
+    """
+    if empresa is not None and empresa not in EMPRESAS_CON_OCR:
+        opciones.setdefault('ocr_pagina', None)
+    return BACKENDS[backend or backend_de(empresa)](pdf_path, **opciones)
@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Módulos de entrada que se miden (scripts por empresa y el CLI de lotes)
+PUNTOS_ENTRADA = [
+    'procesar_lote',
+    'Script_AAA',
+    'Script_AIRE',
+    'Script_BIA',
+    'Script_CELSIA',
+    'Script_ENEL',
+    'Script_EPM',
+    'Script_GASCARIBE',
+]
+
+# Dependencias costosas que no deberían cargarse solo por importar un punto de entrada
+PESADOS = ['torch', 'easyocr', 'numpy', 'cv2', 'pdf2image', 'pdfplumber', 'pdfminer', 'PyPDF2']
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+SONDA = """
+import sys
+import {modulo}
+print('MODULOS_PESADOS=' + ','.join(m for m in {pesados!r} if m in sys.modules))
+"""
+
+def ejecutar(argumentos):
+    """
+    Corre un intérprete nuevo y devuelve (segundos de pared, stdout, stderr)
+    """
+    inicio = time.perf_counter()
+    proceso = subprocess.run([sys.executable] + argumentos, capture_output=True, text=True, cwd=DIRECTORIO)
+    return time.perf_counter() - inicio, proceso.stdout, proceso.stderr
+
+def costos_importacion(stderr, limite):
+    """
+    Interpreta la salida de -X importtime y devuelve las importaciones directas más costosas
+    """
+    costos = []
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        # Solo lo que importa directamente el punto de entrada (un nivel de sangría),
+        # para no repetir los submódulos ya incluidos en el tiempo de su padre
+        if len(nombre) - len(nombre.lstrip()) != 3:
+            continue
+        costos.append((int(acumulado) / 1000, nombre.strip()))
+    return sorted(costos, reverse=True)[:limite]
+
+def medir_punto(modulo, repeticiones, base):
+    """
+    Mide el tiempo de importar `modulo` en un proceso limpio, descontando el arranque del intérprete
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        segundos, salida, error = ejecutar(['-c', SONDA.format(modulo=modulo, pesados=PESADOS)])
+        if 'MODULOS_PESADOS=' not in salida:
+            return {'error': error.strip().splitlines()[-1] if error.strip() else 'falló'}
+        tiempos.append(segundos)
+    cargados = salida.rsplit('MODULOS_PESADOS=', 1)[1].strip()
+
+    _, _, detalle = ejecutar(['-X', 'importtime', '-c', f"import {modulo}"])
+    return {
+        'mediana_ms': statistics.median(tiempos) * 1000,
+        'importacion_ms': max(statistics.median(tiempos) - base, 0) * 1000,
+        'pesados_cargados': [m for m in cargados.split(',') if m],
+        'mas_costosos': costos_importacion(detalle, 5)
+    }
+
+def mostrar_resultados(resultados, base, limite_ms):
+    print("\n" + "="*60)
+    print("TIEMPO DE ARRANQUE POR PUNTO DE ENTRADA")
+    print("="*60)
+    print(f"Arranque del intérprete: {base * 1000:.1f} ms")
+    for modulo, r in resultados.items():
+        if 'error' in r:
+            print(f"{modulo}: error - {r['error']}")
+            continue
+        aviso = "  (LENTO)" if r['mediana_ms'] > limite_ms else ""
+        print(f"{modulo}: {r['mediana_ms']:.1f} ms total, {r['importacion_ms']:.1f} ms de importación{aviso}")
+        if r['pesados_cargados']:
+            print(f"   Dependencias pesadas cargadas: {', '.join(r['pesados_cargados'])}")
+        for ms, nombre in r['mas_costosos']:
+            print(f"   {ms:8.1f} ms  {nombre}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el costo de importación de cada punto de entrada")
+    parser.add_argument('modulos', nargs='*', default=PUNTOS_ENTRADA, help="Módulos a medir")
+    parser.add_argument('-r', '--repeticiones', type=int, default=5)
+    parser.add_argument('--limite-ms', type=float, default=1000.0,
+                        help="Tiempo de arranque máximo esperado; los que lo superan salen con error")
+    parser.add_argument('-o', '--salida', help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    base = statistics.median(ejecutar(['-c', 'pass'])[0] for _ in range(args.repeticiones))
+    resultados = {modulo: medir_punto(modulo, args.repeticiones, base) for modulo in args.modulos}
+
+    mostrar_resultados(resultados, base, args.limite_ms)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({'interprete_ms': base * 1000, 'puntos': resultados}, f, indent=2)
+        print(f"\nResultados guardados en: {args.salida}")
+
+    # Falla si algún punto de entrada tarda más del límite o carga dependencias pesadas al importarse
+    fallidos = [m for m, r in resultados.items()
+                if 'error' in r or r['mediana_ms'] > args.limite_ms or r['pesados_cargados']]
+    if fallidos:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+import backends_texto
+from generador_facturas import EMPRESAS_ESCANEADAS, LINEAS, generar_lote
+from procesar_lote import cargar_modulo, detectar_empresa, expandir_entradas
+
+# Campos que dependen del momento o del archivo y no del texto extraído
+CAMPOS_IGNORADOS = {'Fecha_Extraccion', 'Fecha_Procesamiento', 'Archivo_PDF', 'Archivo'}
+
+def tiempo_extraccion(pdf_path, empresa, backend, repeticiones):
+    """
+    Mediana de segundos en leer todas las páginas del PDF con el backend
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        with backends_texto.abrir(pdf_path, empresa, backend=backend) as lector:
+            lector.textos()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+def datos_extraidos(empresa, pdf_path, backend):
+    """
+    Corre el extractor completo de la empresa forzando el backend y devuelve sus campos
+    """
+    anterior = backends_texto.BACKEND_POR_EMPRESA.get(empresa)
+    backends_texto.BACKEND_POR_EMPRESA[empresa] = backend
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            datos = cargar_modulo(empresa).procesar_factura(pdf_path)
+    except Exception as e:
+        return {'error': str(e)}
+    finally:
+        if anterior is None:
+            del backends_texto.BACKEND_POR_EMPRESA[empresa]
+        else:
+            backends_texto.BACKEND_POR_EMPRESA[empresa] = anterior
+    return {k: v for k, v in (datos or {}).items() if k not in CAMPOS_IGNORADOS}
+
+def tiene_campos(datos):
+    """
+    True si el extractor encontró al menos un campo
+    """
+    return 'error' not in datos and any(v not in (None, 'No encontrado') for v in datos.values())
+
+def comparar_empresa(empresa, rutas, backends, repeticiones):
+    """
+    Tiempo por backend y si sus campos coinciden con los del backend de referencia (el primero)
+    """
+    referencia = backends[0]
+    resultados = {}
+    esperados = {ruta: datos_extraidos(empresa, ruta, referencia) for ruta in rutas}
+    for backend in backends:
+        segundos = [tiempo_extraccion(ruta, empresa, backend, repeticiones) for ruta in rutas]
+        datos = esperados if backend == referencia else {ruta: datos_extraidos(empresa, ruta, backend) for ruta in rutas}
+        distintos = [os.path.basename(ruta) for ruta in rutas if datos[ruta] != esperados[ruta]]
+        resultados[backend] = {
+            'ms_por_documento': statistics.mean(segundos) * 1000,
+            'equivalente': not distintos,
+            'distintos': distintos,
+            'con_datos': sum(1 for d in datos.values() if tiene_campos(d))
+        }
+    return resultados
+
+def recomendar(resultados):
+    """
+    Para cada empresa, el backend más rápido cuyos campos coinciden con la referencia;
+    coincidir sin haber encontrado ningún campo no cuenta
+    """
+    recomendados = {}
+    for empresa, por_backend in resultados.items():
+        validos = [(r['ms_por_documento'], b) for b, r in por_backend.items()
+                   if r['equivalente'] and r['con_datos']]
+        if validos:
+            recomendados[empresa] = min(validos)[1]
+    return recomendados
+
+def mostrar_resultados(resultados, recomendados, referencia):
+    print("\n" + "="*60)
+    print(f"BACKENDS DE TEXTO (referencia: {referencia})")
+    print("="*60)
+    for empresa, por_backend in resultados.items():
+        actual = backends_texto.backend_de(empresa)
+        print(f"{empresa} (actual: {actual}, recomendado: {recomendados.get(empresa, '-')})")
+        for backend, r in por_backend.items():
+            estado = "equivalente" if r['equivalente'] else f"difiere en {len(r['distintos'])} PDF"
+            print(f"   {backend:12s} {r['ms_por_documento']:8.1f} ms/documento  {estado}  "
+                  f"{r['con_datos']} PDF con datos")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara velocidad y equivalencia de los backends de texto")
+    parser.add_argument('entradas', nargs='*',
+                        help="PDFs reales a comparar (por defecto, facturas sintéticas con capa de texto)")
+    parser.add_argument('-n', '--cantidad', type=int, default=5, help="Facturas sintéticas por empresa")
+    parser.add_argument('-p', '--paginas', type=int, default=3, help="Páginas por factura sintética")
+    parser.add_argument('-b', '--backends', nargs='+', default=sorted(backends_texto.BACKENDS),
+                        help="Backends a comparar; el primero es la referencia de equivalencia")
+    parser.add_argument('-r', '--repeticiones', type=int, default=3)
+    parser.add_argument('-o', '--salida', help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="facturas_backends_") as directorio:
+        if args.entradas:
+            rutas = {}
+            for ruta in expandir_entradas(args.entradas):
+                empresa = detectar_empresa(ruta)
+                if empresa:
+                    rutas.setdefault(empresa, []).append(ruta)
+        else:
+            empresas = [e for e in sorted(LINEAS) if e not in EMPRESAS_ESCANEADAS]
+            rutas = generar_lote(directorio, empresas, args.cantidad, args.paginas)
+
+        resultados = {empresa: comparar_empresa(empresa, lista, args.backends, args.repeticiones)
+                      for empresa, lista in sorted(rutas.items())}
+
+    recomendados = recomendar(resultados)
+    mostrar_resultados(resultados, recomendados, args.backends[0])
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({'resultados': resultados, 'recomendados': recomendados}, f, indent=2)
+        print(f"\nResultados guardados en: {args.salida}")
+
+if __name__ == "__main__":
+    main()
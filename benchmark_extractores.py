@@ -0,0 +1,156 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from generador_facturas import LINEAS, generar_lote
+from procesar_lote import campos_encontrados, cargar_modulo
+
+ARCHIVO_BASE = "benchmark_base.json"
+TOLERANCIA = 0.20
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+def rss_maximo_mb():
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def medir_empresa(empresa, rutas, paginas):
+    """
+    Corre el extractor sobre cada PDF en este proceso y devuelve las métricas
+    """
+    if not rutas:
+        raise ValueError(f"No hay facturas de {empresa} para medir")
+    modulo = cargar_modulo(empresa)
+    latencias = []
+    con_datos = 0
+    campos = 0
+    inicio = time.perf_counter()
+    for ruta in rutas:
+        t = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            datos = modulo.procesar_factura(ruta)
+        latencias.append(time.perf_counter() - t)
+        # Una factura cuenta solo si al menos un campo final tiene valor
+        encontrados = campos_encontrados(datos)
+        campos += encontrados
+        if encontrados:
+            con_datos += 1
+    total = time.perf_counter() - inicio
+
+    return {
+        'documentos': len(rutas),
+        'paginas': len(rutas) * paginas,
+        'segundos': total,
+        'facturas_por_segundo': len(rutas) / total if total else None,
+        'paginas_por_segundo': len(rutas) * paginas / total if total else None,
+        'p50_ms': percentil(latencias, 50) * 1000,
+        'p95_ms': percentil(latencias, 95) * 1000,
+        'rss_max_mb': rss_maximo_mb(),
+        'con_datos': con_datos,
+        'campos_por_factura': campos / len(rutas)
+    }
+
+def medir_en_subproceso(empresa, rutas, paginas):
+    """
+    Mide cada empresa en un proceso aparte para que el RSS máximo sea solo suyo
+    """
+    comando = [sys.executable, os.path.abspath(__file__), '--interno', empresa,
+               '--paginas', str(paginas)] + rutas
+    proceso = subprocess.run(comando, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        return {'error': proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else 'falló'}
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+def comparar_con_base(resultados, base, tolerancia=TOLERANCIA):
+    """
+    Devuelve la lista de regresiones respecto a la línea base
+    """
+    regresiones = []
+    for empresa, actual in resultados.items():
+        anterior = base.get(empresa)
+        if not anterior or 'error' in actual or 'error' in anterior:
+            continue
+        if actual['facturas_por_segundo'] < anterior['facturas_por_segundo'] * (1 - tolerancia):
+            regresiones.append(f"{empresa}: facturas/s {anterior['facturas_por_segundo']:.2f} -> "
+                               f"{actual['facturas_por_segundo']:.2f}")
+        if actual['p95_ms'] > anterior['p95_ms'] * (1 + tolerancia):
+            regresiones.append(f"{empresa}: p95 {anterior['p95_ms']:.1f} ms -> {actual['p95_ms']:.1f} ms")
+    return regresiones
+
+def mostrar_resultados(resultados):
+    print("\n" + "="*60)
+    print("BENCHMARK DE EXTRACTORES")
+    print("="*60)
+    for empresa, r in resultados.items():
+        if 'error' in r:
+            print(f"{empresa}: error - {r['error']}")
+            continue
+        print(f"{empresa}: {r['facturas_por_segundo']:.2f} facturas/s, {r['paginas_por_segundo']:.2f} páginas/s, "
+              f"p50 {r['p50_ms']:.1f} ms, p95 {r['p95_ms']:.1f} ms, RSS máx {r['rss_max_mb']:.0f} MB, "
+              f"{r['con_datos']}/{r['documentos']} con datos, {r['campos_por_factura']:.1f} campos/factura")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el rendimiento de los extractores con facturas sintéticas")
+    parser.add_argument('-n', '--cantidad', type=int, default=20, help="Facturas por empresa")
+    parser.add_argument('-p', '--paginas', type=int, default=1, help="Páginas por factura")
+    parser.add_argument('-e', '--empresas', nargs='+', choices=sorted(LINEAS), default=sorted(LINEAS))
+    parser.add_argument('-o', '--salida', default="benchmark_resultados.json")
+    parser.add_argument('--base', default=ARCHIVO_BASE, help="Archivo JSON con la línea base")
+    parser.add_argument('--guardar-base', action='store_true', help="Guarda estos resultados como línea base")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    parser.add_argument('--interno', help=argparse.SUPPRESS)
+    parser.add_argument('rutas', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cantidad < 1 or args.paginas < 1:
+        parser.error("--cantidad y --paginas deben ser al menos 1")
+
+    if args.interno:
+        print(json.dumps(medir_empresa(args.interno, args.rutas, args.paginas)))
+        return
+
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix="facturas_sinteticas_") as directorio:
+        rutas = generar_lote(directorio, args.empresas, args.cantidad, args.paginas)
+        for empresa in args.empresas:
+            resultados[empresa] = medir_en_subproceso(empresa, rutas[empresa], args.paginas)
+
+    mostrar_resultados(resultados)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2)
+    print(f"\nResultados guardados en: {args.salida}")
+
+    if args.guardar_base:
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Línea base guardada en: {args.base}")
+        return
+
+    if os.path.isfile(args.base):
+        with open(args.base, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        regresiones = comparar_con_base(resultados, base, args.tolerancia)
+        if regresiones:
+            print("\nREGRESIONES DE RENDIMIENTO:")
+            for regresion in regresiones:
+                print(f"   {regresion}")
+            sys.exit(1)
+        print("\nSin regresiones respecto a la línea base")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+import time
+from generador_facturas import EMPRESAS_ESCANEADAS, generar_lote
+from ocr_lotes import textos_documentos
+from procesar_lote import expandir_entradas
+from tiempos import documento
+
+TAMANOS = (1, 2, 4, 8, 16)
+
+def medir(rutas, tamano_lote, dpi):
+    """
+    OCR de todas las páginas escaneadas de `rutas` en lotes de `tamano_lote`; devuelve textos y tiempos
+    """
+    with documento("lote", None) as registro, contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        textos = textos_documentos(rutas, tamano_lote, dpi)
+        segundos = time.perf_counter() - inicio
+    paginas = sum(len(t) for t in textos.values())
+    etapas = registro.como_dict()['etapas_ms']
+    return textos, {
+        'paginas': paginas,
+        'segundos': segundos,
+        'paginas_por_segundo': paginas / segundos if segundos else 0.0,
+        'ocr_ms_por_pagina': etapas.get('ocr', 0.0) / max(1, paginas),
+        'rasterizacion_ms_por_pagina': etapas.get('rasterizacion', 0.0) / max(1, paginas),
+    }
+
+def mostrar_resultados(resultados):
+    print("\n" + "="*60)
+    print("RENDIMIENTO DEL OCR SEGÚN TAMAÑO DE LOTE")
+    print("="*60)
+    for tamano, r in resultados.items():
+        print(f"   lote {tamano:3d}: {r['paginas_por_segundo']:6.2f} páginas/s  "
+              f"OCR {r['ocr_ms_por_pagina']:8.1f} ms/página  "
+              f"rasterización {r['rasterizacion_ms_por_pagina']:6.1f} ms/página  "
+              f"{'mismo texto' if r['mismo_texto'] else 'TEXTO DISTINTO'}")
+    validos = {t: r for t, r in resultados.items() if r['mismo_texto']}
+    if validos:
+        mejor = max(validos, key=lambda t: validos[t]['paginas_por_segundo'])
+        print(f"\nTamaño recomendado: --lote-ocr {mejor}")
+        # Aquí los lotes mezclan facturas; procesar_lote solo agrupa páginas de una misma factura
+        print("Nota: en procesar_lote/ingesta el lote nunca supera las páginas escaneadas de una factura")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el rendimiento del OCR por lotes según el tamaño de lote")
+    parser.add_argument('entradas', nargs='*',
+                        help="PDFs escaneados reales (por defecto, facturas sintéticas de AIRE y EPM)")
+    parser.add_argument('-n', '--cantidad', type=int, default=4, help="Facturas sintéticas por empresa")
+    parser.add_argument('--paginas', type=int, default=2, help="Páginas por factura sintética")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=list(TAMANOS), help="Tamaños de lote a medir")
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('-o', '--salida', help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    # Importación diferida: el modelo solo se carga una vez elegidas las entradas
+    import lector_ocr
+
+    with tempfile.TemporaryDirectory(prefix="facturas_lotes_") as directorio:
+        if args.entradas:
+            rutas = expandir_entradas(args.entradas)
+        else:
+            generadas = generar_lote(directorio, sorted(EMPRESAS_ESCANEADAS), args.cantidad, args.paginas)
+            rutas = [ruta for lista in generadas.values() for ruta in lista]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            lector_ocr.precalentar()
+
+        referencia = None
+        resultados = {}
+        # El lote más chico es la referencia contra la que se compara el texto
+        for tamano in sorted(args.tamanos):
+            textos, medicion = medir(rutas, tamano, args.dpi)
+            if referencia is None:
+                referencia = textos
+            medicion['mismo_texto'] = textos == referencia
+            resultados[tamano] = medicion
+
+    mostrar_resultados(resultados)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nResultados guardados en: {args.salida}")
+
+if __name__ == "__main__":
+    main()
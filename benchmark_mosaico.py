@@ -0,0 +1,70 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from generador_facturas import generar_factura
+from mosaico_ocr import ocr_mosaico
+from pool_ocr import obtener_pool
+
+def latencia(funcion, repeticiones):
+    """
+    Mediana de milisegundos de `funcion()` y su último resultado
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), resultado
+
+def mostrar_resultados(resultados):
+    print("\n" + "="*60)
+    print("LATENCIA DEL OCR DE UNA PÁGINA SEGÚN NÚMERO DE FRANJAS")
+    print("="*60)
+    base = resultados['1']['ms']
+    for franjas, r in resultados.items():
+        print(f"   {franjas:>2s} franjas: {r['ms']:8.1f} ms  x{base / r['ms']:4.1f}  "
+              f"{r['tokens']:4d} tokens  {'mismo texto' if r['mismo_texto'] else 'TEXTO DISTINTO'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide la latencia del OCR por franjas en paralelo de una factura AIRE")
+    parser.add_argument('pdf', nargs='?', help="PDF escaneado (por defecto, una factura AIRE sintética)")
+    parser.add_argument('--franjas', type=int, nargs='+',
+                        default=sorted({2, 4, os.cpu_count() or 1} - {1}), help="Cantidades de franjas a medir")
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('-r', '--repeticiones', type=int, default=3)
+    parser.add_argument('-o', '--salida', help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    # Los pools se crean antes de la primera inferencia del proceso (ver PoolOCR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pools = {n: obtener_pool(n) for n in args.franjas}
+        import lector_ocr
+        reader = lector_ocr.obtener_lector()
+
+    from paginas import iterar_paginas
+    with tempfile.TemporaryDirectory(prefix="factura_mosaico_") as directorio:
+        pdf_path = args.pdf or generar_factura('AIRE', os.path.join(directorio, "AIRE_sintetica.pdf"))
+        img = next(iterar_paginas(pdf_path, dpi=args.dpi, escala_grises=True, paginas=[1]))
+
+    ms, completo = latencia(lambda: reader.readtext(img, detail=1), args.repeticiones)
+    textos = [texto for _, texto, _ in completo]
+    resultados = {'1': {'ms': ms, 'tokens': len(completo), 'mismo_texto': True}}
+    for n in args.franjas:
+        ms, tokens = latencia(lambda: ocr_mosaico(img, n, pools[n]), args.repeticiones)
+        resultados[str(n)] = {'ms': ms, 'tokens': len(tokens),
+                              'mismo_texto': [texto for _, texto, _ in tokens] == textos}
+
+    mostrar_resultados(resultados)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nResultados guardados en: {args.salida}")
+
+if __name__ == "__main__":
+    main()
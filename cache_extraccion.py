@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import tempfile
+
+TAMANO_MAXIMO = 256 * 1024 * 1024
+
+def hash_archivo(pdf_path, bloque=1024 * 1024):
+    """
+    SHA-256 del contenido del PDF, leído por bloques
+    """
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for parte in iter(lambda: f.read(bloque), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+class CacheExtraccion:
+    """
+    Caché en disco de resultados de extracción, direccionada por contenido.
+
+    Cada entrada es un JSON con los campos extraídos (y opcionalmente el texto crudo),
+    identificada por el hash del PDF, la empresa, la versión del extractor y las
+    opciones que cambian el resultado. Cuando el directorio supera `tamano_maximo` bytes
+    se borran las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, directorio, tamano_maximo=TAMANO_MAXIMO):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self._total = None
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, hash_pdf, empresa, version, opciones=None):
+        """
+        `opciones` ({nombre: valor}) agrega un resumen de las opciones a la clave; sin
+        ellas la clave es la misma que en corridas sin opciones
+        """
+        clave = f"{empresa}-{version}-{hash_pdf}"
+        if opciones:
+            resumen = hashlib.sha256(json.dumps(opciones, sort_keys=True).encode()).hexdigest()[:12]
+            clave += f"-{resumen}"
+        return clave
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave + '.json')
+
+    def obtener(self, clave):
+        """
+        Devuelve la entrada guardada ({'datos': ..., 'texto': ...}) o None
+        """
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                entrada = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Marca la entrada como usada recientemente para el desalojo LRU
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+        return entrada
+
+    def guardar(self, clave, datos, texto=None):
+        entrada = {'datos': datos}
+        if texto is not None:
+            entrada['texto'] = texto
+
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        tamano = os.path.getsize(temporal)
+        os.replace(temporal, self._ruta(clave))
+
+        # El directorio solo se vuelve a recorrer cuando la estimación supera el límite
+        if self._total is None:
+            self.desalojar()
+        else:
+            self._total += tamano
+            if self._total > self.tamano_maximo:
+                self.desalojar()
+
+    def desalojar(self):
+        """
+        Borra las entradas menos usadas hasta quedar por debajo del tamaño máximo
+        """
+        entradas = []
+        total = 0
+        for e in os.scandir(self.directorio):
+            if e.is_file() and e.name.endswith('.json'):
+                st = e.stat()
+                entradas.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+
+        self._total = total
+        if total <= self.tamano_maximo:
+            return
+
+        for _, tamano, ruta in sorted(entradas):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                continue
+            total -= tamano
+            if total <= self.tamano_maximo:
+                break
+        self._total = total
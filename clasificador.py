@@ -0,0 +1,152 @@
+import argparse
+import os
+import re
+import shutil
+import time
+from collections import Counter
+from ocr_etiquetas import normalizar
+
+DESCONOCIDO = "DESCONOCIDO"
+
+# Frases que identifican a cada empresa, con su peso; se comparan ya normalizadas
+SENALES = {
+    'AAA': [("triple a", 3), ("aaa", 1), ("total acueducto", 2), ("total alcantarillado", 1),
+            ("total aseo", 2), ("tasa retributiva", 1)],
+    'AIRE': [("air-e", 3), ("air e", 2), ("contribucion activa", 1), ("tasa seguridad", 1), ("total mes", 1)],
+    'BIA': [("bia energia", 3), ("servicios bia", 3), ("total a cobrar", 1), ("energia solar", 1)],
+    'CELSIA': [("celsia", 3), ("energia activa", 1), ("otros conceptos", 1)],
+    'ENEL': [("enel", 3), ("codensa", 3), ("valor kwh aplicado", 2), ("consumo activa sencilla", 2)],
+    'EPM': [("epm", 3), ("empresas publicas de medellin", 3), ("total otras entidades", 2),
+            ("total alcantarillado", 1)],
+    'GASCARIBE': [("gascaribe", 3), ("gases del caribe", 3), ("consumo de gas natural", 2),
+                  ("consulta tu cupo", 1)],
+}
+
+# Cada frase se busca como palabra completa ("enel" no debe coincidir dentro de otra palabra)
+_FRASES = {empresa: [(re.compile(r"\b" + re.escape(frase) + r"\b"), peso) for frase, peso in frases]
+           for empresa, frases in SENALES.items()}
+
+# Puntaje con el que la empresa ganadora se considera identificada sin dudas
+PUNTAJE_SEGURO = 3
+# Confianza mínima para asignar una empresa; por debajo va a DESCONOCIDO
+UMBRAL = 0.5
+# Resolución de la miniatura que se reconoce cuando la primera página no tiene texto
+DPI_MINIATURA = 100
+# Caracteres de la primera página que se revisan (el encabezado basta)
+MAX_CARACTERES = 3000
+
+def puntuar(texto):
+    """
+    Suma los pesos de las frases de cada empresa presentes en el texto
+    """
+    texto = normalizar(texto)
+    return {empresa: sum(peso for frase, peso in frases if frase.search(texto))
+            for empresa, frases in _FRASES.items()}
+
+def elegir(puntajes):
+    """
+    Devuelve (empresa, confianza) a partir de los puntajes.
+
+    La confianza combina la ventaja sobre la segunda empresa con qué tan cerca está
+    el ganador de PUNTAJE_SEGURO.
+    """
+    ordenados = sorted(puntajes.items(), key=lambda item: item[1], reverse=True)
+    (empresa, mejor), (_, segundo) = ordenados[0], ordenados[1]
+    if mejor == 0:
+        return DESCONOCIDO, 0.0
+    confianza = (mejor / (mejor + segundo)) * min(1.0, mejor / PUNTAJE_SEGURO)
+    if confianza < UMBRAL:
+        return DESCONOCIDO, round(confianza, 3)
+    return empresa, round(confianza, 3)
+
+def _texto_metadatos(pdf):
+    return " ".join(str(valor) for clave, valor in (pdf.metadata or {}).items()
+                    if clave in ('Title', 'Author', 'Subject', 'Creator', 'Producer', 'Keywords'))
+
+def texto_miniatura(pdf_path, dpi=DPI_MINIATURA):
+    """
+    OCR de la primera página rasterizada a baja resolución
+    """
+    from paginas import iterar_paginas
+    from lector_ocr import obtener_lector
+    for img_np in iterar_paginas(pdf_path, dpi=dpi, escala_grises=True, paginas=[1]):
+        return " ".join(obtener_lector().readtext(img_np, detail=0))
+    return ""
+
+def clasificar(pdf_path, usar_ocr=True, dpi_miniatura=DPI_MINIATURA):
+    """
+    Identifica la empresa de una factura con señales baratas, de menor a mayor costo:
+    metadatos del PDF, capa de texto de la primera página y, solo si la página es
+    escaneada y `usar_ocr`, una miniatura a baja resolución.
+
+    Devuelve un dict con empresa (o DESCONOCIDO), confianza, origen de la señal y puntajes.
+    """
+    import pdfplumber
+    from texto_hibrido import tiene_capa_texto
+
+    inicio = time.perf_counter()
+    texto = ""
+    origen = "metadatos"
+    con_texto = False
+    with pdfplumber.open(pdf_path) as pdf:
+        texto = _texto_metadatos(pdf)
+        if pdf.pages:
+            pagina = pdf.pages[0]
+            con_texto = tiene_capa_texto(pagina)
+            if con_texto:
+                texto += " " + (pagina.extract_text() or "")[:MAX_CARACTERES]
+                origen = "texto"
+
+    puntajes = puntuar(texto)
+    empresa, confianza = elegir(puntajes)
+
+    if empresa == DESCONOCIDO and not con_texto and usar_ocr:
+        texto += " " + texto_miniatura(pdf_path, dpi_miniatura)
+        origen = "miniatura"
+        puntajes = puntuar(texto)
+        empresa, confianza = elegir(puntajes)
+
+    return {
+        'empresa': empresa,
+        'confianza': confianza,
+        'origen': origen,
+        'puntajes': puntajes,
+        'duracion': time.perf_counter() - inicio
+    }
+
+def main():
+    from procesar_lote import expandir_entradas
+
+    parser = argparse.ArgumentParser(description="Clasifica facturas PDF por empresa según su contenido")
+    parser.add_argument('entradas', nargs='+', help="Directorios, patrones glob o archivos PDF")
+    parser.add_argument('--ordenar', metavar='DIRECTORIO',
+                        help="Copia cada PDF a DIRECTORIO/<EMPRESA>/ (los no identificados a DESCONOCIDO)")
+    parser.add_argument('--sin-ocr', action='store_true', help="No reconoce miniaturas de páginas escaneadas")
+    args = parser.parse_args()
+
+    archivos = expandir_entradas(args.entradas)
+    conteo = Counter()
+    duracion = 0.0
+    for archivo in archivos:
+        try:
+            resultado = clasificar(archivo, usar_ocr=not args.sin_ocr)
+        except Exception as e:
+            print(f"Error en {archivo}: {e}")
+            resultado = {'empresa': DESCONOCIDO, 'confianza': 0.0, 'origen': 'error', 'duracion': 0.0}
+        conteo[resultado['empresa']] += 1
+        duracion += resultado['duracion']
+        print(f"{resultado['empresa']:10s} {resultado['confianza']:.2f} ({resultado['origen']}) "
+              f"{resultado['duracion'] * 1000:7.1f} ms  {archivo}")
+        if args.ordenar:
+            destino = os.path.join(args.ordenar, resultado['empresa'])
+            os.makedirs(destino, exist_ok=True)
+            shutil.copy2(archivo, destino)
+
+    print("\nRESUMEN")
+    for empresa, cantidad in sorted(conteo.items()):
+        print(f"   {empresa}: {cantidad}")
+    if archivos:
+        print(f"Tiempo promedio por archivo: {duracion / len(archivos) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
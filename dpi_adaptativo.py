@@ -0,0 +1,100 @@
+import backends_texto
+from resultado_ocr import ResultadoOCR
+from texto_hibrido import ocr_pagina_suelta
+from tiempos import etapa
+
+# Resolución del primer intento y la de reintento para las páginas que fallen
+DPI_BAJO = 150
+DPI_ALTO = 300
+# Confianza media de easyocr por debajo de la cual la página se vuelve a reconocer
+CONFIANZA_MINIMA = 0.6
+
+class OCRConConfianza:
+    """
+    Adapta una función img -> resultados de readtext(detail=1) a la interfaz
+    ocr_pagina (img -> texto), guardando la confianza media de la última página.
+
+    `paginas` conserva un ResultadoOCR (cajas, textos y confianzas) por página
+    reconocida, en el orden de las páginas, para las búsquedas espaciales.
+
+    Con `reconocer_varias` (lista de imágenes -> lista de resultados), los lectores
+    de páginas reconocen de a `paginas_por_lote` páginas con `varias`. Con
+    `reconocer_pdf` ((pdf_path, numeros, dpi) -> lista de (resultados, tamaño)), le
+    entregan los números de página para que los rasterice y reconozca, p. ej. un PoolOCR.
+    """
+
+    def __init__(self, reconocer, separador="\n", reconocer_varias=None, paginas_por_lote=1,
+                 reconocer_pdf=None):
+        self.reconocer = reconocer
+        self.separador = separador
+        self.reconocer_varias = reconocer_varias
+        self.paginas_por_lote = paginas_por_lote if reconocer_varias else 1
+        self.reconocer_pdf = reconocer_pdf
+        self.confianza = None
+        self.paginas = []
+
+    def _registrar(self, tamano, resultados):
+        pagina = ResultadoOCR.desde_readtext(resultados, tamano)
+        self.paginas.append(pagina)
+        self.confianza = pagina.confianza_media()
+        return self.separador.join(texto for _, texto, _ in resultados)
+
+    def __call__(self, img_np):
+        return self._registrar((img_np.shape[1], img_np.shape[0]), self.reconocer(img_np))
+
+    def paginas_pdf(self, pdf_path, numeros, dpi):
+        """
+        Textos de las páginas `numeros` del PDF reconocidas con `reconocer_pdf`, en ese orden
+        """
+        return [self._registrar(tamano, resultados)
+                for resultados, tamano in self.reconocer_pdf(pdf_path, numeros, dpi)]
+
+    def varias(self, imagenes):
+        """
+        Textos de varias páginas reconocidas en una sola llamada, en orden
+        """
+        if self.reconocer_varias is None:
+            return [self(img_np) for img_np in imagenes]
+        return [self._registrar((img_np.shape[1], img_np.shape[0]), resultados)
+                for img_np, resultados in zip(imagenes, self.reconocer_varias(imagenes))]
+
+def textos_adaptativos(pdf_path, empresa, ocr_pagina, completo, dpi_bajo=DPI_BAJO, dpi_alto=DPI_ALTO,
+                       confianza_minima=CONFIANZA_MINIMA):
+    """
+    Lista (texto, origen) por página, reconociendo primero a `dpi_bajo`.
+
+    `ocr_pagina` es un OCRConConfianza y `completo(paginas)` indica si con esos textos
+    ya están los campos requeridos. El primer pase lee el documento con `textos()`, así
+    que respeta los lotes y el pool de páginas de `ocr_pagina`. Se reintenta a
+    `dpi_alto`, primero, solo las páginas con confianza baja y, si aún faltan campos,
+    el resto de las páginas escaneadas.
+    """
+    inicio = len(ocr_pagina.paginas)
+    with backends_texto.abrir(pdf_path, empresa, ocr_pagina=ocr_pagina, dpi=dpi_bajo) as lector:
+        paginas = lector.textos()
+    # Posición de cada página escaneada en ocr_pagina.paginas, para reemplazarla si se reintenta
+    posiciones = {numero: inicio + i for i, numero in
+                  enumerate(n for n, (_, origen) in enumerate(paginas, 1) if origen == "ocr")}
+    confianzas = {numero: ocr_pagina.paginas[i].confianza_media() for numero, i in posiciones.items()}
+
+    dudosas = [n for n, confianza in confianzas.items() if confianza < confianza_minima]
+    if not dudosas and completo(paginas):
+        return paginas
+
+    restantes = [n for n in confianzas if n not in dudosas]
+    for grupo in (dudosas, restantes):
+        if not grupo:
+            continue
+        if ocr_pagina.reconocer_pdf:
+            with etapa("ocr"):
+                textos = ocr_pagina.paginas_pdf(pdf_path, grupo, dpi_alto)
+        else:
+            textos = [ocr_pagina_suelta(pdf_path, numero, ocr_pagina, dpi_alto) for numero in grupo]
+        nuevas = ocr_pagina.paginas[-len(grupo):]
+        del ocr_pagina.paginas[-len(grupo):]
+        for numero, texto, pagina in zip(grupo, textos, nuevas):
+            paginas[numero - 1] = (texto, "ocr")
+            ocr_pagina.paginas[posiciones[numero]] = pagina
+        if completo(paginas):
+            break
+    return paginas
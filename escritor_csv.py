@@ -0,0 +1,110 @@
+import csv
+import os
+import queue
+import threading
+import time
+
+_FIN = object()
+
+class EscritorCSV:
+    """
+    Escritor de CSV en segundo plano para los exportadores de cada empresa.
+
+    Los productores solo encolan filas con `escribir`; un hilo dedicado mantiene cada
+    archivo abierto, acumula las filas y las vuelca cuando se juntan `max_filas` o pasan
+    `intervalo` segundos desde el último volcado. Como solo ese hilo abre los archivos,
+    el encabezado se escribe una única vez aunque haya varios productores.
+
+    Si el hilo falla (p. ej. disco lleno o una fila con campos de más), deja de escribir
+    y el error se relanza en el siguiente `escribir` o en `cerrar`.
+    """
+
+    def __init__(self, max_filas=200, intervalo=2.0):
+        self.max_filas = max_filas
+        self.intervalo = intervalo
+        self._cola = queue.Queue()
+        self._archivos = {}
+        self._pendientes = {}
+        self._error = None
+        self._hilo = threading.Thread(target=self._bucle, name="EscritorCSV", daemon=True)
+        self._hilo.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def escribir(self, ruta, campos, fila):
+        self._revisar_error()
+        self._cola.put((ruta, campos, fila))
+
+    def cerrar(self):
+        """
+        Vuelca lo pendiente, cierra los archivos y espera al hilo escritor
+        """
+        self._cola.put(_FIN)
+        self._hilo.join()
+        self._revisar_error()
+
+    def _revisar_error(self):
+        if self._error is not None:
+            raise RuntimeError(f"El escritor de CSV falló: {self._error}") from self._error
+
+    def _abrir(self, ruta, campos):
+        ruta = os.path.abspath(ruta)
+        if ruta not in self._archivos:
+            nuevo = not os.path.isfile(ruta) or os.path.getsize(ruta) == 0
+            archivo = open(ruta, 'a', newline='', encoding='utf-8')
+            writer = csv.DictWriter(archivo, fieldnames=campos)
+            if nuevo:
+                writer.writeheader()
+            self._archivos[ruta] = (archivo, writer)
+        return ruta
+
+    def _volcar(self, ruta):
+        filas = self._pendientes.pop(ruta, None)
+        if not filas:
+            return
+        archivo, writer = self._archivos[ruta]
+        writer.writerows(filas)
+        archivo.flush()
+
+    def _volcar_todo(self):
+        for ruta in list(self._pendientes):
+            self._volcar(ruta)
+
+    def _bucle(self):
+        try:
+            self._atender()
+        except Exception as e:
+            self._error = e
+        finally:
+            for archivo, _ in self._archivos.values():
+                archivo.close()
+            self._archivos.clear()
+
+    def _atender(self):
+        ultimo_volcado = time.monotonic()
+        while True:
+            try:
+                item = self._cola.get(timeout=self.intervalo)
+            except queue.Empty:
+                item = None
+
+            if item is _FIN:
+                break
+
+            if item is not None:
+                ruta, campos, fila = item
+                ruta = self._abrir(ruta, campos)
+                filas = self._pendientes.setdefault(ruta, [])
+                filas.append(fila)
+                if len(filas) >= self.max_filas:
+                    self._volcar(ruta)
+
+            if time.monotonic() - ultimo_volcado >= self.intervalo:
+                self._volcar_todo()
+                ultimo_volcado = time.monotonic()
+
+        self._volcar_todo()
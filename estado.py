@@ -0,0 +1,61 @@
+import contextlib
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Directorio de los archivos de estado aprendido entre corridas (mapa de páginas, plantillas OCR).
+# Es fijo y no depende del directorio desde donde se ejecuten los scripts.
+DIRECTORIO_ESTADO = os.environ.get(
+    'FACTURAS_ESTADO', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'estado'))
+
+def ruta_estado(nombre):
+    os.makedirs(DIRECTORIO_ESTADO, exist_ok=True)
+    return os.path.join(DIRECTORIO_ESTADO, nombre)
+
+def leer_json(ruta):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+@contextlib.contextmanager
+def bloqueo(ruta):
+    """
+    Bloqueo exclusivo entre procesos sobre `ruta` (mediante el archivo `ruta`.lock)
+    """
+    with open(ruta + '.lock', 'a+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def actualizar_json(ruta, fusionar):
+    """
+    Lee el archivo, le aplica `fusionar(datos)` y lo reemplaza de forma atómica, todo
+    bajo bloqueo para que los cambios de procesos concurrentes no se pisen. Devuelve
+    los datos escritos.
+    """
+    with bloqueo(ruta):
+        datos = leer_json(ruta)
+        fusionar(datos)
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(ruta)), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, indent=1)
+        os.replace(temporal, ruta)
+    return datos
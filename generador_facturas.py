@@ -0,0 +1,178 @@
+import argparse
+import os
+from PIL import Image, ImageDraw, ImageFont
+
+# Líneas sintéticas con las etiquetas que buscan los extractores de cada empresa
+LINEAS = {
+    'AAA': [
+        "FACTURA DE SERVICIOS PUBLICOS AAA",
+        "Cargo fijo Comercial $ 10,000",
+        "Consumo básico Comercial 4 $ 2,000 $ 8,000",
+        "Tasa de uso básico Comercial $ 500",
+        "TOTAL ACUEDUCTO $18,500",
+        "Cargo fijo Comercial $ 7,000",
+        "Consumo básico Comercial 4 $ 1,000 $ 4,000",
+        "Tasa retributiva básico Comercial $ 300",
+        "TOTAL ALCANTARILLADO $11,300",
+        "TOTAL ASEO $20,000",
+        "TOTAL OTROS CONCEPTOS $0",
+        "TOTAL OTROS COBROS $1,000",
+    ],
+    'AIRE': [
+        "AIR-E FACTURA DE ENERGIA",
+        "Consumo activa 250,00 812,34 $ 203.085,00",
+        "Contribución Activa $ 40.617",
+        "Tasa Seguridad $ 3.500",
+        "Total Mes $ 247.202",
+    ],
+    'BIA': [
+        "BIA ENERGIA",
+        "Energía activa (250 kWh)",
+        "Cu $812,45",
+        "Servicios BIA energía $203.112",
+        "Otros cobros $ 1.200",
+        "Energía Solar -$12.000",
+        "Intereses $ 0",
+        "Retenciones -$5.000",
+        "Total a cobrar $ 190.000",
+    ],
+    'CELSIA': [
+        "CELSIA ENERGIA",
+        "Energia Activa 12345 12100 245 1 $812.34",
+        "OTROS CONCEPTOS $12,500",
+        "TOTAL A PAGAR $212,345",
+    ],
+    'ENEL': [
+        "ENEL COLOMBIA",
+        "CONSUMO MES: 78 kWh",
+        "VALOR kWh APLICADO: $ 799,42",
+        "CONSUMO ACTIVA SENCILLA $ 62.355",
+        "TOTAL A PAGAR $ 62.360",
+    ],
+    'EPM': [
+        "EPM SERVICIOS PUBLICOS",
+        "lectura 567 561 6 m3",
+        "acueducto 6 m3 $ 20.000",
+        "consumo may-24 3.456,78",
+        "consumo 6 m3",
+        "consumo may-24 2.100,00",
+        "total alcantarillado $ 15.000",
+        "123 kwh",
+        "energía may-24 100 812,5",
+        "total energía $ 99.000",
+        "total otras entidades $ 5.000",
+    ],
+    'GASCARIBE': [
+        "GASCARIBE",
+        "1333 1331 0 - 1000 2500 2 5,000",
+        "31 - CONSUMO DE GAS NATURAL",
+        "$ 55,000",
+        "Consulta tu cupo",
+    ],
+}
+
+# Empresas cuyas facturas llegan escaneadas (sin capa de texto)
+EMPRESAS_ESCANEADAS = {'AIRE', 'EPM'}
+
+RELLENO = "Texto informativo de la factura sin datos relevantes para la extracción {}."
+
+def _escapar_pdf(linea):
+    return linea.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def pdf_con_texto(paginas, ruta):
+    """
+    Escribe un PDF mínimo con capa de texto (Helvetica, WinAnsi), una lista de líneas por página
+    """
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    hijos = []
+    for lineas in paginas:
+        contenido = "BT /F1 11 Tf 14 TL 50 780 Td " + " ".join(
+            f"({_escapar_pdf(l)}) '" for l in lineas) + " ET"
+        contenido = contenido.encode('cp1252', errors='replace')
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(contenido) + contenido + b"\nendstream")
+        id_contenido = len(objetos)
+        objetos.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % id_contenido)
+        hijos.append(len(objetos))
+    objetos[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % h for h in hijos), len(hijos))
+
+    salida = b"%PDF-1.4\n"
+    desplazamientos = []
+    for i, objeto in enumerate(objetos, 1):
+        desplazamientos.append(len(salida))
+        salida += b"%d 0 obj\n" % i + objeto + b"\nendobj\n"
+    inicio_xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    salida += b"".join(b"%010d 00000 n \n" % d for d in desplazamientos)
+    salida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objetos) + 1, inicio_xref)
+    with open(ruta, 'wb') as f:
+        f.write(salida)
+
+def _fuente(tamano):
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", tamano)
+    except OSError:
+        return ImageFont.load_default()
+
+def pdf_escaneado(paginas, ruta, dpi=200):
+    """
+    Escribe un PDF solo de imágenes (como una factura escaneada), una imagen por página
+    """
+    ancho, alto = int(8.5 * dpi), int(11 * dpi)
+    fuente = _fuente(int(dpi / 6))
+    imagenes = []
+    for lineas in paginas:
+        img = Image.new('L', (ancho, alto), 255)
+        dibujo = ImageDraw.Draw(img)
+        y = dpi // 2
+        for linea in lineas:
+            dibujo.text((dpi // 2, y), linea, fill=0, font=fuente)
+            y += int(dpi / 4)
+        imagenes.append(img)
+    imagenes[0].save(ruta, "PDF", resolution=dpi, save_all=True, append_images=imagenes[1:])
+
+def generar_factura(empresa, ruta, paginas=1):
+    """
+    Genera una factura sintética de la empresa; las páginas extra llevan solo relleno
+    """
+    contenido = [LINEAS[empresa]] + [
+        [RELLENO.format(n) for n in range(40)] for _ in range(paginas - 1)]
+    if empresa in EMPRESAS_ESCANEADAS:
+        pdf_escaneado(contenido, ruta)
+    else:
+        pdf_con_texto(contenido, ruta)
+    return ruta
+
+def generar_lote(directorio, empresas=None, cantidad=10, paginas=1):
+    """
+    Genera `cantidad` facturas por empresa en `directorio` y devuelve {empresa: [rutas]}
+    """
+    os.makedirs(directorio, exist_ok=True)
+    rutas = {}
+    for empresa in empresas or LINEAS:
+        rutas[empresa] = [
+            generar_factura(empresa, os.path.join(directorio, f"{empresa}_sintetica_{i:04d}.pdf"), paginas)
+            for i in range(cantidad)
+        ]
+    return rutas
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera facturas PDF sintéticas para pruebas y benchmarks")
+    parser.add_argument('directorio')
+    parser.add_argument('-n', '--cantidad', type=int, default=10, help="Facturas por empresa")
+    parser.add_argument('-p', '--paginas', type=int, default=1, help="Páginas por factura")
+    parser.add_argument('-e', '--empresas', nargs='+', choices=sorted(LINEAS))
+    args = parser.parse_args()
+
+    rutas = generar_lote(args.directorio, args.empresas, args.cantidad, args.paginas)
+    print(f"Generadas {sum(len(r) for r in rutas.values())} facturas en {args.directorio}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import re
+from bisect import bisect_left
+
+class IndiceEtiquetas:
+    """
+    Índice de las posiciones de un conjunto de etiquetas (títulos de sección, totales)
+    construido en una sola pasada sobre el texto.
+
+    Permite recortar secciones por posición y leer el valor que sigue a una etiqueta
+    sin volver a recorrer todo el documento por cada búsqueda.
+    """
+
+    def __init__(self, texto, etiquetas, flags=0):
+        self.texto = texto
+        self.posiciones = {etiqueta: [] for etiqueta in etiquetas}
+        # Las más largas primero: si una etiqueta es prefijo de otra gana la más específica
+        ordenadas = sorted(etiquetas, key=len, reverse=True)
+        alternativas = "|".join(f"(?P<e{i}>{re.escape(e)})" for i, e in enumerate(ordenadas))
+        for m in re.finditer(alternativas, texto, flags):
+            etiqueta = ordenadas[int(m.lastgroup[1:])]
+            self.posiciones[etiqueta].append((m.start(), m.end()))
+
+    def primera(self, etiqueta, desde=0):
+        """
+        Primera aparición (inicio, fin) de la etiqueta que empieza en `desde` o después
+        """
+        apariciones = self.posiciones.get(etiqueta, [])
+        i = bisect_left(apariciones, (desde, -1))
+        return apariciones[i] if i < len(apariciones) else None
+
+    def seccion(self, inicio_etiqueta, fin_etiqueta, desde=0):
+        """
+        Rango (inicio, fin) desde `inicio_etiqueta` hasta el final de la primera
+        `fin_etiqueta` posterior, equivalente a re.search(inicio.*?fin, DOTALL), o None
+        """
+        for inicio, fin_titulo in self.posiciones.get(inicio_etiqueta, []):
+            if inicio < desde:
+                continue
+            fin = self.primera(fin_etiqueta, fin_titulo)
+            if fin:
+                return inicio, fin[1]
+            return None
+        return None
+
+    def recorte(self, inicio, fin):
+        return self.texto[inicio:fin]
+
+    def valor_despues(self, etiqueta, patron):
+        """
+        Aplica `patron` (compilado) justo después de cada aparición de la etiqueta y
+        devuelve el primer match (equivalente a re.search(etiqueta + patron))
+        """
+        for _, fin in self.posiciones.get(etiqueta, []):
+            m = patron.match(self.texto, fin)
+            if m:
+                return m
+        return None
@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from almacen_sqlite import AlmacenFacturas
+from clasificador import DESCONOCIDO, clasificar
+from escritor_csv import EscritorCSV
+from procesar_lote import (EMPRESAS_OCR, detectar_empresa, exportar, incompatibilidad_ocr, inicializar_trabajador,
+                           procesar_archivo)
+
+# Segundos entre revisiones de la carpeta de entrada
+INTERVALO = 0.5
+# Archivos en espera por cola; al llenarse, la revisión de la carpeta se detiene
+MAX_COLA_TEXTO = 64
+MAX_COLA_OCR = 4
+
+class ServicioIngesta:
+    """
+    Servicio que vigila una carpeta y procesa cada PDF nuevo apenas termina de copiarse.
+
+    Los PDFs con capa de texto y los escaneados (AIRE/EPM) van a colas acotadas y a
+    pools de procesos separados, para que una ráfaga de escaneados no frene a los
+    digitales ni llene la memoria con imágenes. Los resultados se exportan con las
+    mismas funciones del procesamiento por lotes y el PDF se mueve a `procesados/`
+    o `errores/`.
+    """
+
+    def __init__(self, entrada, trabajadores_texto=2, trabajadores_ocr=1, opciones_ocr=None,
+                 directorio_cache=None, ruta_sqlite=None, intervalo=INTERVALO,
+                 max_cola_texto=MAX_COLA_TEXTO, max_cola_ocr=MAX_COLA_OCR):
+        self.entrada = entrada
+        self.procesados = os.path.join(entrada, 'procesados')
+        self.errores = os.path.join(entrada, 'errores')
+        self.trabajadores_texto = trabajadores_texto
+        self.trabajadores_ocr = trabajadores_ocr
+        self.opciones_ocr = opciones_ocr
+        self.directorio_cache = directorio_cache
+        self.ruta_sqlite = ruta_sqlite
+        self.intervalo = intervalo
+        self.max_cola_texto = max_cola_texto
+        self.max_cola_ocr = max_cola_ocr
+        self._pendientes = set()
+        self._tamanos = {}
+        self._detener = None
+
+    def _nuevos(self):
+        """
+        PDFs de la carpeta que no están en proceso y cuyo tamaño no cambió desde la revisión anterior
+        """
+        listos = []
+        tamanos = {}
+        with os.scandir(self.entrada) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file() or not entrada.name.lower().endswith('.pdf'):
+                    continue
+                if entrada.path in self._pendientes:
+                    continue
+                tamano = entrada.stat().st_size
+                tamanos[entrada.path] = tamano
+                # Un archivo que sigue creciendo todavía se está copiando
+                if tamano > 0 and self._tamanos.get(entrada.path) == tamano:
+                    listos.append(entrada.path)
+        self._tamanos = tamanos
+        return sorted(listos)
+
+    async def _vigilar(self, cola_texto, cola_ocr, pool_texto):
+        loop = asyncio.get_running_loop()
+        while not self._detener.is_set():
+            for ruta in self._nuevos():
+                self._pendientes.add(ruta)
+                llegada = time.time()
+                empresa = detectar_empresa(ruta)
+                if empresa is None:
+                    # Un PDF corrupto no debe detener la vigilancia de la carpeta
+                    try:
+                        clasificacion = await loop.run_in_executor(pool_texto, clasificar, ruta)
+                    except Exception as e:
+                        print(f"Error al clasificar {os.path.basename(ruta)}: {e}")
+                        self._mover(ruta, self.errores)
+                        self._pendientes.discard(ruta)
+                        continue
+                    empresa = clasificacion['empresa']
+                if empresa == DESCONOCIDO:
+                    self._mover(ruta, self.errores)
+                    self._pendientes.discard(ruta)
+                    print(f"Sin empresa identificada: {os.path.basename(ruta)}")
+                    continue
+                cola = cola_ocr if empresa in EMPRESAS_OCR else cola_texto
+                # Con la cola llena, put espera: no se leen más archivos hasta que haya espacio
+                await cola.put((empresa, ruta, llegada))
+            try:
+                await asyncio.wait_for(self._detener.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _consumir(self, cola, pool, escritor, almacen):
+        loop = asyncio.get_running_loop()
+        while True:
+            empresa, ruta, llegada = await cola.get()
+            try:
+                resultado = await loop.run_in_executor(
+                    pool, procesar_archivo, empresa, ruta, self.opciones_ocr, self.directorio_cache)
+                if resultado['error']:
+                    print(f"Error en {os.path.basename(ruta)}: {resultado['error']}")
+                    self._mover(ruta, self.errores)
+                # Se mueve antes de exportar: si el movimiento falla, el PDF sigue en la
+                # entrada y se reintenta en la próxima revisión sin haberse exportado
+                elif self._mover(ruta, self.procesados):
+                    exportar(resultado, escritor, almacen)
+                    print(f"{empresa}: {os.path.basename(ruta)} exportado en {time.time() - llegada:.2f} s")
+            except Exception as e:
+                print(f"Error en {os.path.basename(ruta)}: {e}")
+                self._mover(ruta, self.errores)
+            finally:
+                self._pendientes.discard(ruta)
+                cola.task_done()
+
+    def _mover(self, ruta, destino):
+        """
+        Mueve el PDF a `destino` sin pisar otro del mismo nombre (agrega _1, _2, ...);
+        devuelve la nueva ruta, o None si no se pudo mover
+        """
+        os.makedirs(destino, exist_ok=True)
+        base, extension = os.path.splitext(os.path.basename(ruta))
+        nueva = os.path.join(destino, base + extension)
+        sufijo = 0
+        while os.path.exists(nueva):
+            sufijo += 1
+            nueva = os.path.join(destino, f"{base}_{sufijo}{extension}")
+        try:
+            shutil.move(ruta, nueva)
+        except OSError as e:
+            print(f"Advertencia: no se pudo mover {ruta}: {e}")
+            return None
+        return nueva
+
+    def detener(self):
+        if self._detener is not None:
+            self._detener.set()
+
+    async def ejecutar(self):
+        """
+        Corre hasta que se llame a detener(); al salir termina los archivos ya encolados
+        """
+        self._detener = asyncio.Event()
+        cola_texto = asyncio.Queue(self.max_cola_texto)
+        cola_ocr = asyncio.Queue(self.max_cola_ocr)
+        almacen = AlmacenFacturas(self.ruta_sqlite) if self.ruta_sqlite else None
+
+        with EscritorCSV() as escritor, \
+                ProcessPoolExecutor(self.trabajadores_texto, initializer=inicializar_trabajador,
+                                    initargs=((), None, self.directorio_cache)) as pool_texto, \
+                ProcessPoolExecutor(self.trabajadores_ocr, initializer=inicializar_trabajador,
+                                    initargs=(sorted(EMPRESAS_OCR), None, self.directorio_cache,
+                                              self.opciones_ocr)) as pool_ocr:
+            consumidores = (
+                [asyncio.create_task(self._consumir(cola_texto, pool_texto, escritor, almacen))
+                 for _ in range(self.trabajadores_texto)] +
+                [asyncio.create_task(self._consumir(cola_ocr, pool_ocr, escritor, almacen))
+                 for _ in range(self.trabajadores_ocr)]
+            )
+            await self._vigilar(cola_texto, cola_ocr, pool_texto)
+            await cola_texto.join()
+            await cola_ocr.join()
+            for tarea in consumidores:
+                tarea.cancel()
+            await asyncio.gather(*consumidores, return_exceptions=True)
+
+        if almacen is not None:
+            almacen.cerrar()
+
+async def _principal(servicio):
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(senal, servicio.detener)
+        except NotImplementedError:
+            # Windows no admite manejadores de señales en el loop; Ctrl+C corta el servicio
+            pass
+    await servicio.ejecutar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio que procesa las facturas PDF a medida que llegan a una carpeta")
+    parser.add_argument('entrada', help="Carpeta vigilada")
+    parser.add_argument('--trabajadores-texto', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="Procesos para PDFs con capa de texto")
+    parser.add_argument('--trabajadores-ocr', type=int, default=1, help="Procesos para PDFs escaneados (AIRE/EPM)")
+    parser.add_argument('--max-cola-texto', type=int, default=MAX_COLA_TEXTO)
+    parser.add_argument('--max-cola-ocr', type=int, default=MAX_COLA_OCR)
+    parser.add_argument('--intervalo', type=float, default=INTERVALO, help="Segundos entre revisiones de la carpeta")
+    parser.add_argument('--modo-ocr', choices=['completo', 'etiquetas'], default='completo')
+    parser.add_argument('--preprocesar', action='store_true', help="Limpia las páginas escaneadas antes del OCR")
+    parser.add_argument('--dpi-adaptativo', action='store_true',
+                        help="Reconoce primero a baja resolución y reintenta a 300 dpi solo las páginas que fallen")
+    parser.add_argument('--plantillas', action='store_true',
+                        help="Reconoce solo las regiones de los campos aprendidas en facturas anteriores")
+    parser.add_argument('--lote-ocr', type=int, default=1, metavar='N',
+                        help="Reconoce de a N páginas escaneadas por llamada al OCR")
+    parser.add_argument('--cache', metavar='DIRECTORIO', help="Directorio de la caché de extracción")
+    parser.add_argument('--sqlite', metavar='RUTA', help="Carga también los resultados en esta base SQLite")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.entrada):
+        parser.error(f"No existe la carpeta {args.entrada}")
+    opciones_ocr = {'modo_ocr': args.modo_ocr, 'preprocesar': args.preprocesar,
+                    'dpi_adaptativo': args.dpi_adaptativo, 'plantillas': args.plantillas,
+                    'lote_ocr': args.lote_ocr}
+    error = incompatibilidad_ocr(opciones_ocr)
+    if error:
+        parser.error(error)
+
+    servicio = ServicioIngesta(args.entrada, args.trabajadores_texto, args.trabajadores_ocr, opciones_ocr,
+                               args.cache, args.sqlite, args.intervalo,
+                               args.max_cola_texto, args.max_cola_ocr)
+    print(f"Vigilando {args.entrada} (Ctrl+C para detener)...")
+    asyncio.run(_principal(servicio))
+
+if __name__ == "__main__":
+    main()
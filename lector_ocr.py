@@ -0,0 +1,47 @@
+import gc
+import numpy as np
+import easyocr
+import torch
+
+# Un lector por combinación de idiomas/gpu y por proceso
+_lectores = {}
+
+def _clave(idiomas, gpu):
+    if gpu and not torch.cuda.is_available():
+        gpu = False
+    return (tuple(idiomas), gpu)
+
+def usa_gpu(gpu=False):
+    """
+    True si un lector pedido con `gpu` corre realmente en la GPU
+    """
+    return _clave((), gpu)[1]
+
+def obtener_lector(idiomas=('es',), gpu=False):
+    """
+    Devuelve el easyocr.Reader del proceso, cargando los pesos solo la primera vez
+    """
+    clave = _clave(idiomas, gpu)
+    lector = _lectores.get(clave)
+    if lector is None:
+        print("Cargando modelo OCR...")
+        lector = easyocr.Reader(list(clave[0]), gpu=clave[1])
+        _lectores[clave] = lector
+    return lector
+
+def precalentar(idiomas=('es',), gpu=False):
+    """
+    Carga el modelo y ejecuta una inferencia mínima para que la primera factura no pague la inicialización
+    """
+    lector = obtener_lector(idiomas, gpu)
+    lector.readtext(np.full((32, 128), 255, dtype=np.uint8), detail=0)
+    return lector
+
+def liberar():
+    """
+    Descarga todos los lectores del proceso y libera la memoria asociada
+    """
+    _lectores.clear()
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
@@ -0,0 +1,86 @@
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import tempfile
+from generador_facturas import generar_lote
+from procesar_lote import campos_encontrados, cargar_modulo, detectar_empresa, expandir_entradas, valores_hoja
+from tiempos import documento
+
+EMPRESAS = ('AIRE', 'EPM')
+
+def medir(empresa, pdf_path, preprocesar, modo_ocr):
+    """
+    Corre el extractor y devuelve tiempos de OCR y preprocesado (ms) y campos encontrados
+    """
+    modulo = cargar_modulo(empresa)
+    with documento(pdf_path, empresa) as registro, contextlib.redirect_stdout(io.StringIO()):
+        datos = modulo.procesar_factura(pdf_path, modo_ocr=modo_ocr, preprocesar=preprocesar)
+    etapas = registro.como_dict()['etapas_ms']
+    preprocesado = etapas.get('preprocesado', 0.0)
+    return {
+        # El preprocesado corre dentro de la etapa de OCR; se descuenta para ver solo el reconocimiento
+        'ocr_ms': etapas.get('ocr', 0.0) - preprocesado,
+        'preprocesado_ms': preprocesado,
+        'total_ms': registro.como_dict()['total_ms'],
+        'campos': campos_encontrados(datos),
+        'total_campos': len(valores_hoja(datos))
+    }
+
+def resumir(mediciones):
+    return {
+        'documentos': len(mediciones),
+        'ocr_ms': statistics.mean(m['ocr_ms'] for m in mediciones),
+        'preprocesado_ms': statistics.mean(m['preprocesado_ms'] for m in mediciones),
+        'total_ms': statistics.mean(m['total_ms'] for m in mediciones),
+        'aciertos': sum(m['campos'] for m in mediciones) / max(1, sum(m['total_campos'] for m in mediciones))
+    }
+
+def mostrar_resultados(resultados):
+    print("\n" + "="*60)
+    print("OCR CON Y SIN PREPROCESADO")
+    print("="*60)
+    for empresa, variantes in resultados.items():
+        print(empresa)
+        for nombre, r in variantes.items():
+            print(f"   {nombre:14s} OCR {r['ocr_ms']:8.1f} ms  preprocesado {r['preprocesado_ms']:6.1f} ms  "
+                  f"total {r['total_ms']:8.1f} ms  campos encontrados {r['aciertos']:.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el efecto del preprocesado OpenCV en el OCR de AIRE y EPM")
+    parser.add_argument('entradas', nargs='*',
+                        help="PDFs escaneados reales (por defecto, facturas sintéticas de AIRE y EPM)")
+    parser.add_argument('-n', '--cantidad', type=int, default=3, help="Facturas sintéticas por empresa")
+    parser.add_argument('--modo-ocr', choices=['completo', 'etiquetas'], default='completo')
+    parser.add_argument('-o', '--salida', help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="facturas_preprocesado_") as directorio:
+        if args.entradas:
+            rutas = {}
+            for ruta in expandir_entradas(args.entradas):
+                empresa = detectar_empresa(ruta)
+                if empresa in EMPRESAS:
+                    rutas.setdefault(empresa, []).append(ruta)
+        else:
+            rutas = generar_lote(directorio, EMPRESAS, args.cantidad)
+
+        resultados = {}
+        for empresa, lista in sorted(rutas.items()):
+            # Un documento de calentamiento para que la carga del modelo no cuente en la primera medición
+            medir(empresa, lista[0], False, args.modo_ocr)
+            resultados[empresa] = {
+                'sin_preprocesar': resumir([medir(empresa, r, False, args.modo_ocr) for r in lista]),
+                'preprocesado': resumir([medir(empresa, r, True, args.modo_ocr) for r in lista]),
+            }
+
+    mostrar_resultados(resultados)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nResultados guardados en: {args.salida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from ocr_etiquetas import desplazar_cajas, normalizar
+from pool_ocr import obtener_pool
+
+# Alto de la zona compartida por franjas vecinas, como fracción del alto de la página;
+# debe superar el alto de un renglón para que todo renglón quede entero en alguna franja
+SOLAPE = 0.03
+# Dos tokens con el mismo texto cuyas cajas se cubren en esta fracción son el mismo
+COBERTURA_DUPLICADO = 0.5
+
+def franjas(alto, cantidad, solape):
+    """
+    Intervalos (y0, y1) de `cantidad` franjas horizontales que cubren la página, cada una
+    extendida `solape / 2` píxeles sobre sus vecinas
+    """
+    paso = alto / cantidad
+    return [(max(0, int(i * paso - solape / 2)), min(alto, int((i + 1) * paso + solape / 2)))
+            for i in range(cantidad)]
+
+def _centro_y(caja):
+    ys = [p[1] for p in caja]
+    return (min(ys) + max(ys)) / 2
+
+def _cobertura(a, b):
+    """
+    Fracción de la caja menor cubierta por la intersección de ambas
+    """
+    ax0, ay0 = min(p[0] for p in a), min(p[1] for p in a)
+    ax1, ay1 = max(p[0] for p in a), max(p[1] for p in a)
+    bx0, by0 = min(p[0] for p in b), min(p[1] for p in b)
+    bx1, by1 = max(p[0] for p in b), max(p[1] for p in b)
+    ancho = min(ax1, bx1) - max(ax0, bx0)
+    alto = min(ay1, by1) - max(ay0, by0)
+    if ancho <= 0 or alto <= 0:
+        return 0.0
+    menor = min((ax1 - ax0) * (ay1 - ay0), (bx1 - bx0) * (by1 - by0))
+    return ancho * alto / max(1.0, menor)
+
+def _toca_borde(caja, y0, y1, primera, ultima):
+    ys = [p[1] for p in caja]
+    return (not primera and min(ys) <= y0 + 1) or (not ultima and max(ys) >= y1 - 1)
+
+def fusionar(por_franja, intervalos, paso, solape):
+    """
+    Une los resultados de las franjas (cajas ya en coordenadas de la página).
+
+    Se descartan los tokens que tocan el borde interior de su franja, porque están
+    cortados y el solape garantiza que la vecina los tiene enteros. El resto se conserva
+    solo en la franja a la que pertenece su centro, cortando en la mitad de cada solape.
+    Los duplicados que aún queden junto a un corte (mismo texto y cajas superpuestas)
+    se reducen al de mayor confianza.
+    """
+    resultado = []
+    cerca_de_corte = []
+    ultima = len(por_franja) - 1
+    for i, (resultados, (y0, y1)) in enumerate(zip(por_franja, intervalos)):
+        inicio = i * paso if i else float('-inf')
+        fin = (i + 1) * paso if i < ultima else float('inf')
+        for token in resultados:
+            caja, texto, confianza = token
+            centro = _centro_y(caja)
+            if not inicio <= centro < fin or _toca_borde(caja, y0, y1, i == 0, i == ultima):
+                continue
+            if centro - inicio < solape or fin - centro < solape:
+                repetido = next((j for j in cerca_de_corte
+                                 if normalizar(resultado[j][1]) == normalizar(texto)
+                                 and _cobertura(resultado[j][0], caja) >= COBERTURA_DUPLICADO), None)
+                if repetido is not None:
+                    if confianza > resultado[repetido][2]:
+                        resultado[repetido] = token
+                    continue
+                cerca_de_corte.append(len(resultado))
+            resultado.append(token)
+    return resultado
+
+def ocr_mosaico(img, cantidad=None, pool=None, solape=SOLAPE, gpu=False):
+    """
+    readtext(detail=1) de una página partida en `cantidad` franjas reconocidas en paralelo.
+
+    Devuelve los tokens en el orden de las franjas, con las cajas en coordenadas de la
+    página, igual que reader.readtext sobre la página entera.
+    """
+    pool = pool or obtener_pool(cantidad, gpu)
+    cantidad = cantidad or pool.trabajadores
+    alto = img.shape[0]
+    solape_px = int(alto * solape)
+    intervalos = franjas(alto, cantidad, solape_px)
+    resultados = pool.reconocer_imagenes([img[y0:y1] for y0, y1 in intervalos])
+    por_franja = [desplazar_cajas(r, 0, y0) for r, (y0, _) in zip(resultados, intervalos)]
+    return fusionar(por_franja, intervalos, alto / cantidad, solape_px)
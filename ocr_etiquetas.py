@@ -0,0 +1,81 @@
+import difflib
+import unicodedata
+
+def normalizar(texto):
+    """
+    Pasa a minúsculas y quita tildes para comparar etiquetas con texto OCR ruidoso
+    """
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+def contiene_etiqueta(texto, etiqueta, umbral=0.8):
+    texto = normalizar(texto)
+    etiqueta = normalizar(etiqueta)
+    if etiqueta in texto:
+        return True
+    inicio = texto[:len(etiqueta)]
+    return difflib.SequenceMatcher(None, inicio, etiqueta).ratio() >= umbral
+
+def unir_regiones(regiones):
+    """
+    Fusiona franjas que se solapan verticalmente para no reconocer dos veces la misma zona
+    """
+    unidas = []
+    for x0, y0, x1, y1 in sorted(regiones, key=lambda r: r[1]):
+        if unidas and y0 <= unidas[-1][3]:
+            ux0, uy0, ux1, uy1 = unidas[-1]
+            unidas[-1] = (min(ux0, x0), uy0, max(ux1, x1), max(uy1, y1))
+        else:
+            unidas.append((x0, y0, x1, y1))
+    return unidas
+
+def localizar_etiquetas(reader, img, etiquetas, escala=0.4, lineas_debajo=1, linea_completa=()):
+    """
+    Fase 1: OCR a baja resolución para ubicar las etiquetas.
+
+    Devuelve las regiones (x0, y0, x1, y1) en coordenadas de la imagen original que
+    van desde cada etiqueta hasta el borde derecho de la página, incluyendo
+    `lineas_debajo` renglones por debajo. Las etiquetas de `linea_completa` (las que
+    van después de su valor, como "kwh") toman el renglón desde el borde izquierdo.
+    """
+    import cv2
+
+    alto, ancho = img.shape[:2]
+    pequena = cv2.resize(img, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+
+    regiones = []
+    for caja, texto, _ in reader.readtext(pequena, detail=1):
+        encontradas = [etiqueta for etiqueta in etiquetas if contiene_etiqueta(texto, etiqueta)]
+        if not encontradas:
+            continue
+        xs = [p[0] / escala for p in caja]
+        ys = [p[1] / escala for p in caja]
+        alto_linea = max(ys) - min(ys)
+        y0 = max(0, int(min(ys) - alto_linea * 0.5))
+        y1 = min(alto, int(max(ys) + alto_linea * (lineas_debajo + 0.5)))
+        x0 = 0 if any(e in linea_completa for e in encontradas) else max(0, int(min(xs) - alto_linea))
+        regiones.append((x0, y0, ancho, y1))
+
+    return unir_regiones(regiones)
+
+def desplazar_cajas(resultados, x0, y0):
+    """
+    Lleva las cajas de readtext(detail=1) sobre un recorte a coordenadas de la página
+    """
+    return [([[px + x0, py + y0] for px, py in caja], texto, confianza)
+            for caja, texto, confianza in resultados]
+
+def ocr_por_etiquetas(reader, img, etiquetas, escala=0.4, lineas_debajo=1, detail=0, linea_completa=()):
+    """
+    OCR en dos fases: ubica las etiquetas a baja resolución y reconoce a resolución
+    completa solo las franjas vecinas. Devuelve la lista de textos igual que
+    reader.readtext(..., detail=0), ordenada de arriba hacia abajo; con detail=1,
+    las tuplas (caja, texto, confianza) con la caja en coordenadas de la página.
+    """
+    resultado = []
+    for x0, y0, x1, y1 in localizar_etiquetas(reader, img, etiquetas, escala, lineas_debajo, linea_completa):
+        franja = reader.readtext(img[y0:y1, x0:x1], detail=detail)
+        if detail:
+            franja = desplazar_cajas(franja, x0, y0)
+        resultado.extend(franja)
+    return resultado
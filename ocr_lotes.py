@@ -0,0 +1,74 @@
+from itertools import islice
+from tiempos import etapa
+
+# Páginas que se reconocen juntas y recortes de texto por pasada del reconocedor
+TAMANO_LOTE = 8
+
+def en_bloques(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+def reconocer_lote(reader, imagenes, tamano_lote=TAMANO_LOTE, detail=1):
+    """
+    readtext sobre varias imágenes a la vez; devuelve un resultado por imagen, en orden.
+
+    Las imágenes del mismo tamaño (páginas al mismo dpi) se detectan juntas con
+    readtext_batched, y en cada una los recortes de texto detectados se reconocen de a
+    `tamano_lote` en lugar de uno por uno.
+    """
+    resultados = [None] * len(imagenes)
+    grupos = {}
+    for i, img in enumerate(imagenes):
+        grupos.setdefault(img.shape[:2], []).append(i)
+    for indices in grupos.values():
+        if len(indices) == 1:
+            resultados[indices[0]] = reader.readtext(imagenes[indices[0]], detail=detail, batch_size=tamano_lote)
+            continue
+        lote = reader.readtext_batched([imagenes[i] for i in indices], detail=detail, batch_size=tamano_lote)
+        for i, resultado in zip(indices, lote):
+            resultados[i] = resultado
+    return resultados
+
+def paginas_escaneadas(pdf_path):
+    """
+    Números de página (desde 1) sin capa de texto útil y total de páginas del PDF
+    """
+    from texto_hibrido import LectorPaginas, tiene_capa_texto
+    with LectorPaginas(pdf_path) as lector:
+        with etapa("extraccion_texto"):
+            numeros = [numero for numero, page in enumerate(lector.pdf.pages, 1) if not tiene_capa_texto(page)]
+        return numeros, lector.total
+
+def textos_documentos(pdf_paths, tamano_lote=TAMANO_LOTE, dpi=300, gpu=False, separador="\n"):
+    """
+    OCR de las páginas escaneadas de varios PDFs, reconocidas de a `tamano_lote` páginas
+    aunque sean de facturas distintas.
+
+    Devuelve {pdf_path: [texto por página escaneada]}, en el orden de las páginas. Solo
+    hay `tamano_lote` páginas rasterizadas en memoria a la vez.
+
+    Solo lo usa benchmark_lotes_ocr.py. procesar_lote e ingesta reparten una factura por
+    proceso y los extractores necesitan las cajas de cada página, así que con `--lote-ocr`
+    agrupan solo las páginas escaneadas de una misma factura (OCRConConfianza.varias).
+    """
+    from lector_ocr import obtener_lector
+    from paginas import iterar_paginas
+    reader = obtener_lector(gpu=gpu)
+
+    def pendientes():
+        for pdf_path in pdf_paths:
+            numeros, _ = paginas_escaneadas(pdf_path)
+            for img in iterar_paginas(pdf_path, dpi=dpi, escala_grises=True, paginas=numeros):
+                yield pdf_path, img
+
+    textos = {pdf_path: [] for pdf_path in pdf_paths}
+    for bloque in en_bloques(pendientes(), tamano_lote):
+        with etapa("ocr"):
+            resultados = reconocer_lote(reader, [img for _, img in bloque], tamano_lote, detail=0)
+        for (pdf_path, _), resultado in zip(bloque, resultados):
+            textos[pdf_path].append(separador.join(resultado))
+    return textos
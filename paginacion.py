@@ -0,0 +1,104 @@
+import backends_texto
+from estado import actualizar_json, leer_json, ruta_estado
+from tiempos import etapa
+
+# Archivo (en el directorio de estado) donde se acumula, por empresa, en qué páginas se encontró cada campo
+ARCHIVO_MAPA = "mapa_paginas.json"
+
+class MapaPaginas:
+    """
+    Conteo persistente de en qué página aparece cada campo, por empresa.
+
+    Los conteos nuevos se guardan sumándolos a lo que haya en disco, de modo que varios
+    procesos trabajadores pueden compartir el mismo archivo.
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_estado(ARCHIVO_MAPA)
+        self.conteos = leer_json(self.ruta)
+        self._pendientes = {}
+
+    def orden(self, empresa, total):
+        """
+        Números de página (desde 1) empezando por las que más campos han resuelto antes
+        """
+        aciertos = {}
+        for paginas in self.conteos.get(empresa, {}).values():
+            for pagina, veces in paginas.items():
+                aciertos[int(pagina)] = aciertos.get(int(pagina), 0) + veces
+        return sorted(range(1, total + 1), key=lambda pagina: (-aciertos.get(pagina, 0), pagina))
+
+    def registrar(self, empresa, campo, pagina):
+        for conteos in (self.conteos, self._pendientes):
+            paginas = conteos.setdefault(empresa, {}).setdefault(campo, {})
+            paginas[str(pagina)] = paginas.get(str(pagina), 0) + 1
+
+    def guardar(self):
+        """
+        Suma los conteos pendientes al archivo, bajo bloqueo, y lo reemplaza de forma atómica
+        """
+        if not self._pendientes:
+            return
+
+        def fusionar(conteos):
+            for empresa, campos in self._pendientes.items():
+                for campo, paginas in campos.items():
+                    destino = conteos.setdefault(empresa, {}).setdefault(campo, {})
+                    for pagina, veces in paginas.items():
+                        destino[pagina] = destino.get(pagina, 0) + veces
+
+        self.conteos = actualizar_json(self.ruta, fusionar)
+        self._pendientes = {}
+
+# Un mapa por proceso, cargado la primera vez que se usa
+_mapa = None
+
+def obtener_mapa():
+    global _mapa
+    if _mapa is None:
+        _mapa = MapaPaginas()
+    return _mapa
+
+def leer_hasta_completar(empresa, total, leer_pagina, resueltos, requeridos, separador="\n", mapa=None,
+                         acumulado=False):
+    """
+    Lee páginas una a una, en el orden aprendido para la empresa, hasta resolver todos
+    los campos `requeridos`.
+
+    `leer_pagina(numero)` devuelve el texto de una página y `resueltos(texto)` el
+    conjunto de campos cuyo valor definitivo ya está en el texto; solo se aplica a la
+    página recién leída, así que un campo partido entre dos páginas obliga a leerlas
+    todas. Con `acumulado`, `resueltos` recibe en cambio el texto de todas las páginas
+    leídas hasta el momento, para campos que dependen de secciones que pueden abarcar
+    varias páginas. Las páginas leídas se unen en su orden original, igual que al leer el
+    documento completo. Cada campo se acredita a la página donde apareció, para que
+    las facturas siguientes la lean primero.
+    """
+    mapa = mapa or obtener_mapa()
+    textos = {}
+    encontrados = set()
+    for numero in mapa.orden(empresa, total):
+        textos[numero] = leer_pagina(numero)
+        with etapa("busqueda"):
+            texto = unir(textos, separador) if acumulado else textos[numero]
+            nuevos = resueltos(texto) - encontrados
+        for campo in nuevos:
+            mapa.registrar(empresa, campo, numero)
+        encontrados |= nuevos
+        if requeridos <= encontrados:
+            break
+    mapa.guardar()
+    return unir(textos, separador)
+
+def unir(textos, separador):
+    return "".join(textos[n] + separador for n in sorted(textos))
+
+def texto_hasta_completar(pdf_path, empresa, resueltos, requeridos, dpi=300, separador="\n",
+                          acumulado=False):
+    """
+    Igual que texto_documento, pero con el backend de la empresa y dejando de leer
+    páginas cuando ya están los campos requeridos
+    """
+    with backends_texto.abrir(pdf_path, empresa, dpi=dpi) as lector:
+        return leer_hasta_completar(empresa, lector.total, lambda numero: lector.texto(numero)[0],
+                                    resueltos, requeridos, separador, acumulado=acumulado)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import cv2
+from pdf2image import convert_from_path, pdfinfo_from_path
+from tiempos import etapa
+
+def contar_paginas(pdf_path):
+    return pdfinfo_from_path(pdf_path)["Pages"]
+
+def _leer_imagen(ruta, escala_grises):
+    """
+    Lee la página rasterizada directamente a un arreglo numpy, sin pasar por PIL
+    """
+    if escala_grises:
+        return cv2.imread(ruta, cv2.IMREAD_GRAYSCALE)
+    img = cv2.imread(ruta, cv2.IMREAD_COLOR)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+
+def iterar_paginas(pdf_path, dpi=300, escala_grises=False, ventana=1, paginas=None):
+    """
+    Rasteriza el PDF de a `ventana` páginas y entrega cada una como arreglo numpy.
+
+    Cada página se escribe en un directorio temporal, se lee con OpenCV y se borra,
+    de modo que en memoria solo vive la página que se está procesando.
+    """
+    if paginas is None:
+        paginas = range(1, contar_paginas(pdf_path) + 1)
+    paginas = list(paginas)
+
+    with tempfile.TemporaryDirectory(prefix="paginas_") as carpeta:
+        for i in range(0, len(paginas), ventana):
+            bloque = paginas[i:i + ventana]
+            rutas = []
+            for numero in _rangos_contiguos(bloque):
+                with etapa("rasterizacion"):
+                    rutas.extend(convert_from_path(
+                        pdf_path,
+                        dpi=dpi,
+                        first_page=numero[0],
+                        last_page=numero[1],
+                        grayscale=escala_grises,
+                        fmt="ppm",
+                        output_folder=carpeta,
+                        paths_only=True
+                    ))
+            for ruta in rutas:
+                with etapa("rasterizacion"):
+                    img = _leer_imagen(ruta, escala_grises)
+                os.remove(ruta)
+                yield img
+
+def _rangos_contiguos(numeros):
+    """
+    Agrupa números de página ordenados en rangos (primera, ultima) para pdftoppm
+    """
+    rangos = []
+    for n in numeros:
+        if rangos and n == rangos[-1][1] + 1:
+            rangos[-1] = (rangos[-1][0], n)
+        else:
+            rangos.append((n, n))
+    return rangos
@@ -0,0 +1,239 @@
+import re
+import time
+from functools import lru_cache
+
+# Estadísticas por patrón en este proceso: (campo, patrón) -> [aciertos, fallos, segundos]
+ESTADISTICAS = {}
+
+LONGITUD_MINIMA_ETIQUETA = 3
+
+def registrar(campo, patron, acierto, segundos):
+    estadistica = ESTADISTICAS.setdefault((campo, patron), [0, 0, 0.0])
+    estadistica[0 if acierto else 1] += 1
+    estadistica[2] += segundos
+
+def reporte_estadisticas(limite=None):
+    """
+    Patrones ordenados por tiempo total acumulado, para ubicar los más costosos
+    """
+    filas = [
+        {'campo': campo, 'patron': patron, 'aciertos': a, 'fallos': f, 'segundos': s}
+        for (campo, patron), (a, f, s) in ESTADISTICAS.items()
+    ]
+    filas.sort(key=lambda fila: fila['segundos'], reverse=True)
+    return filas[:limite] if limite else filas
+
+def reiniciar_estadisticas():
+    ESTADISTICAS.clear()
+
+@lru_cache(maxsize=1024)
+def compilar(patron, flags=0):
+    return re.compile(patron, flags)
+
+def buscar(patron, texto, flags=0, campo=None, pos=0):
+    """
+    re.search con el patrón compilado una sola vez y contadores de aciertos/tiempo
+    """
+    inicio = time.perf_counter()
+    m = compilar(patron, flags).search(texto, pos)
+    registrar(campo or patron, patron, m is not None, time.perf_counter() - inicio)
+    return m
+
+def _alternancia_principal(patron):
+    """
+    True si el patrón tiene un `|` fuera de grupos y clases, es decir, alternativas completas
+    """
+    profundidad = 0
+    en_clase = False
+    i = 0
+    while i < len(patron):
+        c = patron[i]
+        if c == '\\':
+            i += 1
+        elif en_clase:
+            en_clase = c != ']'
+        elif c == '[':
+            en_clase = True
+            # Un ']' justo al inicio de la clase es literal
+            if patron[i + 1:i + 2] == '^':
+                i += 1
+            if patron[i + 1:i + 2] == ']':
+                i += 1
+        elif c == '(':
+            profundidad += 1
+        elif c == ')':
+            profundidad -= 1
+        elif c == '|' and profundidad == 0:
+            return True
+        i += 1
+    return False
+
+def etiqueta_literal(patron):
+    """
+    Prefijo literal del patrón (por ejemplo "TOTAL A PAGAR" en r"TOTAL A PAGAR\\s*\\$"),
+    usado para descartar en una sola pasada los patrones cuya etiqueta no aparece.
+    Un patrón con alternativas completas (`A|B`) no tiene un prefijo obligatorio.
+    """
+    if _alternancia_principal(patron):
+        return None
+    literal = []
+    i = 0
+    while i < len(patron):
+        c = patron[i]
+        if c == '\\':
+            if i + 1 < len(patron) and not patron[i + 1].isalnum():
+                literal.append(patron[i + 1])
+                i += 2
+            else:
+                break
+        elif c in '.^$*+?{}[]()|':
+            break
+        else:
+            literal.append(c)
+            i += 1
+        if i < len(patron) and patron[i] in '*+?{':
+            literal.pop()
+            break
+    etiqueta = "".join(literal)
+    return etiqueta if len(etiqueta.strip()) >= LONGITUD_MINIMA_ETIQUETA else None
+
+class Patron:
+    """
+    Un patrón de búsqueda de un campo.
+
+    `normalizador` recibe el match (o la lista de findall si `todas`) y devuelve el
+    valor; por defecto se toma el grupo 1, o `por_defecto` si el patrón no tiene grupos.
+    """
+
+    def __init__(self, patron, normalizador=None, flags=None, todas=False, por_defecto=None):
+        self.patron = patron
+        self.normalizador = normalizador
+        self.flags = flags
+        self.todas = todas
+        self.por_defecto = por_defecto
+        self.etiqueta = etiqueta_literal(patron)
+        self.regex = None
+
+    def valor(self, resultado):
+        if self.normalizador:
+            return self.normalizador(resultado)
+        if self.todas:
+            return resultado
+        return resultado.group(1) if resultado.groups() else self.por_defecto
+
+class Campo:
+    """
+    Campo de una factura: nombre y lista ordenada de patrones alternativos
+    """
+
+    def __init__(self, nombre, patrones, flags=0):
+        self.nombre = nombre
+        self.patrones = [p if isinstance(p, Patron) else Patron(p) for p in patrones]
+        for p in self.patrones:
+            if p.flags is None:
+                p.flags = flags
+            p.regex = compilar(p.patron, p.flags)
+
+def _grupos_sin_prefijos(etiquetas):
+    """
+    Reparte las etiquetas en grupos donde ninguna es prefijo de otra, para que la
+    alternancia del prefiltro no oculte la primera aparición de ninguna
+    """
+    grupos = []
+    for etiqueta in sorted(etiquetas, key=len, reverse=True):
+        clave = etiqueta.lower()
+        for grupo in grupos:
+            if not any(o.lower().startswith(clave) or clave.startswith(o.lower()) for o in grupo):
+                grupo.append(etiqueta)
+                break
+        else:
+            grupos.append([etiqueta])
+    return grupos
+
+class EspecificacionCampos:
+    """
+    Campos de una empresa compilados una sola vez al importar el módulo.
+
+    `escanear` recorre el texto una vez por grupo de etiquetas (normalmente una sola)
+    para ubicar la primera aparición de cada etiqueta; los patrones cuya etiqueta no
+    aparece se descartan sin buscar, y los demás buscan a partir de esa posición.
+    Los patrones idénticos de distintos campos se evalúan una sola vez.
+    """
+
+    def __init__(self, nombre, campos):
+        self.nombre = nombre
+        self.campos = campos
+        etiquetas = {p.etiqueta for c in campos for p in c.patrones if p.etiqueta}
+        self.prefiltros = []
+        for grupo in _grupos_sin_prefijos(etiquetas):
+            alternativas = "|".join(f"(?P<e{i}>{re.escape(e)})" for i, e in enumerate(grupo))
+            self.prefiltros.append((re.compile(f"(?=(?:{alternativas}))", re.IGNORECASE), grupo))
+
+    def ubicar_etiquetas(self, texto):
+        inicio = time.perf_counter()
+        posiciones = {}
+        for prefiltro, grupo in self.prefiltros:
+            faltantes = len(grupo)
+            for m in prefiltro.finditer(texto):
+                etiqueta = grupo[int(m.lastgroup[1:])]
+                if etiqueta not in posiciones:
+                    posiciones[etiqueta] = m.start()
+                    faltantes -= 1
+                    if not faltantes:
+                        break
+        registrar(self.nombre, '<prefiltro de etiquetas>', True, time.perf_counter() - inicio)
+        return posiciones
+
+    def escanear(self, texto):
+        """
+        Devuelve {campo: valor} usando, para cada campo, el primer patrón que encuentre algo
+        """
+        posiciones = self.ubicar_etiquetas(texto)
+        memo = {}
+        datos = {}
+        for campo in self.campos:
+            datos[campo.nombre] = None
+            for p in campo.patrones:
+                resultado = self._evaluar(p, texto, posiciones, memo, campo.nombre)
+                if resultado:
+                    datos[campo.nombre] = p.valor(resultado)
+                    break
+        return datos
+
+    def resueltos(self, texto):
+        """
+        Nombres de los campos cuyo valor ya no cambia al agregar más texto: los que
+        encuentra su primer patrón. Un valor de un patrón alternativo o de uno que
+        combina todas las apariciones (`todas`) puede cambiar con el resto del documento.
+        """
+        posiciones = self.ubicar_etiquetas(texto)
+        memo = {}
+        nombres = set()
+        for campo in self.campos:
+            p = campo.patrones[0]
+            if p.todas:
+                continue
+            resultado = self._evaluar(p, texto, posiciones, memo, campo.nombre)
+            if resultado and p.valor(resultado) is not None:
+                nombres.add(campo.nombre)
+        return nombres
+
+    def nombres(self):
+        return {campo.nombre for campo in self.campos}
+
+    def _evaluar(self, p, texto, posiciones, memo, nombre_campo):
+        clave = (p.patron, p.flags, p.todas)
+        if clave in memo:
+            return memo[clave]
+
+        inicio = time.perf_counter()
+        if p.etiqueta and p.etiqueta not in posiciones:
+            resultado = None
+        elif p.todas:
+            resultado = p.regex.findall(texto, posiciones.get(p.etiqueta, 0))
+        else:
+            resultado = p.regex.search(texto, posiciones.get(p.etiqueta, 0))
+        registrar(nombre_campo, p.patron, bool(resultado), time.perf_counter() - inicio)
+
+        memo[clave] = resultado
+        return resultado
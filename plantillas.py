@@ -0,0 +1,180 @@
+import backends_texto
+from estado import actualizar_json, leer_json, ruta_estado
+from ocr_etiquetas import desplazar_cajas, unir_regiones
+from resultado_ocr import ResultadoOCR
+from tiempos import etapa
+
+# Archivo (en el directorio de estado) donde se guardan las plantillas aprendidas, por empresa y diseño de factura
+ARCHIVO_PLANTILLAS = "plantillas_ocr.json"
+
+# Renglones bajo la etiqueta que se incluyen en la región de cada campo
+LINEAS_DEBAJO = 1
+# Margen vertical extra (fracción del alto de página) para tolerar corrimientos del escaneo
+HOLGURA = 0.01
+
+def firma_pdf(pdf_path):
+    """
+    Versión del diseño de la factura: cantidad de páginas y tamaño de página según pdfinfo
+    """
+    # Importación diferida: pdf2image solo hace falta si se usan plantillas
+    from pdf2image import pdfinfo_from_path
+    with etapa("apertura_pdf"):
+        info = pdfinfo_from_path(pdf_path)
+    return f"{info['Pages']}p {info.get('Page size', '')}".strip()
+
+class AlmacenPlantillas:
+    """
+    Plantillas persistentes: por empresa y firma de diseño, la página y las regiones
+    (en fracciones del ancho y alto de la página) donde se encontró cada campo.
+
+    Al guardar, las plantillas cambiadas reemplazan a las del archivo y el resto se
+    conserva, de modo que varios procesos trabajadores pueden compartirlo.
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_estado(ARCHIVO_PLANTILLAS)
+        self.plantillas = leer_json(self.ruta)
+        self._pendientes = {}
+
+    def obtener(self, empresa, firma):
+        return self.plantillas.get(empresa, {}).get(firma)
+
+    def fijar(self, empresa, firma, campos, requeridos=(), paginas_texto=()):
+        """
+        Reemplaza la plantilla; con `campos` vacío la descarta.
+
+        `requeridos` son todos los campos que encontró la corrida completa y
+        `paginas_texto` las páginas que se leyeron de la capa de texto.
+        """
+        plantilla = {'campos': campos, 'requeridos': sorted(requeridos),
+                     'paginas_texto': list(paginas_texto)} if campos else None
+        for plantillas in (self.plantillas, self._pendientes):
+            plantillas.setdefault(empresa, {})[firma] = plantilla
+        if plantilla is None:
+            del self.plantillas[empresa][firma]
+
+    def guardar(self):
+        """
+        Escribe las plantillas pendientes sobre el archivo, bajo bloqueo, y lo reemplaza de forma atómica
+        """
+        if not self._pendientes:
+            return
+
+        def fusionar(plantillas):
+            for empresa, firmas in self._pendientes.items():
+                destino = plantillas.setdefault(empresa, {})
+                for firma, plantilla in firmas.items():
+                    if plantilla is None:
+                        destino.pop(firma, None)
+                    else:
+                        destino[firma] = plantilla
+
+        self.plantillas = actualizar_json(self.ruta, fusionar)
+        self._pendientes = {}
+
+# Un almacén por proceso, cargado la primera vez que se usa
+_almacen = None
+
+def obtener_almacen():
+    global _almacen
+    if _almacen is None:
+        _almacen = AlmacenPlantillas()
+    return _almacen
+
+def regiones_etiqueta(pagina, etiqueta, lineas_debajo=LINEAS_DEBAJO, holgura=HOLGURA, linea_completa=False):
+    """
+    Regiones, en fracciones de la página, desde cada aparición de la etiqueta (o desde el
+    borde izquierdo, con `linea_completa`) hasta el borde derecho y `lineas_debajo`
+    renglones más abajo, como las de localizar_etiquetas
+    """
+    ancho, alto = pagina.tamano
+    regiones = []
+    for token in pagina.buscar_etiquetas(etiqueta):
+        x0 = 0.0 if linea_completa else max(0.0, token.x0 - token.alto) / ancho
+        y0 = max(0.0, (token.y0 - token.alto * 0.5) / alto - holgura)
+        y1 = min(1.0, (token.y1 + token.alto * (lineas_debajo + 0.5)) / alto + holgura)
+        regiones.append([round(x0, 4), round(y0, 4), 1.0, round(y1, 4)])
+    return regiones
+
+def ocr_regiones(pdf_path, plantilla, reconocer, separador="\n", dpi=300):
+    """
+    Rasteriza solo las páginas de la plantilla y reconoce solo sus regiones.
+
+    `reconocer(img)` devuelve resultados de readtext(detail=1). Devuelve la lista
+    (texto, origen) de las páginas reconocidas y su ResultadoOCR, en el orden de las páginas.
+    """
+    from paginas import iterar_paginas
+
+    por_pagina = {}
+    for ubicacion in plantilla['campos'].values():
+        por_pagina.setdefault(ubicacion['pagina'], []).extend(ubicacion['regiones'])
+    numeros = sorted(por_pagina)
+
+    textos = []
+    paginas_ocr = []
+    for numero, img in zip(numeros, iterar_paginas(pdf_path, dpi=dpi, escala_grises=True, paginas=numeros)):
+        alto, ancho = img.shape[:2]
+        cajas = unir_regiones([(int(x0 * ancho), int(y0 * alto), int(x1 * ancho), int(y1 * alto))
+                               for x0, y0, x1, y1 in por_pagina[numero]])
+        resultados = []
+        with etapa("ocr"):
+            for x0, y0, x1, y1 in cajas:
+                resultados.extend(desplazar_cajas(reconocer(img[y0:y1, x0:x1]), x0, y0))
+        textos.append((separador.join(texto for _, texto, _ in resultados), "ocr"))
+        paginas_ocr.append(ResultadoOCR.desde_readtext(resultados, (ancho, alto)))
+    return textos, paginas_ocr
+
+def extraer_con_plantilla(pdf_path, empresa, reconocer, extraer, encontrados, separador="\n", dpi=300,
+                          almacen=None):
+    """
+    Camino rápido: reconoce solo las regiones de la plantilla de la empresa y lee la
+    capa de texto de las páginas que la tenían en la corrida completa.
+
+    `extraer(textos, paginas_ocr)` aplica las búsquedas de campos y `encontrados(datos)`
+    devuelve los campos con valor. Devuelve None si no hay plantilla para el diseño del
+    PDF o si falta algún campo que encontró la corrida completa; en ese caso se debe
+    hacer el OCR completo y volver a aprender la plantilla con aprender_plantilla.
+    """
+    almacen = almacen or obtener_almacen()
+    plantilla = almacen.obtener(empresa, firma_pdf(pdf_path))
+    if plantilla is None:
+        return None
+    textos, paginas_ocr = ocr_regiones(pdf_path, plantilla, reconocer, separador, dpi)
+    paginas_texto = plantilla.get('paginas_texto', [])
+    if paginas_texto:
+        por_numero = dict(zip(sorted({u['pagina'] for u in plantilla['campos'].values()}), textos))
+        with backends_texto.abrir(pdf_path, empresa, dpi=dpi) as lector:
+            for numero in paginas_texto:
+                por_numero[numero] = lector.texto(numero)
+        textos = [por_numero[numero] for numero in sorted(por_numero)]
+    datos = extraer(textos, paginas_ocr)
+    if set(plantilla.get('requeridos') or plantilla['campos']) <= set(encontrados(datos)):
+        return datos
+    return None
+
+def aprender_plantilla(pdf_path, empresa, paginas, paginas_ocr, etiqueta_por_campo, encontrados, almacen=None,
+                       linea_completa=()):
+    """
+    Registra, tras un OCR completo, la página y regiones de cada campo encontrado.
+
+    `paginas` es la lista (texto, origen) del documento y `paginas_ocr` el ResultadoOCR de
+    sus páginas escaneadas, en orden. Cada campo se ubica por la etiqueta que le
+    corresponde en `etiqueta_por_campo`, en la primera página escaneada donde aparezca;
+    las etiquetas de `linea_completa` toman su renglón desde el borde izquierdo.
+    """
+    almacen = almacen or obtener_almacen()
+    numeros = [numero for numero, (_, origen) in enumerate(paginas, 1) if origen == "ocr"]
+    paginas_texto = [numero for numero, (_, origen) in enumerate(paginas, 1) if origen == "texto"]
+    campos = {}
+    for campo in encontrados:
+        etiqueta = etiqueta_por_campo.get(campo)
+        if etiqueta is None:
+            continue
+        for numero, pagina in zip(numeros, paginas_ocr):
+            regiones = (regiones_etiqueta(pagina, etiqueta, linea_completa=etiqueta in linea_completa)
+                        if pagina.tamano else [])
+            if regiones:
+                campos[campo] = {'pagina': numero, 'regiones': regiones}
+                break
+    almacen.fijar(empresa, firma_pdf(pdf_path), campos, encontrados, paginas_texto)
+    almacen.guardar()
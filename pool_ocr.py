@@ -0,0 +1,111 @@
+import atexit
+import multiprocessing
+import os
+
+# Un pool por proceso y configuración, creado la primera vez que se usa
+_pools = {}
+
+def _inicializar(hilos):
+    import torch
+    # Sin esto cada trabajador usa todos los núcleos y compiten entre sí
+    torch.set_num_threads(hilos)
+
+def _a_listas(resultados):
+    """
+    Resultados de readtext(detail=1) con tipos de Python, para devolverlos al proceso principal
+    """
+    return [([[int(x), int(y)] for x, y in caja], texto, float(confianza))
+            for caja, texto, confianza in resultados]
+
+def _reconocer_pagina(pdf_path, numero, dpi, gpu, preprocesar, etiquetas, linea_completa=()):
+    """
+    Rasteriza y reconoce una página en el trabajador; devuelve (resultados, (ancho, alto))
+    """
+    from lector_ocr import obtener_lector
+    from paginas import iterar_paginas
+    # Con fork, el lector ya viene cargado del proceso principal y no se vuelve a leer de disco
+    reader = obtener_lector(gpu=gpu)
+    for img in iterar_paginas(pdf_path, dpi=dpi, escala_grises=True, paginas=[numero]):
+        tamano = (img.shape[1], img.shape[0])
+        if preprocesar:
+            from preprocesado import preprocesar as preparar
+            img = preparar(img)
+        if etiquetas:
+            from ocr_etiquetas import ocr_por_etiquetas
+            return _a_listas(ocr_por_etiquetas(reader, img, etiquetas, detail=1,
+                                               linea_completa=linea_completa)), tamano
+        return _a_listas(reader.readtext(img, detail=1)), tamano
+    return [], None
+
+def _reconocer_imagen(img, gpu):
+    from lector_ocr import obtener_lector
+    return _a_listas(obtener_lector(gpu=gpu).readtext(img, detail=1))
+
+class PoolOCR:
+    """
+    Procesos que reconocen páginas en paralelo compartiendo un solo modelo easyocr.
+
+    El modelo se carga una vez en el proceso principal y los trabajadores se crean con
+    fork, así que comparten sus pesos copy-on-write en lugar de cargar cada uno su copia.
+    Cada trabajador rasteriza y reconoce sus páginas (o recibe franjas ya recortadas);
+    los resultados vuelven en el orden pedido. Sin fork (Windows) o con GPU, las páginas
+    se reconocen en este proceso.
+
+    El pool debe crearse antes de correr inferencias en el proceso principal: los hilos
+    de torch no sobreviven al fork.
+    """
+
+    def __init__(self, trabajadores=None, gpu=False):
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.gpu = gpu
+        self._pool = None
+
+    def iniciar(self):
+        import lector_ocr
+        lector_ocr.obtener_lector(gpu=self.gpu)
+        if (self.trabajadores > 1 and not lector_ocr.usa_gpu(self.gpu)
+                and 'fork' in multiprocessing.get_all_start_methods()):
+            hilos = max(1, (os.cpu_count() or 1) // self.trabajadores)
+            self._pool = multiprocessing.get_context('fork').Pool(
+                self.trabajadores, initializer=_inicializar, initargs=(hilos,))
+        return self
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def reconocer_pdf(self, pdf_path, numeros, dpi=300, preprocesar=False, etiquetas=None, linea_completa=()):
+        """
+        Lista (resultados de readtext(detail=1), (ancho, alto)) de las páginas `numeros`, en ese orden
+        """
+        tareas = [(pdf_path, numero, dpi, self.gpu, preprocesar, etiquetas, linea_completa) for numero in numeros]
+        if self._pool is None:
+            return [_reconocer_pagina(*tarea) for tarea in tareas]
+        # chunksize=1: cada página va al primer trabajador libre, así la más lenta marca el total
+        return self._pool.starmap(_reconocer_pagina, tareas, chunksize=1)
+
+    def reconocer_imagenes(self, imagenes):
+        """
+        Resultados de readtext(detail=1) de cada imagen (p. ej. franjas de una página), en orden
+        """
+        if self._pool is None:
+            return [_reconocer_imagen(img, self.gpu) for img in imagenes]
+        return self._pool.starmap(_reconocer_imagen, [(img, self.gpu) for img in imagenes], chunksize=1)
+
+def obtener_pool(trabajadores=None, gpu=False):
+    import lector_ocr
+    # Con la GPU pedida pero no disponible, el pool es el mismo que el de CPU
+    clave = (trabajadores, lector_ocr.usa_gpu(gpu))
+    pool = _pools.get(clave)
+    if pool is None:
+        pool = _pools[clave] = PoolOCR(trabajadores, gpu).iniciar()
+        atexit.register(pool.cerrar)
+    return pool
@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+from tiempos import etapa
+
+# Pasos disponibles, en el orden en que se aplican
+PASOS = ('grises', 'enderezar', 'binarizar', 'recortar', 'quitar_graficos')
+
+# Inclinaciones menores se ignoran y mayores se consideran mal detectadas (grados)
+ANGULO_MINIMO = 0.3
+ANGULO_MAXIMO = 15.0
+# Margen que se deja alrededor de la tinta al recortar (píxeles)
+MARGEN = 20
+# Un componente más alto que esta fracción de la página y con tanta tinta se trata como gráfico
+ALTO_GRAFICO = 0.06
+DENSIDAD_GRAFICO = 0.35
+
+def a_grises(img):
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    return img
+
+def _tinta(gris):
+    """
+    Máscara binaria (255 = tinta) con umbral de Otsu
+    """
+    _, mascara = cv2.threshold(gris, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    return mascara
+
+def angulo_inclinacion(gris):
+    """
+    Ángulo (grados) del rectángulo mínimo que contiene la tinta; 0 si no se puede estimar
+    """
+    puntos = cv2.findNonZero(_tinta(gris))
+    if puntos is None:
+        return 0.0
+    angulo = cv2.minAreaRect(puntos)[-1]
+    # minAreaRect devuelve ángulos en [0, 90) o [-90, 0) según la versión de OpenCV
+    if angulo > 45:
+        angulo -= 90
+    elif angulo < -45:
+        angulo += 90
+    return angulo
+
+def enderezar(gris):
+    angulo = angulo_inclinacion(gris)
+    if abs(angulo) < ANGULO_MINIMO or abs(angulo) > ANGULO_MAXIMO:
+        return gris
+    alto, ancho = gris.shape[:2]
+    matriz = cv2.getRotationMatrix2D((ancho / 2, alto / 2), angulo, 1.0)
+    return cv2.warpAffine(gris, matriz, (ancho, alto), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+
+def binarizar(gris):
+    """
+    Texto negro sobre fondo blanco; el suavizado previo evita que el ruido del escaneo quede como tinta
+    """
+    suave = cv2.GaussianBlur(gris, (3, 3), 0)
+    _, binaria = cv2.threshold(suave, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return binaria
+
+def recortar_margenes(img, margen=MARGEN):
+    puntos = cv2.findNonZero(_tinta(img))
+    if puntos is None:
+        return img
+    x, y, ancho, alto = cv2.boundingRect(puntos)
+    y0, x0 = max(0, y - margen), max(0, x - margen)
+    return img[y0:y + alto + margen, x0:x + ancho + margen]
+
+def quitar_graficos(img, alto_grafico=ALTO_GRAFICO, densidad=DENSIDAD_GRAFICO):
+    """
+    Blanquea logos, fotos, sellos y códigos de barras: componentes altos y con mucha tinta.
+
+    Las líneas de tablas también forman componentes grandes, pero con poca tinta
+    respecto a su caja, así que se conservan.
+    """
+    tinta = _tinta(img)
+    n, _, estadisticas, _ = cv2.connectedComponentsWithStats(tinta, connectivity=8)
+    limite = img.shape[0] * alto_grafico
+    salida = img
+    for i in range(1, n):
+        x, y, ancho, alto, area = estadisticas[i]
+        if alto > limite and area / float(ancho * alto) > densidad:
+            if salida is img:
+                salida = img.copy()
+            salida[y:y + alto, x:x + ancho] = 255
+    return salida
+
+_FUNCIONES = {
+    'grises': a_grises,
+    'enderezar': enderezar,
+    'binarizar': binarizar,
+    'recortar': recortar_margenes,
+    'quitar_graficos': quitar_graficos,
+}
+
+def preprocesar(img, pasos=PASOS):
+    """
+    Aplica a la página los pasos indicados, en el orden de PASOS, antes del OCR
+    """
+    with etapa("preprocesado"):
+        img = np.ascontiguousarray(a_grises(img))
+        for paso in PASOS:
+            if paso in pasos and paso != 'grises':
+                img = _FUNCIONES[paso](img)
+    return img
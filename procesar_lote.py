@@ -0,0 +1,455 @@
+import argparse
+import glob
+import hashlib
+import importlib
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from cache_extraccion import CacheExtraccion, hash_archivo
+from escritor_csv import EscritorCSV
+from almacen_sqlite import AlmacenFacturas
+from clasificador import DESCONOCIDO, clasificar
+import backends_texto
+from tiempos import EscritorTiempos, documento, etapa
+import patrones
+
+MODULOS = {
+    'AAA': 'Script_AAA',
+    'AIRE': 'Script_AIRE',
+    'BIA': 'Script_BIA',
+    'CELSIA': 'Script_CELSIA',
+    'ENEL': 'Script_ENEL',
+    'EPM': 'Script_EPM',
+    'GASCARIBE': 'Script_GASCARIBE'
+}
+
+# Empresas cuyas facturas escaneadas requieren el modelo OCR
+EMPRESAS_OCR = {'AIRE', 'EPM'}
+
+# Opciones OCR que pueden cambiar los datos extraídos, con su valor por defecto; las
+# demás (lote, trabajadores de página, mosaico) solo cambian la velocidad
+OPCIONES_RESULTADO = {'modo_ocr': 'completo', 'preprocesar': False, 'dpi_adaptativo': False, 'plantillas': False}
+
+# Cachés de extracción del proceso, por directorio
+_caches = {}
+
+def cargar_modulo(empresa):
+    return importlib.import_module(MODULOS[empresa])
+
+def detectar_empresa(pdf_path):
+    """
+    Determina la empresa a partir del nombre del archivo (AAA_..., ENEL_..., etc.)
+    """
+    nombre = os.path.basename(pdf_path).upper()
+    for empresa in sorted(MODULOS, key=len, reverse=True):
+        if empresa in nombre:
+            return empresa
+    return None
+
+def expandir_entradas(entradas):
+    """
+    Convierte directorios, patrones glob y rutas sueltas en una lista de PDFs sin repetidos
+    """
+    archivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            archivos.extend(glob.glob(os.path.join(entrada, '**', '*.pdf'), recursive=True))
+            archivos.extend(glob.glob(os.path.join(entrada, '**', '*.PDF'), recursive=True))
+        elif glob.has_magic(entrada):
+            archivos.extend(glob.glob(entrada, recursive=True))
+        elif os.path.isfile(entrada):
+            archivos.append(entrada)
+        else:
+            print(f"Advertencia: no se encontró {entrada}")
+
+    vistos = set()
+    resultado = []
+    for archivo in sorted(archivos):
+        ruta = os.path.abspath(archivo)
+        if ruta not in vistos:
+            vistos.add(ruta)
+            resultado.append(ruta)
+    return resultado
+
+def incompatibilidad_ocr(opciones_ocr):
+    """
+    Mensaje de error si la combinación de opciones OCR no se puede usar, o None
+    """
+    if opciones_ocr.get('dpi_adaptativo') and opciones_ocr.get('modo_ocr') == 'etiquetas':
+        # El primer pase a baja resolución, reducido otra vez para ubicar las etiquetas,
+        # queda muy por debajo de lo que el OCR necesita para leerlas
+        return "--dpi-adaptativo no se puede combinar con --modo-ocr etiquetas"
+    return None
+
+def obtener_cache(directorio):
+    cache = _caches.get(directorio)
+    if cache is None:
+        cache = _caches[directorio] = CacheExtraccion(directorio)
+    return cache
+
+def opciones_resultado(empresa, opciones_ocr):
+    """
+    Backend de texto efectivo de la empresa (puede cambiarse con --backend) y opciones OCR
+    aplicadas a ella que difieren del valor por defecto; todas cambian el resultado
+    """
+    opciones = {'backend': backends_texto.backend_de(empresa)}
+    if empresa in EMPRESAS_OCR and opciones_ocr:
+        opciones.update({nombre: opciones_ocr[nombre] for nombre, defecto in OPCIONES_RESULTADO.items()
+                         if opciones_ocr.get(nombre, defecto) != defecto})
+    return opciones
+
+def inicializar_trabajador(empresas_ocr=(), backends=None, directorio_cache=None, opciones_ocr=None):
+    """
+    Aplica los backends de texto elegidos, abre la caché y precalienta una sola vez por
+    proceso trabajador el lector OCR que usa cada una de `empresas_ocr`. Con pool de
+    páginas o mosaico, en lugar de precalentar crea los pools, que cargan el modelo
+    antes del fork
+    """
+    if backends:
+        backends_texto.configurar(backends)
+    if directorio_cache:
+        obtener_cache(directorio_cache)
+    if empresas_ocr and trabajadores_pool(opciones_ocr):
+        crear_pools_ocr(empresas_ocr, opciones_ocr)
+    elif empresas_ocr:
+        import lector_ocr
+        # Sin GPU disponible, el lector pedido con gpu=True es el mismo de CPU
+        for gpu in {lector_ocr.usa_gpu(cargar_modulo(empresa).GPU_OCR) for empresa in empresas_ocr}:
+            lector_ocr.precalentar(gpu=gpu)
+
+def trabajadores_pool(opciones_ocr):
+    """
+    Tamaños de los pools de OCR (páginas y mosaico) que piden las opciones
+    """
+    opciones = opciones_ocr or {}
+    return [n for n in (opciones.get('trabajadores_pagina'), opciones.get('mosaico')) if n and n > 1]
+
+def crear_pools_ocr(empresas, opciones_ocr):
+    """
+    Crea los pools de páginas y de mosaico que usarán las `empresas` con estas opciones.
+    Debe ir antes de cualquier inferencia en el proceso (como el OCR de la miniatura al
+    clasificar): el modelo se carga al crear el pool y los hilos de torch no sobreviven
+    al fork
+    """
+    tamanos = trabajadores_pool(opciones_ocr)
+    if not tamanos:
+        return
+    from pool_ocr import obtener_pool
+    for trabajadores in tamanos:
+        for empresa in empresas:
+            obtener_pool(trabajadores, gpu=cargar_modulo(empresa).GPU_OCR)
+
+def ruta_perfil(directorio_perfiles, pdf_path):
+    """
+    Ruta del perfil del PDF; lleva un resumen de la ruta completa para que dos PDFs del
+    mismo nombre en distintas carpetas no compartan (ni se borren) el perfil
+    """
+    nombre = os.path.splitext(os.path.basename(pdf_path))[0]
+    resumen = hashlib.sha1(os.path.abspath(pdf_path).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(directorio_perfiles, f"{nombre}-{resumen}.prof")
+
+def procesar_archivo(empresa, pdf_path, opciones_ocr=None, directorio_cache=None, medir_patrones=False,
+                     directorio_perfiles=None):
+    """
+    Ejecuta el extractor de la empresa en el proceso trabajador, consultando antes la caché.
+
+    Si `empresa` es None, la identifica antes con el clasificador de contenido. Registra
+    el tiempo de cada etapa del documento; con `directorio_perfiles` también guarda un
+    perfil cProfile del documento en ese directorio.
+    """
+    if medir_patrones:
+        patrones.reiniciar_estadisticas()
+    inicio = time.perf_counter()
+    en_cache = False
+    hash_pdf = None
+    perfil = ruta_perfil(directorio_perfiles, pdf_path) if directorio_perfiles else None
+    confianza = None
+    with documento(os.path.basename(pdf_path), empresa, perfil) as registro:
+        try:
+            if empresa is None:
+                with etapa("clasificacion"):
+                    # El OCR de la miniatura solo corre una vez creados los pools de páginas
+                    clasificacion = clasificar(pdf_path, usar_ocr=False)
+                    if clasificacion['empresa'] == DESCONOCIDO and clasificacion['origen'] != 'texto':
+                        crear_pools_ocr(sorted(EMPRESAS_OCR), opciones_ocr)
+                        clasificacion = clasificar(pdf_path)
+                empresa = registro.empresa = clasificacion['empresa']
+                confianza = clasificacion['confianza']
+                if empresa == DESCONOCIDO:
+                    raise ValueError("No se pudo identificar la empresa de la factura")
+            modulo = cargar_modulo(empresa)
+            with etapa("cache"):
+                hash_pdf = hash_archivo(pdf_path)
+                cache = clave = None
+                if directorio_cache:
+                    cache = obtener_cache(directorio_cache)
+                    # Cada script sube su VERSION_EXTRACTOR al cambiar la extracción, lo que
+                    # invalida sus entradas anteriores
+                    clave = cache.clave(hash_pdf, empresa, modulo.VERSION_EXTRACTOR,
+                                        opciones_resultado(empresa, opciones_ocr))
+                    entrada = cache.obtener(clave)
+                    en_cache = entrada is not None
+
+            if en_cache:
+                datos = entrada['datos']
+            elif empresa in EMPRESAS_OCR and opciones_ocr:
+                datos = modulo.procesar_factura(pdf_path, **opciones_ocr)
+            else:
+                datos = modulo.procesar_factura(pdf_path)
+
+            if cache and not en_cache and datos is not None:
+                with etapa("cache"):
+                    cache.guardar(clave, datos)
+            error = None if datos is not None else "El extractor no devolvió datos"
+        except Exception as e:
+            datos = None
+            error = str(e)
+    return {
+        'empresa': empresa,
+        'archivo': pdf_path,
+        'hash': hash_pdf,
+        'datos': datos,
+        'error': error,
+        'cache': en_cache,
+        'confianza': confianza,
+        'duracion': time.perf_counter() - inicio,
+        'patrones': patrones.reporte_estadisticas() if medir_patrones else None,
+        'tiempos': registro.como_dict(),
+        'perfil': perfil
+    }
+
+def valores_hoja(datos):
+    """
+    Valores finales de un resultado, entrando en los diccionarios anidados (como los de EPM)
+    """
+    valores = []
+    for valor in (datos or {}).values():
+        if isinstance(valor, dict):
+            valores.extend(valores_hoja(valor))
+        else:
+            valores.append(valor)
+    return valores
+
+def campos_encontrados(datos):
+    """
+    Cantidad de valores finales del resultado que no son None ni vacíos
+    """
+    return sum(1 for valor in valores_hoja(datos) if valor not in (None, ''))
+
+def exportar(resultado, escritor=None, almacen=None):
+    """
+    Exporta el resultado a CSV y/o SQLite y suma el tiempo de exportación a sus tiempos
+    """
+    modulo = cargar_modulo(resultado['empresa'])
+    inicio = time.perf_counter()
+    if escritor is not None:
+        modulo.exportar_resultado(resultado['datos'], resultado['archivo'], escritor)
+    if almacen is not None:
+        archivo = os.path.basename(resultado['archivo'])
+        almacen.agregar(resultado['empresa'], resultado['hash'], archivo,
+                        modulo.CAMPOS_CSV, modulo.fila_csv(resultado['datos'], archivo))
+    tiempos = resultado.get('tiempos')
+    if tiempos is not None:
+        ms = round((time.perf_counter() - inicio) * 1000, 3)
+        tiempos['etapas_ms']['exportacion'] = ms
+        tiempos['total_ms'] = round(tiempos['total_ms'] + ms, 3)
+
+def mostrar_reporte_patrones(resultados, limite=15):
+    """
+    Suma los contadores de patrones de todos los trabajadores y muestra los más costosos
+    """
+    totales = {}
+    for r in resultados:
+        for fila in r.get('patrones') or []:
+            clave = (fila['campo'], fila['patron'])
+            total = totales.setdefault(clave, [0, 0, 0.0])
+            total[0] += fila['aciertos']
+            total[1] += fila['fallos']
+            total[2] += fila['segundos']
+
+    print("\nPATRONES MÁS COSTOSOS")
+    for (campo, patron), (aciertos, fallos, segundos) in sorted(
+            totales.items(), key=lambda item: item[1][2], reverse=True)[:limite]:
+        print(f"   {segundos * 1000:9.2f} ms  {aciertos:6d} aciertos  {fallos:6d} fallos  {campo}: {patron}")
+
+def mostrar_resumen(resultados, duracion_total):
+    """
+    Muestra archivos por segundo y conteos por empresa al final del lote
+    """
+    procesados = len(resultados)
+    sin_empresa = [r['archivo'] for r in resultados if r['empresa'] == DESCONOCIDO]
+    clasificados = [r for r in resultados if r['confianza'] is not None and r['empresa'] != DESCONOCIDO]
+    correctos = Counter(r['empresa'] for r in resultados if not r['error'])
+    fallidos = Counter(r['empresa'] for r in resultados if r['error'])
+
+    print("\n" + "="*60)
+    print("RESUMEN DEL LOTE")
+    print("="*60)
+    print(f"Archivos procesados: {procesados}")
+    print(f"Resueltos desde caché: {sum(1 for r in resultados if r['cache'])}")
+    print(f"Tiempo total: {duracion_total:.2f} s")
+    if duracion_total > 0:
+        print(f"Archivos por segundo: {procesados / duracion_total:.2f}")
+
+    for empresa in MODULOS:
+        if correctos[empresa] or fallidos[empresa]:
+            print(f"   {empresa}: {correctos[empresa]} correctos, {fallidos[empresa]} con error")
+
+    if clasificados:
+        print(f"Identificados por contenido: {len(clasificados)}")
+
+    if sin_empresa:
+        print(f"Sin empresa identificada: {len(sin_empresa)}")
+        for archivo in sin_empresa:
+            print(f"   {archivo}")
+
+    for r in resultados:
+        if r['error'] and r['empresa'] != DESCONOCIDO:
+            print(f"Error en {r['archivo']}: {r['error']}")
+
+def procesar_lote(archivos, trabajadores=None, empresa=None, exportar_csv=True, opciones_ocr=None,
+                  directorio_cache=None, reexportar_cache=False, ruta_sqlite=None, medir_patrones=False,
+                  ruta_tiempos=None, perfilar=0, directorio_perfiles="perfiles", clasificar_contenido=False,
+                  backends=None):
+    """
+    Reparte los PDFs entre un pool de procesos y exporta los resultados desde el proceso principal.
+
+    Los archivos resueltos desde la caché ya fueron exportados en una corrida anterior,
+    así que no se vuelven a escribir salvo que se pida `reexportar_cache`. Con
+    `ruta_sqlite` los resultados también se cargan en el almacén SQLite. Con
+    `ruta_tiempos` se escribe una línea JSON por documento con el tiempo de cada etapa, y
+    con `perfilar` se conservan los perfiles cProfile de los N documentos más lentos.
+
+    Los archivos cuyo nombre no indica la empresa (o todos, con `clasificar_contenido`)
+    se identifican por contenido en el trabajador; los no reconocidos quedan como DESCONOCIDO.
+    `backends` ({empresa: backend}) cambia el backend de texto de esas empresas.
+    """
+    if perfilar and not ruta_tiempos:
+        raise ValueError("perfilar requiere ruta_tiempos: los perfiles se eligen por los tiempos registrados")
+
+    tareas = []
+    for archivo in archivos:
+        if empresa:
+            tareas.append((empresa, archivo))
+        elif clasificar_contenido:
+            tareas.append((None, archivo))
+        else:
+            tareas.append((detectar_empresa(archivo), archivo))
+
+    # Con pool de páginas o mosaico, el trabajador crea los pools en lugar de precalentar
+    empresas_precalentar = sorted({emp for emp, _ in tareas if emp in EMPRESAS_OCR})
+
+    resultados = []
+    inicio = time.perf_counter()
+    almacen = AlmacenFacturas(ruta_sqlite) if ruta_sqlite else None
+    escritor_tiempos = EscritorTiempos(ruta_tiempos, perfilar) if ruta_tiempos else None
+    if escritor_tiempos is not None and perfilar:
+        os.makedirs(directorio_perfiles, exist_ok=True)
+    else:
+        directorio_perfiles = None
+
+    with EscritorCSV() as escritor, \
+            ProcessPoolExecutor(max_workers=trabajadores, initializer=inicializar_trabajador,
+                                initargs=(empresas_precalentar, backends, directorio_cache, opciones_ocr)) as pool:
+        futuros = [pool.submit(procesar_archivo, emp, archivo, opciones_ocr, directorio_cache, medir_patrones,
+                               directorio_perfiles)
+                   for emp, archivo in tareas]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados.append(resultado)
+            if not resultado['error']:
+                # El almacén ignora los archivos ya cargados, así que recibe también los aciertos de caché
+                nuevo = reexportar_cache or not resultado['cache']
+                exportar(resultado, escritor if exportar_csv and nuevo else None, almacen)
+            if escritor_tiempos is not None:
+                escritor_tiempos.escribir(resultado['tiempos'], resultado['perfil'])
+
+    if almacen is not None:
+        almacen.cerrar()
+    if escritor_tiempos is not None:
+        escritor_tiempos.cerrar()
+        if directorio_perfiles:
+            print(f"\nPerfiles de los {perfilar} documentos más lentos:")
+            for ruta in escritor_tiempos.perfiles():
+                print(f"   {ruta}")
+
+    duracion_total = time.perf_counter() - inicio
+    mostrar_resumen(resultados, duracion_total)
+    if medir_patrones:
+        mostrar_reporte_patrones(resultados)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa lotes de facturas PDF de todas las empresas")
+    parser.add_argument('entradas', nargs='+', help="Directorios, patrones glob o archivos PDF")
+    parser.add_argument('-t', '--trabajadores', type=int, default=os.cpu_count(),
+                        help="Número de procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument('-e', '--empresa', choices=sorted(MODULOS),
+                        help="Fuerza la empresa para todos los archivos")
+    parser.add_argument('--modo-ocr', choices=['completo', 'etiquetas'], default='completo',
+                        help="'etiquetas' reconoce solo las zonas vecinas a las etiquetas buscadas (AIRE/EPM)")
+    parser.add_argument('--preprocesar', action='store_true',
+                        help="Limpia las páginas escaneadas con OpenCV antes del OCR (AIRE/EPM)")
+    parser.add_argument('--dpi-adaptativo', action='store_true',
+                        help="Reconoce primero a baja resolución y reintenta a 300 dpi solo las páginas que fallen")
+    parser.add_argument('--plantillas', action='store_true',
+                        help="Aprende dónde está cada campo y en las facturas siguientes reconoce solo esas regiones (AIRE/EPM)")
+    parser.add_argument('--lote-ocr', type=int, default=1, metavar='N',
+                        help="Reconoce de a N páginas escaneadas por llamada al OCR (ver benchmark_lotes_ocr.py)")
+    parser.add_argument('--trabajadores-pagina', type=int, default=0, metavar='N',
+                        help="Reparte las páginas escaneadas de cada factura entre N procesos que comparten "
+                             "el modelo OCR (conviene con -t 1 para estados de cuenta largos)")
+    parser.add_argument('--mosaico', type=int, default=0, metavar='N',
+                        help="Parte cada página escaneada en N franjas reconocidas en paralelo "
+                             "(baja latencia para una sola factura, con -t 1)")
+    parser.add_argument('--cache', metavar='DIRECTORIO',
+                        help="Directorio de la caché de extracción (omite PDFs ya procesados)")
+    parser.add_argument('--reexportar-cache', action='store_true',
+                        help="Vuelve a exportar también los resultados obtenidos de la caché")
+    parser.add_argument('--sqlite', metavar='RUTA', help="Carga también los resultados en esta base SQLite")
+    parser.add_argument('--medir-patrones', action='store_true',
+                        help="Muestra aciertos, fallos y tiempo de cada patrón de búsqueda")
+    parser.add_argument('--tiempos', metavar='ARCHIVO',
+                        help="Escribe en este archivo JSONL el tiempo de cada etapa por documento")
+    parser.add_argument('--perfilar', type=int, default=0, metavar='N',
+                        help="Con --tiempos, guarda el perfil cProfile de los N documentos más lentos")
+    parser.add_argument('--directorio-perfiles', default="perfiles", metavar='DIRECTORIO',
+                        help="Directorio donde se guardan los perfiles (por defecto, 'perfiles')")
+    parser.add_argument('--clasificar', action='store_true',
+                        help="Identifica la empresa por el contenido del PDF en lugar del nombre del archivo")
+    parser.add_argument('--backend', action='append', default=[], metavar='EMPRESA=BACKEND',
+                        help=f"Backend de texto para una empresa ({', '.join(sorted(backends_texto.BACKENDS))}); "
+                             "se puede repetir")
+    parser.add_argument('--sin-exportar', action='store_true', help="No escribe los CSV de resultados")
+    args = parser.parse_args()
+
+    if args.perfilar and not args.tiempos:
+        parser.error("--perfilar requiere --tiempos")
+
+    backends = {}
+    for asignacion in args.backend:
+        empresa, _, nombre = asignacion.partition('=')
+        if empresa.upper() not in MODULOS or nombre not in backends_texto.BACKENDS:
+            parser.error(f"--backend inválido: {asignacion}")
+        backends[empresa.upper()] = nombre
+
+    archivos = expandir_entradas(args.entradas)
+    if not archivos:
+        print("No se encontraron archivos PDF")
+        return
+
+    print(f"Procesando {len(archivos)} facturas con {args.trabajadores} procesos...")
+    opciones_ocr = {'modo_ocr': args.modo_ocr, 'preprocesar': args.preprocesar,
+                    'dpi_adaptativo': args.dpi_adaptativo, 'plantillas': args.plantillas,
+                    'lote_ocr': args.lote_ocr, 'trabajadores_pagina': args.trabajadores_pagina,
+                    'mosaico': args.mosaico}
+    error = incompatibilidad_ocr(opciones_ocr)
+    if error:
+        parser.error(error)
+    procesar_lote(archivos, args.trabajadores, args.empresa, not args.sin_exportar, opciones_ocr,
+                  args.cache, args.reexportar_cache, args.sqlite, args.medir_patrones,
+                  args.tiempos, args.perfilar, args.directorio_perfiles, args.clasificar, backends)
+
+if __name__ == "__main__":
+    main()
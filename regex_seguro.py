@@ -0,0 +1,86 @@
+import time
+from functools import lru_cache
+import regex
+import patrones
+
+# Caracteres que se revisan después de cada aparición de la etiqueta
+VENTANA = 1500
+# Segundos máximos por búsqueda de un patrón
+TIEMPO_MAXIMO = 0.5
+# Segundos máximos de búsqueda por factura
+PRESUPUESTO_FACTURA = 5.0
+
+@lru_cache(maxsize=1024)
+def compilar(patron, flags=0):
+    return regex.compile(patron, flags)
+
+class PresupuestoRegex:
+    """
+    Tiempo de búsqueda disponible para una factura.
+
+    Cada búsqueda descuenta lo que tarda; cuando un patrón supera su tiempo máximo o
+    se agota el presupuesto, se anota en `excedidos` y las búsquedas siguientes
+    devuelven None en lugar de seguir consumiendo el trabajador.
+    """
+
+    def __init__(self, segundos=PRESUPUESTO_FACTURA):
+        self.segundos = segundos
+        self.usado = 0.0
+        self.excedidos = []
+
+    def restante(self):
+        return self.segundos - self.usado
+
+    def agotado(self):
+        return self.restante() <= 0
+
+    def reportar(self, contexto=""):
+        for patron, motivo in self.excedidos:
+            print(f"Advertencia{contexto}: patrón {patron!r} {motivo}")
+
+def buscar_acotado(patron, texto, flags=0, etiqueta=None, ventana=VENTANA,
+                   tiempo_maximo=TIEMPO_MAXIMO, presupuesto=None):
+    """
+    Búsqueda con ventana y tiempo limitados.
+
+    Si se indica `etiqueta`, el patrón solo se prueba en los `ventana` caracteres que
+    siguen a cada aparición de la etiqueta, en vez de recorrer todo el texto con `.*?`.
+    Cada intento usa el timeout del paquete `regex`; si se excede, la búsqueda
+    devuelve None y el patrón queda registrado en el presupuesto.
+    """
+    if presupuesto is not None and presupuesto.agotado():
+        presupuesto.excedidos.append((patron, "omitido: presupuesto de la factura agotado"))
+        return None
+
+    compilado = compilar(patron, flags)
+    limite = tiempo_maximo
+    if presupuesto is not None:
+        limite = min(limite, presupuesto.restante())
+
+    if etiqueta is None:
+        ventanas = [(0, len(texto))]
+    else:
+        etiqueta_compilada = compilar(regex.escape(etiqueta), flags & regex.IGNORECASE)
+        ventanas = ((m.start(), min(len(texto), m.start() + ventana))
+                    for m in etiqueta_compilada.finditer(texto))
+
+    inicio = time.perf_counter()
+    m = None
+    try:
+        for desde, hasta in ventanas:
+            transcurrido = time.perf_counter() - inicio
+            m = compilado.search(texto, desde, hasta, timeout=max(limite - transcurrido, 0.001))
+            if m:
+                break
+    except TimeoutError:
+        m = None
+        if presupuesto is not None:
+            presupuesto.excedidos.append((patron, f"excedió {limite:.2f} s"))
+        else:
+            print(f"Advertencia: patrón {patron!r} excedió {limite:.2f} s")
+
+    duracion = time.perf_counter() - inicio
+    if presupuesto is not None:
+        presupuesto.usado += duracion
+    patrones.registrar(patron, patron, m is not None, duracion)
+    return m
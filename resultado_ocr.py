@@ -0,0 +1,106 @@
+from bisect import bisect_left, bisect_right
+from ocr_etiquetas import contiene_etiqueta
+
+class Token:
+    """
+    Texto reconocido por easyocr con su caja (x0, y0, x1, y1) y su confianza
+    """
+    __slots__ = ('texto', 'x0', 'y0', 'x1', 'y1', 'confianza')
+
+    def __init__(self, texto, caja, confianza=1.0):
+        # easyocr entrega la caja como cuatro esquinas [[x, y], ...]
+        xs = [float(p[0]) for p in caja]
+        ys = [float(p[1]) for p in caja]
+        self.texto = texto
+        self.x0, self.y0, self.x1, self.y1 = min(xs), min(ys), max(xs), max(ys)
+        self.confianza = float(confianza)
+
+    @property
+    def alto(self):
+        return self.y1 - self.y0
+
+    def solapa_vertical(self, otro):
+        """
+        Fracción del alto menor que comparten las dos cajas en vertical
+        """
+        comun = min(self.y1, otro.y1) - max(self.y0, otro.y0)
+        return comun / max(1.0, min(self.alto, otro.alto))
+
+class ResultadoOCR:
+    """
+    Tokens de una página, ordenados por su borde superior para buscar vecinos con bisect.
+
+    `vecindad(etiqueta)` devuelve solo el texto junto a la etiqueta (a su derecha en la
+    misma línea y en las líneas de abajo), así las búsquedas de campos corren sobre unas
+    pocas palabras y no dependen del orden en que easyocr leyó la página.
+    """
+
+    def __init__(self, tokens, tamano=None):
+        self.tokens = sorted(tokens, key=lambda t: (t.y0, t.x0))
+        self._y0 = [t.y0 for t in self.tokens]
+        # (ancho, alto) en píxeles de la imagen reconocida, si se conoce
+        self.tamano = tamano
+
+    @classmethod
+    def desde_readtext(cls, resultados, tamano=None):
+        return cls((Token(texto, caja, confianza) for caja, texto, confianza in resultados), tamano)
+
+    def confianza_media(self):
+        if not self.tokens:
+            return 0.0
+        return sum(t.confianza for t in self.tokens) / len(self.tokens)
+
+    def buscar_etiqueta(self, etiqueta, umbral=0.8):
+        for token in self.tokens:
+            if contiene_etiqueta(token.texto, etiqueta, umbral):
+                return token
+        return None
+
+    def buscar_etiquetas(self, etiqueta, umbral=0.8):
+        """
+        Todas las apariciones de la etiqueta, de arriba hacia abajo
+        """
+        return [t for t in self.tokens if contiene_etiqueta(t.texto, etiqueta, umbral)]
+
+    def _entre(self, y_desde, y_hasta):
+        return self.tokens[bisect_left(self._y0, y_desde):bisect_right(self._y0, y_hasta)]
+
+    def a_la_derecha(self, token, solape=0.5):
+        """
+        Tokens de la misma línea que empiezan a la derecha de `token`, de izquierda a derecha
+        """
+        candidatos = self._entre(token.y0 - token.alto, token.y1)
+        return sorted((t for t in candidatos
+                       if t is not token and t.x0 >= token.x0 and token.solapa_vertical(t) >= solape),
+                      key=lambda t: t.x0)
+
+    def debajo(self, token, lineas=2):
+        """
+        Tokens de las `lineas` líneas siguientes cuya columna empieza en la de `token` o más a la derecha
+        """
+        ancho = token.x1 - token.x0
+        candidatos = self._entre(token.y1 - token.alto * 0.5, token.y1 + token.alto * (lineas + 0.5))
+        return [t for t in candidatos
+                if t is not token and t.y0 > token.y0 + token.alto * 0.5
+                and t.x1 >= token.x0 and t.x0 <= token.x1 + ancho * 2]
+
+    def vecindad(self, etiqueta, lineas_debajo=1, umbral=0.8):
+        """
+        Texto de la etiqueta y de sus vecinos (derecha y abajo), o None si la etiqueta no está
+        """
+        token = self.buscar_etiqueta(etiqueta, umbral)
+        if token is None:
+            return None
+        linea = " ".join(t.texto for t in [token] + self.a_la_derecha(token))
+        abajo = " ".join(t.texto for t in self.debajo(token, lineas_debajo)) if lineas_debajo else ""
+        return linea + "\n" + abajo if abajo else linea
+
+def vecindad(paginas, etiqueta, lineas_debajo=1, umbral=0.8):
+    """
+    Vecindad de la primera página (en orden) donde aparece la etiqueta
+    """
+    for pagina in paginas or []:
+        texto = pagina.vecindad(etiqueta, lineas_debajo, umbral)
+        if texto is not None:
+            return texto
+    return None
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Los scripts viven en la raíz del repositorio, sin paquete
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import estado
+import paginacion
+
+@pytest.fixture(autouse=True)
+def estado_temporal(tmp_path, monkeypatch):
+    """
+    Cada prueba aprende en su propio directorio de estado, sin tocar el del repositorio
+    """
+    monkeypatch.setattr(estado, 'DIRECTORIO_ESTADO', str(tmp_path / 'estado'))
+    monkeypatch.setattr(paginacion, '_mapa', None)
+    return tmp_path / 'estado'
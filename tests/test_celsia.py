@@ -0,0 +1,9 @@
+import csv
+
+import Script_CELSIA
+
+def test_exportar_a_csv_usa_la_ruta_recibida(tmp_path):
+    destino = str(tmp_path / 'celsia.csv')
+    Script_CELSIA.exportar_a_csv({}, str(tmp_path / 'factura.pdf'), destino)
+    with open(destino, encoding='utf-8') as f:
+        assert next(csv.DictReader(f))['Archivo_PDF'] == 'factura.pdf'
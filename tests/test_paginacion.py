@@ -0,0 +1,78 @@
+import Script_AAA
+import backends_texto
+import paginacion
+from generador_facturas import LINEAS, RELLENO, pdf_con_texto
+from paginacion import MapaPaginas, leer_hasta_completar
+
+RELLENO_PAGINA = [RELLENO.format(n) for n in range(3)]
+
+def lector(paginas, leidas):
+    def leer_pagina(numero):
+        leidas.append(numero)
+        return paginas[numero - 1]
+    return leer_pagina
+
+def campos_en(texto):
+    return {linea.split("=")[0] for linea in texto.splitlines() if "=" in linea}
+
+def test_lee_todas_las_paginas_si_falta_un_campo(tmp_path):
+    paginas = ["a=1", "nada", "b=2"]
+    leidas = []
+    mapa = MapaPaginas(str(tmp_path / "mapa.json"))
+    texto = leer_hasta_completar("X", 3, lector(paginas, leidas), campos_en, {"a", "b", "c"}, mapa=mapa)
+    assert leidas == [1, 2, 3]
+    assert texto == "a=1\nnada\nb=2\n"
+
+def test_se_detiene_al_completar_y_aprende_el_orden(tmp_path):
+    paginas = ["nada", "nada", "a=1 \nb=2"]
+    ruta = str(tmp_path / "mapa.json")
+
+    leidas = []
+    leer_hasta_completar("X", 3, lector(paginas, leidas), campos_en, {"a", "b"}, mapa=MapaPaginas(ruta))
+    assert leidas == [1, 2, 3]
+
+    leidas = []
+    texto = leer_hasta_completar("X", 3, lector(paginas, leidas), campos_en, {"a", "b"}, mapa=MapaPaginas(ruta))
+    assert leidas == [3]
+    assert texto == "a=1 \nb=2\n"
+
+def test_acumulado_resuelve_sobre_todo_lo_leido(tmp_path):
+    paginas = ["inicio", "fin"]
+    mapa = MapaPaginas(str(tmp_path / "mapa.json"))
+
+    def seccion(texto):
+        return {"seccion"} if "inicio" in texto and "fin" in texto else set()
+
+    leidas = []
+    leer_hasta_completar("X", 2, lector(paginas, leidas), seccion, {"seccion"}, mapa=mapa, acumulado=True)
+    assert leidas == [1, 2]
+    assert mapa.orden("X", 2) == [2, 1]
+
+def test_mapa_persiste_y_suma_entre_instancias(tmp_path):
+    ruta = str(tmp_path / "mapa.json")
+    primero, segundo = MapaPaginas(ruta), MapaPaginas(ruta)
+    primero.registrar("X", "a", 2)
+    segundo.registrar("X", "a", 2)
+    segundo.registrar("X", "b", 3)
+    primero.guardar()
+    segundo.guardar()
+
+    recargado = MapaPaginas(ruta)
+    assert recargado.conteos == {"X": {"a": {"2": 2}, "b": {"3": 1}}}
+    assert recargado.orden("X", 3) == [2, 3, 1]
+
+def test_aaa_con_orden_aprendido_igual_que_lectura_completa(tmp_path):
+    # Los conceptos de acueducto quedan solos en la página 1 y todas las etiquetas en la 2;
+    # tras la primera corrida la página 2 va primero y no debe bastar por sí sola
+    lineas = LINEAS['AAA']
+    ruta = str(tmp_path / "aaa.pdf")
+    pdf_con_texto([lineas[:4] + RELLENO_PAGINA, lineas[4:] + RELLENO_PAGINA], ruta)
+
+    with backends_texto.abrir(ruta, 'AAA') as documento:
+        completo = "".join(documento.texto(n)[0] + "\n" for n in range(1, documento.total + 1))
+    esperado = Script_AAA.extraer_factura(completo)
+    assert esperado["Cargo_fijo_Comercial_Acueducto"] == 10000
+
+    assert Script_AAA.procesar_factura(ruta) == esperado
+    assert paginacion.obtener_mapa().orden('AAA', 2) == [2, 1]
+    assert Script_AAA.procesar_factura(ruta) == esperado
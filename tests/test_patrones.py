@@ -0,0 +1,49 @@
+import pytest
+
+from patrones import Campo, EspecificacionCampos, Patron, _grupos_sin_prefijos, etiqueta_literal
+
+@pytest.mark.parametrize("patron, esperada", [
+    (r"TOTAL A PAGAR\s*\$([\d\.,]+)", "TOTAL A PAGAR"),
+    (r"Valor \(COP\)\s*([\d\.,]+)", "Valor (COP)"),
+    (r"Consumos?\s+(\d+)", "Consumo"),
+    (r"Total(?: a pagar)?\s*([\d\.,]+)", "Total"),
+    (r"NIT\s*(\d+)", "NIT"),
+    (r"\d+ kWh", None),
+    # Alternativas completas: ninguna parte es obligatoria
+    (r"TOTAL A PAGAR\s*([\d\.,]+)|Valor total\s*([\d\.,]+)", None),
+    (r"Total factura|Total", None),
+    # Alternancia dentro de un grupo o de una clase: el prefijo sigue siendo obligatorio
+    (r"Cargo fijo (?:Comercial|Residencial)\s*\$([\d\.,]+)", "Cargo fijo "),
+    (r"Tasa de uso[|:]\s*([\d\.,]+)", "Tasa de uso"),
+    (r"Subtotal \|\s*([\d\.,]+)", "Subtotal |"),
+])
+def test_etiqueta_literal(patron, esperada):
+    assert etiqueta_literal(patron) == esperada
+
+def test_grupos_sin_prefijos_separa_etiquetas_solapadas():
+    grupos = _grupos_sin_prefijos({"TOTAL", "TOTAL A PAGAR", "TOTAL ASEO", "Consumo"})
+    for grupo in grupos:
+        for a in grupo:
+            assert not any(b != a and b.lower().startswith(a.lower()) for b in grupo)
+    assert sorted(e for grupo in grupos for e in grupo) == sorted({"TOTAL", "TOTAL A PAGAR", "TOTAL ASEO", "Consumo"})
+    assert len(grupos) == 2
+
+def test_prefiltro_ubica_la_primera_aparicion_de_etiquetas_solapadas():
+    especificacion = EspecificacionCampos("PRUEBA", [
+        Campo("Total", [r"TOTAL\s*\$([\d\.,]+)"]),
+        Campo("Total_Aseo", [r"TOTAL ASEO\s*\$([\d\.,]+)"]),
+        Campo("Total_Pagar", [r"TOTAL A PAGAR\s*\$([\d\.,]+)"]),
+    ])
+    texto = "TOTAL ASEO $20\nTOTAL A PAGAR $50\nTOTAL $70\n"
+    assert especificacion.ubicar_etiquetas(texto) == {"TOTAL ASEO": 0, "TOTAL A PAGAR": 15, "TOTAL": 0}
+    assert especificacion.escanear(texto) == {"Total": "70", "Total_Aseo": "20", "Total_Pagar": "50"}
+
+def test_patron_con_alternativas_no_se_descarta_por_el_prefiltro():
+    # Antes la etiqueta era "TOTAL A PAGAR" y la segunda alternativa nunca se buscaba
+    especificacion = EspecificacionCampos("PRUEBA", [
+        Campo("Total", [Patron(r"TOTAL A PAGAR\s*\$([\d\.,]+)|Valor total\s*\$([\d\.,]+)",
+                               normalizador=lambda m: m.group(1) or m.group(2))]),
+    ])
+    assert especificacion.escanear("Valor total $1.500\n") == {"Total": "1.500"}
+    assert especificacion.resueltos("Valor total $1.500\n") == {"Total"}
+    assert especificacion.escanear("TOTAL A PAGAR $900\n") == {"Total": "900"}
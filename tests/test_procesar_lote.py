@@ -0,0 +1,56 @@
+from procesar_lote import campos_encontrados, valores_hoja
+
+def test_campos_encontrados_cuenta_hojas_de_diccionarios_anidados():
+    datos = {
+        'Total': 1000.0,
+        'Vacio': '',
+        'Energia': {'Consumo': 250, 'Valor': None},
+        'Acueducto': {'Cargo': {'Fijo': 0.0, 'Variable': None}},
+    }
+    assert len(valores_hoja(datos)) == 6
+    assert campos_encontrados(datos) == 3
+
+def test_campos_encontrados_sin_datos():
+    assert campos_encontrados(None) == 0
+    assert campos_encontrados({'Energia': {'Consumo': None}}) == 0
+
+def test_pools_de_paginas_antes_del_ocr_de_la_miniatura(monkeypatch, tmp_path):
+    import pool_ocr
+    import procesar_lote
+    from clasificador import DESCONOCIDO
+
+    llamadas = []
+
+    def clasificar(pdf_path, usar_ocr=True):
+        llamadas.append(('clasificar', usar_ocr))
+        return {'empresa': DESCONOCIDO, 'confianza': 0.0, 'origen': 'metadatos'}
+
+    monkeypatch.setattr(procesar_lote, 'clasificar', clasificar)
+    monkeypatch.setattr(pool_ocr, 'obtener_pool', lambda trabajadores, gpu=False: llamadas.append(('pool', trabajadores)))
+
+    resultado = procesar_lote.procesar_archivo(None, str(tmp_path / 'escaneada.pdf'), {'trabajadores_pagina': 2})
+    assert resultado['error']
+    assert llamadas[0] == ('clasificar', False)
+    assert llamadas[-1] == ('clasificar', True)
+    assert ('pool', 2) in llamadas[1:-1]
+
+def test_trabajador_con_mosaico_crea_pools_en_lugar_de_precalentar(monkeypatch):
+    import pool_ocr
+    import procesar_lote
+
+    creados = []
+    monkeypatch.setattr(pool_ocr, 'obtener_pool', lambda trabajadores, gpu=False: creados.append((trabajadores, gpu)))
+
+    procesar_lote.inicializar_trabajador(['AIRE', 'EPM'], opciones_ocr={'mosaico': 4, 'trabajadores_pagina': 2})
+    assert sorted(creados) == [(2, False), (2, True), (4, False), (4, True)]
+
+def test_clave_de_cache_cambia_con_el_backend(monkeypatch, tmp_path):
+    import backends_texto
+    from cache_extraccion import CacheExtraccion
+    from procesar_lote import opciones_resultado
+
+    cache = CacheExtraccion(str(tmp_path / 'cache'))
+    antes = cache.clave('abc', 'CELSIA', '1', opciones_resultado('CELSIA', None))
+    monkeypatch.setitem(backends_texto.BACKEND_POR_EMPRESA, 'CELSIA', 'pdfplumber')
+    despues = cache.clave('abc', 'CELSIA', '1', opciones_resultado('CELSIA', None))
+    assert antes != despues
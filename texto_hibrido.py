@@ -0,0 +1,123 @@
+from tiempos import etapa
+
+# Mínimo de caracteres con fuente para considerar que la página tiene capa de texto útil
+MIN_CARACTERES = 40
+
+def tiene_capa_texto(page, min_caracteres=MIN_CARACTERES):
+    """
+    Revisa si la página trae texto embebido suficiente (cantidad de caracteres y fuentes)
+    """
+    chars = page.chars
+    if len(chars) < min_caracteres:
+        return False
+    con_fuente = sum(1 for c in chars if c.get('fontname') and c.get('text', '').strip())
+    return con_fuente >= min_caracteres
+
+def ocr_texto_plano(img_np):
+    # Importación diferida: los PDFs digitales no deben cargar el modelo OCR
+    from lector_ocr import obtener_lector
+    return "\n".join(obtener_lector().readtext(img_np, detail=0))
+
+def ocr_pagina_suelta(pdf_path, numero, ocr_pagina=ocr_texto_plano, dpi=300):
+    """
+    Rasteriza y reconoce solo la página `numero` (desde 1)
+    """
+    from paginas import iterar_paginas
+    for img_np in iterar_paginas(pdf_path, dpi=dpi, escala_grises=True, paginas=[numero]):
+        with etapa("ocr"):
+            return ocr_pagina(img_np)
+    return ""
+
+class LectorPaginas:
+    """
+    Backend pdfplumber: capa de texto de cada página y OCR solo en las páginas sin texto.
+
+    Se usa como context manager; `texto(numero)` lee una página bajo demanda y
+    `textos()` el documento completo, rasterizando juntas las páginas sin texto.
+    Con `ocr_pagina=None` nunca se usa OCR: las páginas sin texto suficiente se
+    devuelven con el poco texto que tengan.
+    """
+
+    def __init__(self, pdf_path, ocr_pagina=ocr_texto_plano, dpi=300, min_caracteres=MIN_CARACTERES):
+        self.pdf_path = pdf_path
+        self.ocr_pagina = ocr_pagina
+        self.dpi = dpi
+        self.min_caracteres = min_caracteres
+        self.pdf = None
+        self.total = 0
+
+    def __enter__(self):
+        # Importación diferida: importar el módulo no debe cargar pdfplumber (ni pdfminer)
+        import pdfplumber
+        with etapa("apertura_pdf"):
+            self.pdf = pdfplumber.open(self.pdf_path)
+            self.total = len(self.pdf.pages)
+        return self
+
+    def __exit__(self, *exc):
+        self.pdf.close()
+
+    def texto(self, numero):
+        """
+        Devuelve (texto, origen) de la página `numero` (desde 1)
+        """
+        page = self.pdf.pages[numero - 1]
+        with etapa("extraccion_texto"):
+            if self.ocr_pagina is None or tiene_capa_texto(page, self.min_caracteres):
+                return page.extract_text() or "", "texto"
+        return ocr_pagina_suelta(self.pdf_path, numero, self.ocr_pagina, self.dpi), "ocr"
+
+    def textos(self):
+        """
+        Devuelve una lista (texto, origen) por página, en orden
+        """
+        textos = []
+        sin_texto = []
+        for numero, page in enumerate(self.pdf.pages, 1):
+            with etapa("extraccion_texto"):
+                if self.ocr_pagina is None or tiene_capa_texto(page, self.min_caracteres):
+                    textos.append((page.extract_text() or "", "texto"))
+                else:
+                    textos.append(None)
+                    sin_texto.append(numero)
+
+        if sin_texto and getattr(self.ocr_pagina, 'reconocer_pdf', None):
+            # El OCR rasteriza y reconoce las páginas por su cuenta (p. ej. en varios procesos)
+            with etapa("ocr"):
+                resultados = self.ocr_pagina.paginas_pdf(self.pdf_path, sin_texto, self.dpi)
+            for numero, texto in zip(sin_texto, resultados):
+                textos[numero - 1] = (texto, "ocr")
+        elif sin_texto:
+            from paginas import iterar_paginas
+            imagenes = iterar_paginas(self.pdf_path, dpi=self.dpi, escala_grises=True, paginas=sin_texto)
+            por_lote = getattr(self.ocr_pagina, 'paginas_por_lote', 1)
+            if por_lote > 1:
+                # El OCR admite lotes: se reconocen varias páginas por llamada
+                from ocr_lotes import en_bloques
+                for bloque in en_bloques(zip(sin_texto, imagenes), por_lote):
+                    with etapa("ocr"):
+                        resultados = self.ocr_pagina.varias([img_np for _, img_np in bloque])
+                    for (numero, _), texto in zip(bloque, resultados):
+                        textos[numero - 1] = (texto, "ocr")
+                return textos
+            for numero, img_np in zip(sin_texto, imagenes):
+                with etapa("ocr"):
+                    textos[numero - 1] = (self.ocr_pagina(img_np), "ocr")
+
+        return textos
+
+def textos_por_pagina(pdf_path, ocr_pagina=ocr_texto_plano, dpi=300, min_caracteres=MIN_CARACTERES):
+    """
+    Devuelve una lista (texto, origen) por página, en orden.
+
+    Las páginas con capa de texto se leen con pdfplumber (origen "texto"); solo las
+    páginas sin texto se rasterizan y pasan por `ocr_pagina` (origen "ocr").
+    """
+    with LectorPaginas(pdf_path, ocr_pagina, dpi, min_caracteres) as lector:
+        return lector.textos()
+
+def texto_documento(pdf_path, ocr_pagina=ocr_texto_plano, dpi=300):
+    """
+    Texto completo del PDF, una página por bloque, recurriendo a OCR solo donde haga falta
+    """
+    return "".join(texto + "\n" for texto, _ in textos_por_pagina(pdf_path, ocr_pagina, dpi))
@@ -0,0 +1,103 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+class RegistroDocumento:
+    """
+    Tiempos por etapa de un documento (apertura del PDF, texto, rasterización, OCR,
+    búsqueda de campos, exportación), acumulados en segundos
+    """
+
+    def __init__(self, archivo, empresa=None):
+        self.archivo = archivo
+        self.empresa = empresa
+        self.etapas = {}
+        self.total = 0.0
+
+    def agregar(self, nombre, segundos):
+        self.etapas[nombre] = self.etapas.get(nombre, 0.0) + segundos
+
+    def como_dict(self):
+        return {
+            'archivo': self.archivo,
+            'empresa': self.empresa,
+            'total_ms': round(self.total * 1000, 3),
+            'etapas_ms': {nombre: round(s * 1000, 3) for nombre, s in self.etapas.items()}
+        }
+
+def registro_actual():
+    return getattr(_local, 'registro', None)
+
+@contextmanager
+def etapa(nombre):
+    """
+    Mide una etapa del documento en curso; sin documento activo no hace nada
+    """
+    registro = getattr(_local, 'registro', None)
+    if registro is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro.agregar(nombre, time.perf_counter() - inicio)
+
+@contextmanager
+def documento(archivo, empresa=None, ruta_perfil=None):
+    """
+    Activa el registro de etapas para un documento en este hilo. Con `ruta_perfil`
+    también corre cProfile y guarda el perfil en esa ruta.
+    """
+    registro = RegistroDocumento(archivo, empresa)
+    anterior = getattr(_local, 'registro', None)
+    _local.registro = registro
+    perfil = cProfile.Profile() if ruta_perfil else None
+    inicio = time.perf_counter()
+    if perfil:
+        perfil.enable()
+    try:
+        yield registro
+    finally:
+        if perfil:
+            perfil.disable()
+            perfil.dump_stats(ruta_perfil)
+        registro.total = time.perf_counter() - inicio
+        _local.registro = anterior
+
+class EscritorTiempos:
+    """
+    Escribe un registro JSON por línea y conserva solo los perfiles de los N documentos más lentos
+    """
+
+    def __init__(self, ruta, max_perfiles=0):
+        self.archivo = open(ruta, 'a', encoding='utf-8')
+        self.max_perfiles = max_perfiles
+        self._perfiles = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def escribir(self, registro, ruta_perfil=None):
+        self.archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        if ruta_perfil:
+            self._perfiles.append((registro['total_ms'], ruta_perfil))
+            self._perfiles.sort(reverse=True)
+            for _, sobrante in self._perfiles[self.max_perfiles:]:
+                if os.path.exists(sobrante):
+                    os.remove(sobrante)
+            del self._perfiles[self.max_perfiles:]
+
+    def perfiles(self):
+        return [ruta for _, ruta in self._perfiles]
+
+    def cerrar(self):
+        self.archivo.close()